@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for audio stitching.
+
+Compares chaining ``crossfade`` calls (each join copies the whole result so far)
+with the incremental ``AudioAssembler``. The assembler's cost per segment should
+stay flat as the number of segments grows, i.e. total time is linear.
+
+Usage:
+    python benchmarks/bench_audio_assembly.py [--segments 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+import numpy
+from rich import print as rprint
+
+from processing.audio_generator import AudioAssembler, crossfade
+
+SAMPLE_RATE = 24000
+
+
+def make_segments(count: int, segment_seconds: float = 0.5, seed: int = 0):
+    rng = numpy.random.default_rng(seed)
+    length = int(segment_seconds * SAMPLE_RATE)
+    return [rng.uniform(-0.5, 0.5, length).astype(numpy.float32) for _ in range(count)]
+
+
+def bench_crossfade_chain(segments) -> float:
+    start = time.perf_counter()
+    result = segments[0]
+    for segment in segments[1:]:
+        result = crossfade(result, segment)
+    return time.perf_counter() - start
+
+
+def bench_assembler(segments) -> float:
+    start = time.perf_counter()
+    assembler = AudioAssembler(sample_rate=SAMPLE_RATE)
+    for segment in segments:
+        assembler.append(segment)
+    assembler.getvalue()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=10000, help="Largest segment count to assemble")
+    parser.add_argument("--legacy-limit", type=int, default=1000,
+                        help="Largest segment count to run through the quadratic crossfade chain")
+    args = parser.parse_args()
+
+    # Warm up the JIT so compilation is not measured.
+    warmup = make_segments(3)
+    bench_crossfade_chain(warmup)
+    bench_assembler(warmup)
+
+    counts = sorted({max(2, args.segments // d) for d in (10, 5, 2, 1)})
+    rprint(f"[blue]{'segments':>10} {'method':>12} {'total (s)':>10} {'per segment (us)':>18}[/blue]")
+    for count in counts:
+        segments = make_segments(count)
+        timings = [("assembler", bench_assembler(segments))]
+        if count <= args.legacy_limit:
+            timings.append(("crossfade", bench_crossfade_chain(segments)))
+        for name, elapsed in timings:
+            rprint(f"{count:>10} {name:>12} {elapsed:>10.3f} {elapsed / count * 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-audio versus steady-state throughput for the chunk plan modes.
+
+Synthesizes the chunks of a sample text in order, as the frontend requests them,
+with the 'throughput' and 'latency' plans. Reported per mode:
+
+- time to first audio: synthesis time of chunk 0, i.e. how long the user waits
+- throughput: seconds of audio produced per second of synthesis over all chunks
+
+Requires the Kokoro model (it is loaded through ``ModelManager``).
+
+Usage:
+    python benchmarks/bench_chunk_plan.py [--voice af_heart] [--max-chunks 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from rich import print as rprint
+
+from processing.text_processor import PLAN_MODES, plan_chunks
+from services.model_service import ModelManager
+
+SAMPLE_RATE = 24000
+SAMPLE_TEXT = (
+    "The old lighthouse stood at the edge of the cliff, its white paint peeling after decades of salt "
+    "and wind. Every evening the keeper climbed the spiral stairs, counting each of the one hundred and "
+    "twelve steps, and lit the great lamp that swept its beam across the restless water. Ships that had "
+    "never seen his face trusted him with their lives. "
+) * 6
+
+
+def synthesize(pipeline, text: str, voice: str) -> float:
+    """Synthesize ``text`` and return the audio duration in seconds."""
+    samples = 0
+    for _, _, audio in pipeline(text, voice=voice, speed=1.0):
+        samples += len(audio)
+    return samples / SAMPLE_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--voice", default="af_heart", help="Voice to synthesize with")
+    parser.add_argument("--max-chunks", type=int, default=8, help="Number of chunks to synthesize per mode")
+    args = parser.parse_args()
+
+    manager = ModelManager(device=os.getenv("MODEL_DEVICE") or None)
+    lang_code = args.voice[0]
+    with manager.get_pipeline(lang_code) as pipeline:
+        synthesize(pipeline, "Warm up.", args.voice)
+
+        rprint(f"[blue]{'mode':>11} {'chunks':>7} {'first audio (s)':>16} {'audio (s)':>10} "
+               f"{'synth (s)':>10} {'audio s / s':>12}[/blue]")
+        for mode in PLAN_MODES:
+            chunks = list(plan_chunks(SAMPLE_TEXT, lang_code, mode=mode))[:args.max_chunks]
+            first_audio = None
+            audio_seconds = 0.0
+            start = time.perf_counter()
+            for chunk in chunks:
+                audio_seconds += synthesize(pipeline, chunk.text, args.voice)
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start
+            elapsed = time.perf_counter() - start
+            rprint(f"{mode:>11} {len(chunks):>7} {first_audio:>16.3f} {audio_seconds:>10.2f} "
+                   f"{elapsed:>10.2f} {audio_seconds / elapsed:>12.2f}")
+
+    manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
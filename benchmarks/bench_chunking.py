@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming text chunker on multi-megabyte corpora.
+
+For each corpus size, ``iter_chunks`` is consumed without keeping the chunks,
+as the TTS endpoint does, while tracemalloc records the peak memory allocated
+on top of the input text. Time per megabyte should stay flat (linear time) and
+the peak should not grow with the corpus (constant extra memory).
+
+Usage:
+    python benchmarks/bench_chunking.py [--max-mb 16]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from rich import print as rprint
+
+from processing.text_processor import iter_chunks
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "naïve",
+         "café", "approximately", "characteristically", "a", "of", "and")
+
+
+def make_corpus(size_bytes: int, seed: int = 0) -> str:
+    """Generate prose with sentences and clauses of varied length."""
+    rng = random.Random(seed)
+    sentences = []
+    size = 0
+    while size < size_bytes:
+        clauses = [" ".join(rng.choices(WORDS, k=rng.randint(3, 25))) for _ in range(rng.randint(1, 4))]
+        sentence = ", ".join(clauses).capitalize() + rng.choice((".", "!", "?", "..."))
+        sentences.append(sentence)
+        size += len(sentence.encode("utf-8")) + 1
+    return " ".join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-mb", type=int, default=16, help="Largest corpus size in MB")
+    args = parser.parse_args()
+
+    sizes = [mb for mb in (1, 2, 4, 8, 16, 32, 64) if mb <= args.max_mb]
+    rprint(f"[blue]{'corpus (MB)':>11} {'chunks':>9} {'time (s)':>9} {'s/MB':>7} {'peak extra (KiB)':>17}[/blue]")
+    for mb in sizes:
+        text = make_corpus(mb * 2**20)
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_chunks(text))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rprint(f"{mb:>11} {count:>9} {elapsed:>9.3f} {elapsed / mb:>7.3f} {peak / 1024:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the database engine under mixed concurrent reads and writes.
+
+Runs reader threads (file listings and segment range reads, as the API does)
+against writer threads (file inserts, each its own transaction) on a scratch
+SQLite database, once with a plain engine (rollback journal, no pragmas, as
+before ``create_db_engine``) and once with the tuned engine (WAL and the
+other ``SQLITE_PRAGMAS``). Also times building the listing statement on every
+call against executing the cached statement.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+sys.path.insert(0, BACKEND_DIR)
+
+# The models create their database on import; point them at a scratch directory.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="torchts-bench-")
+os.environ["TORCHTS_DATA_DIR"] = os.path.join(SCRATCH_DIR, "data")
+os.chdir(SCRATCH_DIR)
+
+from rich import print as rprint
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from storage.models import Base, Document, DocumentSegment, File, Profile, create_db_engine
+from services.file_service import _file_listing_query, _segment_range_statement
+
+PAGE_SIZE = 100
+SEGMENTS = 200
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, rank - 1)] if ordered else 0.0
+
+
+def populate(db_engine, files: int) -> tuple:
+    Base.metadata.create_all(db_engine)
+    with Session(db_engine) as session:
+        profile = Profile(name="bench")
+        document = Document(content_hash="bench", file_type="txt", content="", pages=SEGMENTS)
+        session.add_all([profile, document])
+        session.flush()
+        session.execute(insert(DocumentSegment), [
+            {"document_id": document.id, "seq": seq, "page": seq + 1, "char_start": seq * 3000,
+             "char_end": (seq + 1) * 3000, "content": "x" * 3000}
+            for seq in range(SEGMENTS)
+        ])
+        session.execute(insert(File), [
+            {"profile_id": profile.id, "document_id": document.id, "filename": f"book-{i}.txt",
+             "file_type": "txt", "pages": SEGMENTS}
+            for i in range(files)
+        ])
+        session.commit()
+        return profile.id, document.id
+
+
+def run_mixed(db_engine, profile_id: int, document_id: int, readers: int, writers: int, seconds: float) -> dict:
+    """Run readers and writers concurrently for ``seconds`` and collect their latencies."""
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"read": [], "write": [], "errors": 0}
+
+    def reader(worker: int):
+        latencies = []
+        segment = worker
+        while not stop.is_set():
+            start = time.perf_counter()
+            with Session(db_engine) as session:
+                session.execute(*_file_listing_query(profile_id, PAGE_SIZE, None, None, None)).all()
+                session.execute(_segment_range_statement("seq"), {
+                    "document_id": document_id, "segment": segment % SEGMENTS, "count": 5,
+                }).all()
+            latencies.append(time.perf_counter() - start)
+            segment += 7
+        with lock:
+            stats["read"].extend(latencies)
+
+    def writer(worker: int):
+        latencies = []
+        errors = 0
+        n = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with Session(db_engine) as session:
+                    session.execute(insert(File), [{
+                        "profile_id": profile_id, "document_id": document_id,
+                        "filename": f"upload-{worker}-{n}.txt", "file_type": "txt", "pages": SEGMENTS,
+                    }])
+                    session.commit()
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                errors += 1
+            n += 1
+        with lock:
+            stats["write"].extend(latencies)
+            stats["errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def time_statement_build(db_engine, profile_id: int, repeats: int) -> tuple:
+    """Seconds per listing executed with a freshly built statement versus the cached one."""
+    def rebuilt():
+        return (select(File.id, File.filename, File.file_type, File.pages, File.created_at)
+                .where(File.profile_id == profile_id, File.id > 0)
+                .order_by(File.id).limit(10))
+
+    with Session(db_engine) as session:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            session.execute(rebuilt()).all()
+        built = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            session.execute(*_file_listing_query(profile_id, 10, 0, None, None)).all()
+        cached = (time.perf_counter() - start) / repeats
+    return built, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--files", type=int, default=2000, help="Files in the profile before the run")
+    args = parser.parse_args()
+
+    configurations = (
+        ("plain (rollback journal)", {"pragmas": {}}),
+        ("tuned (WAL + pragmas)", {}),
+    )
+    rprint(f"[blue]{args.readers} readers, {args.writers} writers, {args.seconds:g}s per run[/blue]")
+    rprint(f"[blue]{'engine':>24} {'reads/s':>9} {'read p95 (ms)':>14} "
+           f"{'writes/s':>9} {'write p95 (ms)':>15} {'errors':>7}[/blue]")
+    for name, options in configurations:
+        url = f"sqlite:///{os.path.join(SCRATCH_DIR, name.split()[0] + '.db')}"
+        db_engine = create_db_engine(url, **options)
+        profile_id, document_id = populate(db_engine, args.files)
+        stats = run_mixed(db_engine, profile_id, document_id, args.readers, args.writers, args.seconds)
+        rprint(f"{name:>24} {len(stats['read']) / args.seconds:>9.0f} "
+               f"{percentile(stats['read'], 95) * 1000:>14.2f} "
+               f"{len(stats['write']) / args.seconds:>9.0f} "
+               f"{percentile(stats['write'], 95) * 1000:>15.2f} {stats['errors']:>7}")
+        if name.startswith("tuned"):
+            built, cached = time_statement_build(db_engine, profile_id, 2000)
+            rprint(f"[blue]Listing query: built per call {built * 1e6:.0f} us, "
+                   f"cached statement {cached * 1e6:.0f} us[/blue]")
+        db_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming DOCX and ODT parsers.
+
+Generates large DOCX and ODT files (paragraphs with styled runs/spans and a
+table every few hundred paragraphs) and parses them with ``parse_docx`` and
+``parse_odt``, recording time and tracemalloc peak. When python-docx and odfpy
+are installed, the object-model parsers they provide are run on the same files
+for comparison.
+
+Usage:
+    python benchmarks/bench_document_parsing.py [--paragraphs 20000]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from rich import print as rprint
+
+from processing.document_parser import parse_docx, parse_odt
+
+try:  # Optional: the previous object-model parsers, for comparison
+    from docx import Document
+except ImportError:
+    Document = None
+try:
+    from odf.opendocument import load as load_odt
+    from odf.text import P as OdtParagraph
+except ImportError:
+    load_odt = None
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "approximately",
+         "characteristically", "a", "of", "and", "lighthouse", "harbour", "committee")
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+ODT_NS = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" office:version="1.2"'
+)
+ODT_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0">'
+    '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.text"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+
+def sentences(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield escape(" ".join(rng.choices(WORDS, k=rng.randint(8, 40))).capitalize() + ".")
+
+
+def make_docx(paragraphs: int) -> bytes:
+    body = []
+    for i, sentence in enumerate(sentences(paragraphs)):
+        head, _, tail = sentence.partition(" ")
+        body.append(f'<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>{head}</w:t></w:r>'
+                    f'<w:r><w:t xml:space="preserve"> {tail}</w:t></w:r></w:p>')
+        if i % 500 == 499:
+            body.append('<w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>')
+    document = (f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{W_NS}"><w:body>'
+                + "".join(body) + '</w:body></w:document>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", DOCX_RELS)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def make_odt(paragraphs: int) -> bytes:
+    body = []
+    for i, sentence in enumerate(sentences(paragraphs)):
+        head, _, tail = sentence.partition(" ")
+        body.append(f'<text:p><text:span>{head}</text:span> {tail}</text:p>')
+        if i % 500 == 499:
+            body.append('<table:table><table:table-row><table:table-cell>'
+                        '<text:p>cell</text:p></table:table-cell></table:table-row></table:table>')
+    content = (f'<?xml version="1.0" encoding="UTF-8"?><office:document-content {ODT_NS}>'
+               '<office:body><office:text>' + "".join(body) + '</office:text></office:body>'
+               '</office:document-content>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/vnd.oasis.opendocument.text", zipfile.ZIP_STORED)
+        archive.writestr("META-INF/manifest.xml", ODT_MANIFEST)
+        archive.writestr("content.xml", content)
+    return buffer.getvalue()
+
+
+def object_model_docx(content: bytes) -> str:
+    return "\n".join(para.text for para in Document(io.BytesIO(content)).paragraphs)
+
+
+def object_model_odt(content: bytes) -> str:
+    document = load_odt(io.BytesIO(content))
+    return "\n".join(
+        "".join(node.data for node in paragraph.childNodes if node.nodeType == node.TEXT_NODE)
+        for paragraph in document.getElementsByType(OdtParagraph)
+    )
+
+
+def measure(parse, content: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    parse(content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=20000, help="Paragraphs in each generated document")
+    args = parser.parse_args()
+
+    cases = [
+        ("docx", make_docx(args.paragraphs), [("streaming", parse_docx),
+                                              ("python-docx", object_model_docx if Document else None)]),
+        ("odt", make_odt(args.paragraphs), [("streaming", parse_odt),
+                                            ("odfpy", object_model_odt if load_odt else None)]),
+    ]
+    rprint(f"[blue]{'format':>6} {'parser':>12} {'file (KiB)':>11} {'time (s)':>9} {'peak (MiB)':>11}[/blue]")
+    for file_type, content, parsers in cases:
+        for name, parse in parsers:
+            if parse is None:
+                rprint(f"{file_type:>6} {name:>12}   [yellow]not installed[/yellow]")
+                continue
+            elapsed, peak = measure(parse, content)
+            rprint(f"{file_type:>6} {name:>12} {len(content) / 1024:>11.0f} {elapsed:>9.2f} {peak / 2**20:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark for file listings: full ORM rows versus column projections.
+
+Fills a scratch database with thousands of files per profile whose text is
+stored inline in ``File.content`` (as every file was before documents were
+shared), then times:
+
+- the previous listing, which loaded whole ``File`` rows including content
+- the projected listing used by ``list_profile_files_service``
+- a deep page with keyset pagination versus the equivalent OFFSET query
+
+Usage:
+    python benchmarks/bench_file_listing.py [--files 5000] [--content-kb 64]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+sys.path.insert(0, BACKEND_DIR)
+
+# The models create their database on import; point them at a scratch directory.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="torchts-bench-")
+os.environ["TORCHTS_DATA_DIR"] = os.path.join(SCRATCH_DIR, "data")
+os.chdir(SCRATCH_DIR)
+
+from rich import print as rprint
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from storage.models import engine, File, Profile
+from services.file_service import _file_listing_query
+
+PAGE_SIZE = 100
+
+
+def populate(files: int, content_kb: int) -> int:
+    content = ("lorem ipsum dolor sit amet " * (content_kb * 1024 // 27 + 1))[:content_kb * 1024]
+    with Session(engine) as session:
+        profile = Profile(name="bench")
+        session.add(profile)
+        session.commit()
+        rows = [
+            {"profile_id": profile.id, "filename": f"book-{i}.txt", "file_type": "txt",
+             "content": content, "pages": content_kb // 3 + 1}
+            for i in range(files)
+        ]
+        for start in range(0, files, 500):
+            session.execute(insert(File), rows[start:start + 500])
+        session.commit()
+        return profile.id
+
+
+def timed(fn, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5000, help="Files in the profile")
+    parser.add_argument("--content-kb", type=int, default=64, help="Inline text per file in KiB")
+    args = parser.parse_args()
+
+    rprint(f"[blue]Populating {args.files} files x {args.content_kb} KiB in {SCRATCH_DIR}...[/blue]")
+    profile_id = populate(args.files, args.content_kb)
+
+    def full_rows():
+        with Session(engine) as session:
+            files = session.query(File).filter_by(profile_id=profile_id).all()
+            return [{"id": f.id, "filename": f.filename, "file_type": f.file_type,
+                     "pages": f.pages, "created_at": f.created_at} for f in files]
+
+    def projected():
+        with Session(engine) as session:
+            stmt, params = _file_listing_query(profile_id, None, None, None, None)
+            return [dict(row._mapping) for row in session.execute(stmt, params).all()]
+
+    deep = args.files - PAGE_SIZE
+
+    def offset_page():
+        with Session(engine) as session:
+            stmt = (select(File.id, File.filename, File.file_type, File.pages, File.created_at)
+                    .where(File.profile_id == profile_id).order_by(File.id)
+                    .offset(deep).limit(PAGE_SIZE))
+            return session.execute(stmt).all()
+
+    with Session(engine) as session:
+        after = session.scalar(select(File.id).where(File.profile_id == profile_id)
+                               .order_by(File.id).offset(deep - 1).limit(1))
+
+    def keyset_page():
+        with Session(engine) as session:
+            return session.execute(*_file_listing_query(profile_id, PAGE_SIZE, after, None, None)).all()
+
+    assert full_rows() == projected()
+    assert offset_page() == keyset_page()
+
+    rprint(f"[blue]{'query':>28} {'time (ms)':>10}[/blue]")
+    for name, fn in (("full rows (previous)", full_rows), ("projection", projected),
+                     (f"OFFSET page at {deep}", offset_page), (f"keyset page after {after}", keyset_page)):
+        rprint(f"{name:>28} {timed(fn) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
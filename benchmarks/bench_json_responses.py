@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for serializing and compressing document responses.
+
+Builds the payload ``get_profile_file_service`` returns for a generated
+document (5 MB of text by default) and reports:
+
+- serialization time with FastAPI's default path (``jsonable_encoder`` and
+  ``JSONResponse``) against ``FastJSONResponse`` (orjson, no encoder pass)
+- the bytes sent and the time taken for each content coding the
+  compression middleware can use
+
+Usage:
+    python benchmarks/bench_json_responses.py [--mb 5] [--repeats 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+sys.path.insert(0, BACKEND_DIR)
+
+# Importing the api package builds the app, whose models create their
+# database on import; point them at a scratch directory.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="torchts-bench-")
+os.environ["TORCHTS_DATA_DIR"] = os.path.join(SCRATCH_DIR, "data")
+os.chdir(SCRATCH_DIR)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from rich import print as rprint
+
+from api import compression
+from api.responses import FastJSONResponse, orjson
+
+
+def make_document(mb: float, rng: random.Random) -> str:
+    """Prose-like text of about ``mb`` megabytes, with some non-ASCII words."""
+    words = ["".join(rng.choices("etaoinshrdlucmfwypvbgk", k=rng.randint(2, 9))) for _ in range(3000)]
+    words += ["naïve", "café", "Straße", "déjà", "façade"]
+    parts = []
+    size = 0
+    while size < mb * 2**20:
+        sentence = " ".join(rng.choices(words, k=rng.randint(6, 20))).capitalize() + ". "
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def best_of(repeats: int, fn) -> tuple:
+    """Fastest of ``repeats`` calls of ``fn``, and its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=5.0, help="Size of the document text in MB")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions (best is reported)")
+    args = parser.parse_args()
+
+    payload = {
+        "id": 1,
+        "filename": "book.txt",
+        "file_type": "txt",
+        "content": make_document(args.mb, random.Random(0)),
+        "pages": 1,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+    rprint(f"[blue]{'serializer':>28} {'ms':>8} {'MB':>7}[/blue]")
+    default_time, body = best_of(args.repeats, lambda: JSONResponse(jsonable_encoder(payload)).body)
+    rprint(f"{'jsonable_encoder + json':>28} {default_time * 1000:>8.1f} {len(body) / 2**20:>7.2f}")
+    if orjson is None:
+        rprint("[yellow]orjson is not installed; FastJSONResponse falls back to json[/yellow]")
+    fast_time, body = best_of(args.repeats, lambda: FastJSONResponse(payload).body)
+    rprint(f"{'FastJSONResponse':>28} {fast_time * 1000:>8.1f} {len(body) / 2**20:>7.2f}")
+    rprint(f"[blue]Serialization speedup: {default_time / fast_time:.1f}x[/blue]")
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    if compression.brotli is None:
+        rprint("[yellow]brotli is not installed; skipping br[/yellow]")
+    rprint(f"[blue]{'encoding':>10} {'ms':>8} {'MB':>7} {'ratio':>6}[/blue]")
+    rprint(f"{'identity':>10} {0:>8.1f} {len(body) / 2**20:>7.2f} {1:>6.2f}")
+    for encoding in encodings:
+        seconds, compressed = best_of(
+            args.repeats, lambda: compression._Compressor(encoding).compress(body, True)
+        )
+        rprint(f"{encoding:>10} {seconds * 1000:>8.1f} {len(compressed) / 2**20:>7.2f} "
+               f"{len(body) / len(compressed):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Numba audio kernels.
+
+Each run starts a fresh interpreter, imports ``processing.audio_generator`` and
+times the first "request": stitching a few segments and normalizing the result.
+The cold run uses an empty ``NUMBA_CACHE_DIR`` and therefore pays the full
+compilation cost, which is what every process start paid before the kernels
+were cached. Warm runs reuse that directory, as a server started from a
+pre-built image or a pool worker would.
+
+Usage:
+    python benchmarks/bench_kernel_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from rich import print as rprint
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+CHILD_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import numpy
+from processing.audio_generator import AudioAssembler, normalize_audio
+imported = time.perf_counter()
+rng = numpy.random.default_rng(0)
+assembler = AudioAssembler()
+for _ in range(4):
+    assembler.append(rng.uniform(-0.5, 0.5, 24000).astype(numpy.float32))
+normalize_audio(assembler.getvalue())
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": done - imported}))
+"""
+
+
+def run_child(cache_dir: str) -> dict:
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="Number of warm-cache runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        results = [("cold cache", run_child(cache_dir))]
+        results += [(f"warm cache #{i}", run_child(cache_dir)) for i in range(1, args.runs + 1)]
+
+    rprint(f"[blue]{'run':>14} {'import (s)':>11} {'first request (s)':>18} {'total (s)':>10}[/blue]")
+    for name, timing in results:
+        total = timing["import"] + timing["first_request"]
+        rprint(f"{name:>14} {timing['import']:>11.3f} {timing['first_request']:>18.3f} {total:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the overhead of the synthesis metrics.
+
+Times the metric updates one synthesis request makes: in-flight and waiting
+gauges, the chunking, cache lookup, G2P, inference, normalization and encoding
+stage timers, and the request, audio and real-time factor accounting. Compares
+them with the work of a request without the model:
+
+- chunk planning of the request's text
+- assembling the synthesized segments
+- normalizing and quantizing to PCM
+- WAV encoding
+
+That work is a lower bound on a real request. Inference comes on top and
+usually dominates, so the overhead is also reported with inference added at
+the given real-time factor.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py [--audio-seconds 10] [--segments 3] [--rtf 0.1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+import numpy
+from rich import print as rprint
+
+from processing.audio_generator import AudioAssembler, wav_stream
+from processing.text_processor import plan_chunks
+from services.metrics_service import (
+    MODEL_WAITING,
+    TTS_AUDIO_SECONDS,
+    TTS_IN_FLIGHT,
+    TTS_REAL_TIME_FACTOR,
+    TTS_REQUESTS,
+    TTS_STAGE_SECONDS,
+    TTS_SYNTHESIS_SECONDS,
+    stage,
+)
+
+SAMPLE_RATE = 24000
+TEXT = ("The quick brown fox jumps over the lazy dog, and then it runs away into the forest. " * 3).strip()
+
+
+def request_metrics(segments: int, audio_seconds: float) -> None:
+    """The metric updates ``tts_service`` and ``ModelManager`` make for one request."""
+    g2p = TTS_STAGE_SECONDS.labels("g2p")
+    inference = TTS_STAGE_SECONDS.labels("inference")
+    with TTS_IN_FLIGHT.track():
+        with stage("chunking"):
+            pass
+        with stage("cache_lookup"):
+            pass
+        TTS_REQUESTS.labels("single", "miss").inc()
+        with MODEL_WAITING.track():
+            pass
+        for _ in range(segments):
+            start = time.perf_counter()
+            g2p.observe(time.perf_counter() - start)
+            start = time.perf_counter()
+            inference.observe(time.perf_counter() - start)
+        with stage("normalization"):
+            pass
+        TTS_SYNTHESIS_SECONDS.inc(0.5)
+        TTS_AUDIO_SECONDS.inc(audio_seconds)
+        TTS_REAL_TIME_FACTOR.observe(0.05)
+        with stage("encoding"):
+            pass
+
+
+def request_work(audio) -> None:
+    """A request's processing without the model: chunking, assembly, PCM and WAV encoding."""
+    list(plan_chunks(TEXT, "a"))
+    assembler = AudioAssembler(fade_duration=0.0)
+    for segment in audio:
+        assembler.append(segment)
+    b"".join(wav_stream(assembler.to_pcm16(), SAMPLE_RATE))
+
+
+def per_call(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--audio-seconds", type=float, default=10.0, help="Audio synthesized per request")
+    parser.add_argument("--segments", type=int, default=3, help="Pipeline segments per request")
+    parser.add_argument("--rtf", type=float, default=0.1, help="Real-time factor of inference")
+    parser.add_argument("--repeats", type=int, default=2000, help="Requests timed")
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    length = int(args.audio_seconds * SAMPLE_RATE / args.segments)
+    audio = [rng.uniform(-0.5, 0.5, length).astype(numpy.float32) for _ in range(args.segments)]
+    request_work(audio)  # Compile the audio kernels before timing
+
+    metrics = per_call(lambda: request_metrics(args.segments, args.audio_seconds), args.repeats)
+    work = per_call(lambda: request_work(audio), max(1, args.repeats // 20))
+    inference = args.audio_seconds * args.rtf
+
+    rprint(f"[blue]Metric updates per request: {metrics * 1e6:.1f} us[/blue]")
+    rprint(f"{'baseline':>30} {'time (ms)':>10} {'overhead':>9}")
+    rprint(f"{'processing without the model':>30} {work * 1000:>10.2f} {metrics / work:>9.3%}")
+    rprint(f"{'with inference at rtf ' + format(args.rtf, 'g'):>30} {(work + inference) * 1000:>10.2f} "
+           f"{metrics / (work + inference):>9.4%}")
+
+
+if __name__ == "__main__":
+    main()
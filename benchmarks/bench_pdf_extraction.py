@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for page-parallel PDF text extraction.
+
+Generates a large text PDF and extracts it with ``extract_pdf_pages`` on
+process pools of increasing size. The extracted pages are checked against a
+single-process run, and the speedup over one worker should grow with the
+number of cores until the machine runs out of them.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [--pages 800] [--lines 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+# Without an explicit executor, extract in-process; that is the baseline.
+os.environ["PDF_PARSE_WORKERS"] = "1"
+
+from rich import print as rprint
+
+from processing.document_parser import extract_pdf_pages
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "approximately",
+         "characteristically", "a", "of", "and", "lighthouse", "harbour", "committee")
+
+
+def make_pdf(pages: int, lines: int, seed: int = 0) -> bytes:
+    """Build an uncompressed PDF with ``lines`` lines of Helvetica text per page."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for _ in range(pages):
+        text_ops = [b"BT /F1 10 Tf 12 TL 50 780 Td"]
+        for _ in range(lines):
+            line = " ".join(rng.choices(WORDS, k=12)).encode("ascii")
+            text_ops.append(b"(" + line + b") Tj T*")
+        text_ops.append(b"ET")
+        stream = b"\n".join(text_ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=800, help="Pages in the generated PDF")
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    args = parser.parse_args()
+
+    content = make_pdf(args.pages, args.lines)
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({w for w in (2, 4, 8, 16, 32) if w <= cpu_count} | {cpu_count} - {1})
+    rprint(f"[blue]PDF: {args.pages} pages, {len(content) / 2**20:.1f} MiB, {cpu_count} CPUs[/blue]")
+
+    start = time.perf_counter()
+    expected = extract_pdf_pages(content)
+    baseline = time.perf_counter() - start
+
+    rprint(f"[blue]{'workers':>7} {'time (s)':>9} {'speedup':>8} {'pages/s':>8}[/blue]")
+    rprint(f"{1:>7} {baseline:>9.2f} {1.0:>8.2f} {args.pages / baseline:>8.0f}")
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Start the workers so process startup is not timed.
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            pages = extract_pdf_pages(content, executor=executor, workers=workers)
+            elapsed = time.perf_counter() - start
+        assert pages == expected, "parallel extraction differs from the serial result"
+        rprint(f"{workers:>7} {elapsed:>9.2f} {baseline / elapsed:>8.2f} {args.pages / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
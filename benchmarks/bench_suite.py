@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark suite for the processing hot paths, with regression checks.
+
+Runs without model weights on generated inputs:
+
+- text in several sizes and languages for ``chunk_text``, ``split_sentences``
+  and ``plan_chunks``
+- synthetic audio for ``normalize_audio``, ``crossfade``, PCM quantization and
+  WAV encoding
+- generated PDF, DOCX, ODT and text files for the ``parse_document`` parsers
+
+Every case runs once to warm up (compiling the numba kernels), then
+``--repeats`` times; the median and fastest run are reported. Results are
+written as JSON with ``--json``. With a baseline (from an earlier
+``--save-baseline`` run on the same machine), a case whose fastest run is
+more than ``--threshold`` slower than the baseline's is a regression and the
+suite exits with status 1. The fastest run is compared because noise from
+other processes only ever adds time.
+
+Usage:
+    python benchmarks/bench_suite.py [--repeats 7] [--filter audio] [--json results.json]
+    python benchmarks/bench_suite.py --save-baseline            # on a known-good tree
+    python benchmarks/bench_suite.py --threshold 0.2            # later, to compare
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+# Parse PDFs in-process: the worker pool would measure process startup
+os.environ["PDF_PARSE_WORKERS"] = "1"
+
+import numpy
+from rich import print as rprint
+
+from bench_document_parsing import make_docx, make_odt
+from bench_pdf_extraction import make_pdf
+from processing.audio_generator import crossfade, normalize_audio, pcm16_from_float, wav_stream
+from processing.document_parser import parse_document
+from processing.text_processor import chunk_text, plan_chunks, split_sentences
+
+SAMPLE_RATE = 24000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Fast cases are looped so every timed run lasts this long, keeping timer
+# resolution out of their timings
+MIN_RUN_SECONDS = 0.02
+
+# Vocabulary and sentence terminators per language code
+LANGUAGES = {
+    "a": (["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "approximately",
+           "lighthouse", "harbour", "committee", "of", "and", "a"], " ", ".!?", ","),
+    "e": (["el", "rápido", "zorro", "marrón", "salta", "sobre", "perro", "perezoso", "canción",
+           "niño", "año", "de", "y", "la"], " ", ".!?", ","),
+    "f": (["le", "renard", "brun", "rapide", "saute", "par-dessus", "chien", "paresseux", "été",
+           "où", "déjà", "et", "la"], " ", ".!?", ","),
+    "j": (["東京", "の", "天気", "は", "晴れ", "です", "わたし", "は", "本", "を", "読みます",
+           "カタカナ"], "", "。！？", "、"),
+    "z": (["今天", "天气", "很", "好", "我们", "去", "公园", "散步", "学习", "中文", "的"], "", "。！？", "，"),
+}
+# Text sizes in characters
+TEXT_SIZES = {"2k": 2_000, "200k": 200_000}
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+
+
+def make_text(lang_code: str, chars: int, seed: int = 0) -> str:
+    """Prose-like text of about ``chars`` characters in the given language."""
+    words, space, terminators, comma = LANGUAGES[lang_code]
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < chars:
+        clauses = [space.join(rng.choices(words, k=rng.randint(3, 12))) for _ in range(rng.randint(1, 3))]
+        sentence = (comma + space).join(clauses) + rng.choice(terminators) + space
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)[:chars]
+
+
+def make_audio(seconds: float, seed: int = 0) -> numpy.ndarray:
+    """Speech-like float32 audio: a few harmonics under a syllable-rate envelope, plus noise."""
+    rng = numpy.random.default_rng(seed)
+    t = numpy.arange(int(seconds * SAMPLE_RATE), dtype=numpy.float32) / SAMPLE_RATE
+    audio = sum(numpy.sin(2 * numpy.pi * f * t) / (i + 1) for i, f in enumerate((140.0, 280.0, 420.0)))
+    audio *= 0.5 + 0.5 * numpy.sin(2 * numpy.pi * 4.0 * t)
+    audio += rng.normal(0, 0.01, t.shape).astype(numpy.float32)
+    return (0.3 * audio).astype(numpy.float32)
+
+
+def build_cases(scale: float) -> List[Case]:
+    """All cases, with corpora sized by ``scale``."""
+    cases = []
+    for size_name, chars in TEXT_SIZES.items():
+        english = make_text("a", int(chars * scale))
+        cases.append(Case(f"text/chunk_text/en-{size_name}", lambda text=english: chunk_text(text)))
+        cases.append(Case(f"text/split_sentences/en-{size_name}", lambda text=english: split_sentences(text)))
+        for lang_code in LANGUAGES:
+            text = make_text(lang_code, int(chars * scale))
+            cases.append(Case(f"text/plan_chunks/{lang_code}-{size_name}",
+                              lambda text=text, lang_code=lang_code: list(plan_chunks(text, lang_code))))
+
+    for seconds in (10, 120):
+        audio = make_audio(seconds * scale)
+        second = make_audio(5 * scale, seed=1)
+        cases.append(Case(f"audio/normalize_audio/{seconds}s", lambda audio=audio: normalize_audio(audio.copy())))
+        cases.append(Case(f"audio/crossfade/{seconds}s", lambda audio=audio, second=second: crossfade(audio, second)))
+        cases.append(Case(f"audio/pcm16/{seconds}s", lambda audio=audio: pcm16_from_float(audio)))
+        pcm = pcm16_from_float(audio)
+        cases.append(Case(f"audio/wav_encode/{seconds}s",
+                          lambda pcm=pcm: b"".join(wav_stream(pcm, SAMPLE_RATE))))
+
+    paragraphs = max(1, int(2000 * scale))
+    documents = {
+        "pdf": make_pdf(max(1, int(50 * scale)), 40),
+        "docx": make_docx(paragraphs),
+        "odt": make_odt(paragraphs),
+        "txt": make_text("a", int(1_000_000 * scale)).encode("utf-8"),
+    }
+    for file_ext, content in documents.items():
+        cases.append(Case(f"parse/{file_ext}/{len(content) // 1024}k",
+                          lambda content=content, file_ext=file_ext: parse_document(content, file_ext)))
+    return cases
+
+
+def run_case(case: Case, repeats: int) -> Dict[str, float]:
+    """Time ``case`` per call; each timed run loops it for at least ``MIN_RUN_SECONDS``."""
+    case.fn()  # Warm up: JIT compilation, caches
+    start = time.perf_counter()
+    case.fn()
+    number = max(1, math.ceil(MIN_RUN_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"median_ms": statistics.median(times) * 1000, "min_ms": min(times) * 1000,
+            "repeats": repeats, "number": number}
+
+
+def _reference_workload(data=numpy.random.default_rng(0).random(2**20, dtype=numpy.float32)):
+    total = 0
+    for i in range(20000):
+        total += i % 7
+    return total + float(numpy.abs(data).sum())
+
+
+def calibrate(repeats: int) -> float:
+    """
+    Per-call time of a fixed workload (a Python loop and a numpy reduction)
+    in milliseconds. Regressions are checked relative to it, so a machine
+    that is slower overall today (throttled, busy neighbours) doesn't fail
+    every case.
+    """
+    return run_case(Case("calibration", _reference_workload), repeats)["min_ms"]
+
+
+def environment() -> Dict[str, object]:
+    """Where the results were measured: they only compare on the same machine."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, speed: float = 1.0) -> List[str]:
+    """
+    Cases whose fastest run is more than ``threshold`` (a fraction) slower
+    than in ``baseline``, after dividing by ``speed``, how much slower the
+    machine is than when the baseline was taken.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = result["min_ms"] / (before["min_ms"] * speed) - 1
+        result["baseline_min_ms"] = before["min_ms"]
+        result["change"] = change
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=7, help="Timed runs per case (the fastest is compared)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the size of every corpus")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--json", help="Write the results to this file as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--absolute", action="store_true",
+                        help="Compare raw times, without correcting for the machine's speed")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.25")),
+                        help="Slowdown of the fastest run, as a fraction, that fails the run")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases(args.scale) if args.filter in case.name]
+    calibration_ms = calibrate(args.repeats)
+    baseline = {}
+    speed = 1.0
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        if not args.absolute:
+            speed = calibration_ms / stored["calibration_ms"]
+        rprint(f"[blue]Comparing with {args.baseline} (threshold {args.threshold:.0%}, "
+               f"machine speed {1 / speed:.2f}x the baseline's)[/blue]")
+
+    results = {}
+    regressions = []
+    rprint(f"[blue]{'case':<34} {'median ms':>10} {'min ms':>10} {'change':>8}[/blue]")
+    for case in cases:
+        results[case.name] = result = run_case(case, args.repeats)
+        regressed = compare({case.name: result}, baseline, args.threshold, speed)
+        regressions += regressed
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        color = "red" if regressed else "green" if change else "white"
+        rprint(f"[{color}]{case.name:<34} {result['median_ms']:>10.3f} {result['min_ms']:>10.3f} {change:>8}[/{color}]")
+
+    report = {"environment": environment(), "calibration_ms": calibration_ms, "threshold": args.threshold,
+              "results": results, "regressions": regressions}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": report["environment"], "calibration_ms": calibration_ms,
+                       "results": results}, f, indent=2)
+        rprint(f"[green]Baseline saved to {args.baseline}[/green]")
+
+    if regressions:
+        rprint(f"[red]{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}[/red]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
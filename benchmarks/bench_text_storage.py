@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for compressed document text: database size and read throughput.
+
+Stores the same generated books (full text plus segments, as uploads do) in
+a scratch database per codec and reports:
+
+- the database size after a WAL checkpoint
+- the time taken to store the books
+- segment range reads per second (5 segments each, as the content endpoint reads them)
+- full-text reads in MB of text per second
+
+Usage:
+    python benchmarks/bench_text_storage.py [--books 20] [--book-kb 1024]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+sys.path.insert(0, BACKEND_DIR)
+
+# The models create their database on import; point them at a scratch directory.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="torchts-bench-")
+os.environ["TORCHTS_DATA_DIR"] = os.path.join(SCRATCH_DIR, "data")
+os.chdir(SCRATCH_DIR)
+
+from rich import print as rprint
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from processing.document_parser import split_segments
+from storage import compression
+from storage.models import Base, Document, DocumentSegment, create_db_engine
+from services.file_service import _segment_range_statement
+
+RANGE_SEGMENTS = 5
+
+
+def make_book(kb: int, rng: random.Random) -> str:
+    """Prose-like text: Zipf-distributed words from a generated vocabulary, in sentences."""
+    syllables = ["ka", "to", "ri", "en", "sa", "mo", "lu", "th", "er", "an", "is", "ou", "ne", "wa", "de"]
+    vocabulary = ["".join(rng.choices(syllables, k=rng.randint(1, 4))) for _ in range(5000)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        words = rng.choices(vocabulary, weights, k=rng.randint(6, 24))
+        sentence = " ".join(words).capitalize() + rng.choice([". ", ". ", ", ", "? ", ".\n\n"])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def store(db_engine, books) -> float:
+    start = time.perf_counter()
+    for n, text in enumerate(books):
+        with Session(db_engine) as session:
+            document = Document(content_hash=f"book-{n}", file_type="txt", content=text, pages=1)
+            session.add(document)
+            session.flush()
+            rows = []
+            offset = 0
+            for seq, segment in enumerate(split_segments(text)):
+                rows.append({"document_id": document.id, "seq": seq, "page": segment.page,
+                             "char_start": offset, "char_end": offset + len(segment.text),
+                             "content": segment.text})
+                offset += len(segment.text)
+            session.execute(insert(DocumentSegment), rows)
+            session.commit()
+    return time.perf_counter() - start
+
+
+def database_size(db_engine, path: str) -> int:
+    with db_engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(path)
+
+
+def range_reads(db_engine, document_ids, segment_counts, reads: int, rng: random.Random) -> float:
+    """Range reads per second."""
+    start = time.perf_counter()
+    with Session(db_engine) as session:
+        for _ in range(reads):
+            i = rng.randrange(len(document_ids))
+            first = rng.randrange(max(1, segment_counts[i] - RANGE_SEGMENTS))
+            session.execute(_segment_range_statement("seq"), {
+                "document_id": document_ids[i], "segment": first, "count": RANGE_SEGMENTS,
+            }).all()
+    return reads / (time.perf_counter() - start)
+
+
+def full_reads(db_engine, document_ids) -> float:
+    """Megabytes of text read per second when loading whole documents."""
+    chars = 0
+    start = time.perf_counter()
+    with Session(db_engine) as session:
+        for document_id in document_ids:
+            chars += len(session.execute(select(Document.content).where(Document.id == document_id)).scalar_one())
+    return chars / 2**20 / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=20, help="Books stored per codec")
+    parser.add_argument("--book-kb", type=int, default=1024, help="Size of each book in KiB")
+    parser.add_argument("--reads", type=int, default=2000, help="Range reads timed per codec")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rprint(f"[blue]Generating {args.books} books x {args.book_kb} KiB...[/blue]")
+    books = [make_book(args.book_kb, rng) for _ in range(args.books)]
+    codecs = ["none", "zlib"] + (["zstd"] if compression.zstandard else [])
+    if not compression.zstandard:
+        rprint("[yellow]zstandard is not installed; skipping zstd[/yellow]")
+
+    rprint(f"[blue]{'codec':>6} {'size (MB)':>10} {'ratio':>6} {'store (s)':>10} "
+           f"{'range reads/s':>14} {'full MB/s':>10}[/blue]")
+    baseline = None
+    for codec in codecs:
+        compression.TEXT_CODEC = codec
+        path = os.path.join(SCRATCH_DIR, f"{codec}.db")
+        db_engine = create_db_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(db_engine)
+        store_seconds = store(db_engine, books)
+        size = database_size(db_engine, path)
+        baseline = baseline or size
+        with Session(db_engine) as session:
+            document_ids = [row[0] for row in session.execute(select(Document.id).order_by(Document.id))]
+        segment_counts = [len(split_segments(text)) for text in books]
+        range_rate = range_reads(db_engine, document_ids, segment_counts, args.reads, random.Random(1))
+        full_rate = full_reads(db_engine, document_ids)
+        rprint(f"{codec:>6} {size / 2**20:>10.1f} {baseline / size:>6.2f} {store_seconds:>10.2f} "
+               f"{range_rate:>14.0f} {full_rate:>10.1f}")
+        db_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Allocation benchmark for turning synthesized segments into a WAV response.
+
+Measures the peak memory (tracemalloc) and time of the previous encoding path
+(collect and concatenate the segments, normalize, scale, cast to int16,
+``soundfile`` into a ``BytesIO`` that is read back in chunks) against the current one
+(``AudioAssembler``, fused in-place quantization and ``wav_stream``) for a
+10-minute chunk. Segments are produced lazily, as the TTS pipeline yields
+them, and their allocation is included in both measurements.
+
+Numba allocates arrays through its own runtime, which tracemalloc cannot see,
+so the previous normalization step is reproduced with plain NumPy here.
+
+Usage:
+    python benchmarks/bench_wav_encoding.py [--minutes 10]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+import numpy
+import soundfile as sf
+from rich import print as rprint
+
+from processing.audio_generator import AudioAssembler, wav_stream
+
+SAMPLE_RATE = 24000
+READ_SIZE = 64 * 1024
+
+
+def make_segments(minutes: float, segment_seconds: float = 5.0, seed: int = 0):
+    """Yield segments lazily, like the TTS pipeline does."""
+    rng = numpy.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    length = int(segment_seconds * SAMPLE_RATE)
+    for start in range(0, total, length):
+        yield rng.uniform(-0.5, 0.5, min(length, total - start)).astype(numpy.float32)
+
+
+def previous_path(segments) -> int:
+    final_audio = numpy.concatenate(list(segments))
+    audio_normalized = final_audio / numpy.abs(final_audio).max()
+    audio_int16 = (audio_normalized * 32767).astype(numpy.int16)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_int16, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    buffer.seek(0)
+    sent = 0
+    while chunk := buffer.read(READ_SIZE):
+        sent += len(chunk)
+    return sent
+
+
+def current_path(segments) -> int:
+    assembler = AudioAssembler(fade_duration=0.0, sample_rate=SAMPLE_RATE)
+    for segment in segments:
+        assembler.append(segment)
+    pcm = assembler.to_pcm16()
+    return sum(len(chunk) for chunk in wav_stream(pcm, SAMPLE_RATE))
+
+
+def measure(func, minutes: float):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func(make_segments(minutes))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, default=10.0, help="Audio duration to encode")
+    args = parser.parse_args()
+
+    # Warm up kernels and soundfile so one-time costs are not measured.
+    current_path(make_segments(0.05))
+    previous_path(make_segments(0.05))
+
+    float_mb = args.minutes * 60 * SAMPLE_RATE * 4 / 2**20
+    rprint(f"[blue]{args.minutes:g} minutes at {SAMPLE_RATE} Hz ({float_mb:.1f} MiB of float32 input)[/blue]")
+    rprint(f"[blue]{'path':>10} {'wav bytes':>12} {'peak (MiB)':>11} {'time (s)':>9}[/blue]")
+    for name, func in (("previous", previous_path), ("current", current_path)):
+        size, elapsed, peak = measure(func, args.minutes)
+        rprint(f"{name:>10} {size:>12} {peak / 2**20:>11.1f} {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
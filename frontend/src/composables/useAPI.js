@@ -8,7 +8,7 @@ export function useAPI() {
         method: 'POST',
         signal,
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text, voice, chunk_id: chunkId, speed })
+        body: JSON.stringify({ text, voice, chunk_id: chunkId, speed, plan: 'latency' })
       })
     } catch (error) {
       throw new Error(
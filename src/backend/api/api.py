@@ -1,31 +1,59 @@
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File, BackgroundTasks
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Literal
+import asyncio
+import time
 
 # Import service functions
-from services.profile_service import create_profile_service, list_profiles_service, delete_profile_service
+from services.profile_service import (
+    create_profile_service,
+    list_profiles_service,
+    delete_profile_service,
+    profiles_version_service,
+    profile_version_service,
+)
 from services.file_service import (
     list_profile_files_service,
     upload_profile_file_service,
+    upload_profile_files_batch_service,
     get_profile_file_service,
+    get_profile_file_content_service,
+    profile_file_version_service,
+    search_profile_files_service,
     delete_profile_file_service,
     delete_all_profile_files_service,
-    upload_file_service
+    upload_file_service,
+    MAX_UPLOAD_BYTES,
+    MAX_BATCH_UPLOAD_BYTES,
 )
 from services.tts_service import (
     generate_single_tts,
     generate_multi_tts,
     stop_generation_service,
-    list_profile_audio_service
+    list_profile_audio_service,
+    get_audio_service
 )
 from services.model_service import get_model_manager
+from services.metrics_service import collect_timings, render_metrics
+from services.profiler_service import (
+    DEFAULT_INTERVAL,
+    MAX_PROFILE_SECONDS,
+    PROFILING_ENABLED,
+    require_profiling,
+    sample_stacks,
+)
+from services.cache_service import REVALIDATE, make_etag, etag_matches, not_modified
+from api.compression import CompressionMiddleware
+from api.responses import FastJSONResponse, dumps
+from processing.document_parser import shutdown_pdf_executor
 
 app = FastAPI(
     title="TorchTS API",
     description="Text-to-Speech API using TorchTS",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 @app.on_event("startup")
@@ -34,6 +62,47 @@ async def startup_event():
     model_manager = get_model_manager()
     model_manager._ensure_unload_scheduler_running()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the document parsing worker processes."""
+    shutdown_pdf_executor()
+
+# Room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads over the size limit before their body is received."""
+    content_length = request.headers.get("content-length", "")
+    batch = request.url.path.endswith("/files/batch")
+    limit = MAX_BATCH_UPLOAD_BYTES if batch else MAX_UPLOAD_BYTES
+    if (
+        request.headers.get("content-type", "").startswith("multipart/form-data")
+        and content_length.isdigit()
+        and int(content_length) > limit + MULTIPART_OVERHEAD_BYTES
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"{'Batch' if batch else 'File'} exceeds the {limit // 2**20} MB upload limit"},
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    """
+    Report the stages a request went through (chunking, G2P, inference,
+    parsing, ...) in a ``Server-Timing`` header, shown by browser dev tools.
+    Only responses that recorded a stage get one.
+    """
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = timings.header(time.perf_counter() - start)
+    return response
+
+app.add_middleware(CompressionMiddleware)
+
 # Enable CORS for development
 app.add_middleware(
     CORSMiddleware,
@@ -47,7 +116,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Total-Chunks", "X-Current-Chunk", "Content-Type", "Content-Length", "X-Session-ID"]
+    expose_headers=[
+        "X-Total-Chunks", "X-Current-Chunk", "Content-Type", "Content-Length", "X-Session-ID",
+        "X-Audio-ID", "Accept-Ranges", "Content-Range", "X-Next-Cursor", "ETag",
+        "Server-Timing"
+    ]
 )
 
 # Generic handler for CORS preflight requests
@@ -62,6 +135,9 @@ class TTSRequest(BaseModel):
     voice: str
     chunk_id: Optional[int] = 0
     speed: Optional[float] = 1.0
+    profile_id: Optional[int] = None
+    # 'latency' starts with short chunks that grow toward full size.
+    plan: Literal["throughput", "latency"] = "throughput"
 
 class ProfileCreate(BaseModel):
     name: str
@@ -75,6 +151,9 @@ class MultiTTSRequest(BaseModel):
     text: str
     speed: Optional[float] = 1.0
     speakers: dict[str, str]
+    profile_id: Optional[int] = None
+    # Chunk plan of every speaker's segment (see TTSRequest.plan)
+    plan: Literal["throughput", "latency"] = "throughput"
 
 class ModelTimeoutUpdate(BaseModel):
     timeout_seconds: int
@@ -83,25 +162,136 @@ class ModelTimeoutUpdate(BaseModel):
 async def create_profile(profile: ProfileCreate):
     return await create_profile_service(profile)
 
+# Largest page a listing returns
+MAX_PAGE_SIZE = 1000
+
+def set_next_cursor(response: Response, items: list, limit: Optional[int]) -> list:
+    """Point to the next page of a keyset-paginated listing when the page is full."""
+    if limit is not None and len(items) == limit:
+        response.headers["X-Next-Cursor"] = str(items[-1]["id"])
+    return items
+
+def check_etag(request: Request, response: Response, version: Optional[tuple], *key) -> Optional[Response]:
+    """
+    Tag a response with the version of the data it is built from, or return a
+    304 when the client's copy is current. Read the version before the data:
+    a concurrent change then only leaves the ETag behind the body, costing the
+    client one full response later, never a stale copy.
+
+    Returns:
+        Optional[Response]: The 304 response, or None to build the full one
+        (always when ``version`` is None, so the service reports the 404).
+    """
+    if version is None:
+        return None
+    etag = make_etag(*key, *version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, {"Cache-Control": REVALIDATE})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    return None
+
 @app.get("/profiles")
-async def list_profiles():
-    return await list_profiles_service()
+async def list_profiles(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    search: Optional[str] = None,
+):
+    """List profiles by id; pass the X-Next-Cursor header as ``after`` for the next page."""
+    cached = check_etag(request, response, await profiles_version_service(), "profiles")
+    if cached is not None:
+        return cached
+    profiles = await list_profiles_service(limit, after, search)
+    return set_next_cursor(response, profiles, limit)
 
 @app.delete("/profiles/{profile_id}")
 async def delete_profile(profile_id: int):
     return await delete_profile_service(profile_id)
 
 @app.get("/profiles/{profile_id}/files")
-async def list_profile_files(profile_id: int):
-    return await list_profile_files_service(profile_id)
+async def list_profile_files(
+    profile_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = None,
+    file_type: Optional[str] = None,
+    search: Optional[str] = None,
+):
+    """List a profile's files by id, optionally filtered by type or filename."""
+    cached = check_etag(request, response, await profile_version_service(profile_id), "files", profile_id)
+    if cached is not None:
+        return cached
+    files = await list_profile_files_service(profile_id, limit, after, file_type, search)
+    return set_next_cursor(response, files, limit)
+
+def document_response(content: dict, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Respond with a payload carrying whole documents, serialized straight to
+    JSON (skipping ``jsonable_encoder``, which walks multi-megabyte text).
+    Headers set on ``response`` are kept.
+    """
+    return FastJSONResponse(content, headers=dict(response.headers) if response is not None else None)
 
 @app.post("/profiles/{profile_id}/files")
 async def upload_profile_file(profile_id: int, file: UploadFile = File(...)):
-    return await upload_profile_file_service(profile_id, file)
+    return document_response(await upload_profile_file_service(profile_id, file))
+
+@app.post("/profiles/{profile_id}/files/batch")
+async def upload_profile_files(profile_id: int, files: List[UploadFile] = File(...)):
+    """
+    Upload many documents (or zip archives of documents) at once. Streams
+    newline-delimited JSON status events as each file is parsed, ending with
+    the stored files once they are committed together.
+    """
+    events = await upload_profile_files_batch_service(profile_id, files)
+    return StreamingResponse(
+        (dumps(event) + b"\n" async for event in events),
+        media_type="application/x-ndjson",
+    )
 
 @app.get("/profiles/{profile_id}/files/{file_id}")
-async def get_profile_file(profile_id: int, file_id: int):
-    return await get_profile_file_service(profile_id, file_id)
+async def get_profile_file(profile_id: int, file_id: int, request: Request, response: Response):
+    version = await profile_file_version_service(profile_id, file_id)
+    cached = check_etag(request, response, version, "file", profile_id, file_id)
+    if cached is not None:
+        return cached
+    return document_response(await get_profile_file_service(profile_id, file_id), response)
+
+@app.get("/profiles/{profile_id}/files/{file_id}/content")
+async def get_profile_file_content(
+    profile_id: int,
+    file_id: int,
+    request: Request,
+    response: Response,
+    page: Optional[int] = None,
+    segment: Optional[int] = None,
+    count: int = 1,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """
+    Read part of a file's text: a page, ``count`` segments from ``segment``,
+    or the characters from ``start`` to ``end``.
+    """
+    version = await profile_file_version_service(profile_id, file_id)
+    cached = check_etag(request, response, version, "file", profile_id, file_id)
+    if cached is not None:
+        return cached
+    return await get_profile_file_content_service(profile_id, file_id, page, segment, count, start, end)
+
+@app.get("/profiles/{profile_id}/search")
+async def search_profile_files(profile_id: int, q: str, request: Request, response: Response, limit: int = 20):
+    """
+    Find the files of a profile containing every word of ``q``, with the
+    segments where they occur (read them from the content endpoint).
+    """
+    cached = check_etag(request, response, await profile_version_service(profile_id), "search", profile_id)
+    if cached is not None:
+        return cached
+    return await search_profile_files_service(profile_id, q, limit)
 
 @app.delete("/profiles/{profile_id}/files/{file_id}")
 async def delete_profile_file(profile_id: int, file_id: int):
@@ -112,20 +302,29 @@ async def delete_all_profile_files(profile_id: int):
     return await delete_all_profile_files_service(profile_id)
 
 @app.get("/profiles/{profile_id}/audio")
-async def list_profile_audio(profile_id: int):
+async def list_profile_audio(profile_id: int, request: Request, response: Response):
+    cached = check_etag(request, response, await profile_version_service(profile_id), "audio", profile_id)
+    if cached is not None:
+        return cached
     return await list_profile_audio_service(profile_id)
 
+@app.get("/audio/{audio_id}")
+async def get_audio(audio_id: int, request: Request):
+    """Serve stored audio with HTTP Range support for seeking."""
+    return await get_audio_service(audio_id, request.headers.get("if-none-match"))
+
 @app.post("/upload-file")
 async def upload_file(file: UploadFile = File(...)):
     return await upload_file_service(file)
 
 @app.post("/generate")
 async def generate_audio(request: TTSRequest):
-    return generate_single_tts(request)
+    # Chunking, the cache lookup and a model load block: keep them off the event loop
+    return await asyncio.to_thread(generate_single_tts, request)
 
 @app.post("/generate_multi")
 async def generate_audio_multi(request: MultiTTSRequest):
-    return generate_multi_tts(request)
+    return await asyncio.to_thread(generate_multi_tts, request)
 
 @app.post("/stop-generation")
 async def stop_generation(request: StopGenerationRequest, background_tasks: BackgroundTasks):
@@ -138,6 +337,14 @@ async def get_model_status():
     model_manager = get_model_manager()
     return model_manager.get_model_status()
 
+@app.get("/model/memory")
+async def get_model_memory():
+    """
+    Process RSS, model weights and per-pipeline memory, the peak memory of
+    recent synthesis requests, and the memory history of model loads and unloads.
+    """
+    return get_model_manager().get_memory_report()
+
 @app.post("/model/unload")
 async def force_unload_model():
     """Force immediate unloading of the model to free memory."""
@@ -155,6 +362,27 @@ async def update_model_timeout(request: ModelTimeoutUpdate):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """Synthesis, model and document parsing metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profile", include_in_schema=PROFILING_ENABLED)
+async def profile_process(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(DEFAULT_INTERVAL * 1000, ge=1, le=1000),
+    idle: bool = False,
+):
+    """
+    Sample the stacks of the running server for ``seconds`` and return them
+    in the collapsed-stack format, e.g. for ``flamegraph.pl`` or speedscope.
+    Set ``idle`` to keep threads that are waiting for work. Only available
+    with ``TORCHTS_ENABLE_PROFILING``; one profile runs at a time.
+    """
+    require_profiling()
+    stacks, samples = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, idle)
+    return PlainTextResponse(stacks, headers={"X-Profile-Samples": str(samples)})
+
 @app.get("/")
 async def read_root():
     return {"status": "ok", "message": "Warrior Slug Lord of the Drug always busy fighting a fearsome Beetle riding a mighty Bug"}
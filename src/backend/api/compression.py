@@ -0,0 +1,156 @@
+"""Response compression.
+
+Compresses responses with brotli (when the ``brotli`` package is installed and
+the client accepts it) or gzip. Responses below a size threshold, partial
+(Range) responses and already-compressed content such as audio are sent as
+they are. Streamed responses are compressed chunk by chunk and flushed after
+every chunk, so streamed events still arrive as soon as they are sent; their
+size isn't known up front, so they are compressed whatever it is.
+"""
+
+import asyncio
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+# Smaller responses are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 3  # Close to level 6 on text at about half the time
+BROTLI_QUALITY = 4
+# Larger bodies are compressed in a worker thread, off the event loop
+THREAD_MIN_BYTES = 256 * 1024
+# Content types that are already compressed
+EXCLUDED_TYPES = (
+    "audio/", "video/", "image/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/octet-stream",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The content coding to use for an ``Accept-Encoding`` header: "br", "gzip" or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        if params and quality.replace(".", "", 1).isdigit() and float(quality) == 0:
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compressible(status: int, headers: Headers) -> bool:
+    """Whether a response with this status and these headers should be compressed."""
+    if status < 200 or status in (204, 206, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return not content_type.startswith(EXCLUDED_TYPES)
+
+
+class _Compressor:
+    """Incremental brotli or gzip compressor."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, final: bool, flush: bool = True) -> bytes:
+        """Compress ``data``, finishing the stream when ``final`` and otherwise flushing it if ``flush``."""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            if final:
+                return out + self._brotli.finish()
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        if final:
+            return out + self._zlib.flush(zlib.Z_FINISH)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses as described in the module docstring."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        # Whole response bytes still to come, when known up front
+        remaining: Optional[int] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, remaining
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                length = headers.get("content-length")
+                if not compressible(message["status"], headers) or (
+                    length is not None and int(length) < self.minimum_size
+                ):
+                    await send(message)
+                    return
+                start, remaining = message, int(length) if length is not None else None
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # The compressed bytes differ from the identity ones, so a
+                # strong validator must not be shared between them
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if not more_body:
+                    # The whole body in one message: send its compressed length
+                    body = await self._compress(compressor, body, True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await send(start)
+            if remaining is not None:
+                remaining -= len(body)
+            # Responses of known length are flushed only at the end; streamed
+            # ones after every chunk so their events aren't held back
+            await send({
+                "type": "http.response.body",
+                "body": await self._compress(compressor, body, not more_body, flush=remaining is None),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    async def _compress(compressor: _Compressor, data: bytes, final: bool, flush: bool = True) -> bytes:
+        if len(data) >= THREAD_MIN_BYTES:
+            return await asyncio.to_thread(compressor.compress, data, final, flush)
+        return compressor.compress(data, final, flush)
@@ -0,0 +1,42 @@
+"""JSON responses serialized with orjson.
+
+orjson encodes datetimes, numpy values and large strings natively and several
+times faster than ``json.dumps``, which matters for responses carrying whole
+documents. Without orjson installed the standard encoder is used.
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the json module
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode ``content`` as ``FastJSONResponse`` does (datetimes in ISO 8601),
+    e.g. for the lines of a streamed NDJSON response.
+    """
+    if orjson is None:
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returned directly from an endpoint, its content skips FastAPI's
+    ``jsonable_encoder`` pass too, so use it for large payloads such as
+    document text.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Auto-tune chunk size and torch thread count for the deployment hardware.
+
+Runs a calibration corpus through ``ModelManager`` under a grid of chunk
+budgets (``max_phonemes``) and torch intra-op thread counts, measuring the
+real-time factor (synthesis time / audio duration, lower is better) and the
+per-chunk latency percentiles. The fastest setting whose p95 chunk latency
+stays within ``--max-p95`` is written to the tuning profile that the server
+loads at startup.
+
+Usage:
+    python autotune.py [--voice af_heart] [--output data/tuning.json]
+"""
+
+import argparse
+import math
+import os
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import torch
+from rich import print as rprint
+
+from processing.text_processor import PHONEME_CONTEXT, plan_chunks
+from services.model_service import ModelManager
+from services.tuning_service import TUNING_FILE, save_tuned_settings
+
+warnings.filterwarnings("ignore", category=FutureWarning, module="torch.nn.utils.weight_norm")
+warnings.filterwarnings("ignore", category=UserWarning, module="torch.nn.modules.rnn")
+
+SAMPLE_RATE = 24000
+
+CALIBRATION_CORPUS = (
+    "The committee met on Tuesday to review the proposal. After a long discussion, "
+    "they agreed that the budget should be revised, the timeline extended by two weeks, "
+    "and the final report delivered before the end of the quarter. "
+    "Rain fell steadily over the harbour; fishing boats rocked against their moorings "
+    "while gulls circled overhead, calling to one another. "
+    "Is it possible to measure happiness? Philosophers have argued about it for centuries, "
+    "and economists have recently joined the debate with surveys and statistics. "
+    "She opened the letter slowly, read the first line twice, and then sat down. "
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+def measure(pipeline, corpus: str, voice: str, max_phonemes: int, repeats: int) -> Dict[str, Any]:
+    """Synthesize the corpus chunk by chunk and collect timing statistics."""
+    chunks = [chunk.text for chunk in plan_chunks(corpus, voice[0], max_phonemes)]
+    latencies = []
+    audio_seconds = 0.0
+    for _ in range(repeats):
+        for chunk in chunks:
+            start = time.perf_counter()
+            for _, _, audio in pipeline(chunk, voice=voice, speed=1.0):
+                audio_seconds += len(audio) / SAMPLE_RATE
+            latencies.append(time.perf_counter() - start)
+    synth_seconds = sum(latencies)
+    return {
+        "chunks": len(chunks),
+        "rtf": synth_seconds / audio_seconds if audio_seconds else float("inf"),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    default_threads = sorted({t for t in (1, 2, 4, 8, 16, 32, 64) if t <= cpu_count} | {cpu_count})
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--voice", default="af_heart", help="Voice used for calibration")
+    parser.add_argument("--corpus", type=Path, help="Calibration text file (default: built-in corpus)")
+    parser.add_argument("--chunk-sizes", type=parse_int_list, default=[150, 250, 350, 400, 450, 500],
+                        help="Comma-separated max_phonemes values to try")
+    parser.add_argument("--threads", type=parse_int_list, default=default_threads,
+                        help="Comma-separated torch thread counts to try")
+    parser.add_argument("--repeats", type=int, default=2, help="Passes over the corpus per setting")
+    parser.add_argument("--max-p95", type=float, default=None,
+                        help="Reject settings whose p95 chunk latency exceeds this many seconds")
+    parser.add_argument("--device", default=os.getenv("MODEL_DEVICE") or None, help="Device to tune on")
+    parser.add_argument("--output", type=Path, default=TUNING_FILE, help="Where to write the tuning profile")
+    args = parser.parse_args()
+
+    corpus = args.corpus.read_text(encoding="utf-8") if args.corpus else CALIBRATION_CORPUS
+    chunk_sizes = [size for size in args.chunk_sizes if size <= PHONEME_CONTEXT]
+
+    manager = ModelManager(device=args.device)
+    results = []
+    try:
+        with manager.get_pipeline(args.voice[0]) as pipeline:
+            # Warm up so model loading and first-call overheads are not measured.
+            for _, _, _ in pipeline("Warm up the model.", voice=args.voice, speed=1.0):
+                pass
+
+            rprint(f"[blue]{'threads':>7} {'max_phonemes':>12} {'chunks':>6} {'RTF':>7} "
+                   f"{'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8}[/blue]")
+            for threads in args.threads:
+                torch.set_num_threads(threads)
+                for max_phonemes in chunk_sizes:
+                    stats = measure(pipeline, corpus, args.voice, max_phonemes, args.repeats)
+                    stats.update(num_threads=threads, max_phonemes=max_phonemes)
+                    results.append(stats)
+                    rprint(f"{threads:>7} {max_phonemes:>12} {stats['chunks']:>6} {stats['rtf']:>7.3f} "
+                           f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f}")
+    finally:
+        manager.shutdown()
+
+    candidates = [r for r in results if args.max_p95 is None or r["p95"] <= args.max_p95] or results
+    best = min(candidates, key=lambda r: (r["rtf"], r["p95"]))
+    profile = {
+        "max_phonemes": best["max_phonemes"],
+        "num_threads": best["num_threads"],
+        "measured": {key: best[key] for key in ("rtf", "p50", "p95", "p99")},
+        "device": manager.device,
+        "cpu_count": cpu_count,
+        "voice": args.voice,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+    save_tuned_settings(profile, args.output)
+    rprint(f"[green]Best: max_phonemes={best['max_phonemes']}, threads={best['num_threads']} "
+           f"(RTF {best['rtf']:.3f}, p95 {best['p95']:.3f}s). Wrote {args.output}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from rich import print as rprint
 from rich import traceback #Noqa
 import uvicorn
 from services.model_service import get_model_manager, shutdown_model_manager
+from services.tuning_service import apply_tuned_settings, TUNING_FILE
 
 warnings.filterwarnings("ignore", category=FutureWarning, module="torch.nn.utils.weight_norm")
 warnings.filterwarnings("ignore", category=UserWarning, module="torch.nn.modules.rnn")
@@ -32,6 +33,12 @@ if __name__ == "__main__":
         device = 'cuda' if torch.cuda.is_available() else 'cpu'
         rprint(f"[green]INFO:     Using device: {device}[/green]")
         rprint(f"[blue]INFO:     Model will be loaded on-demand (timeout: {model_manager.unload_timeout}s)[/blue]")
+        
+        # Apply hardware-specific settings written by autotune.py, if any
+        settings = apply_tuned_settings()
+        if TUNING_FILE.exists():
+            rprint(f"[blue]INFO:     Loaded tuning profile {TUNING_FILE}: "
+                   f"max_phonemes={settings['max_phonemes']}, threads={settings['num_threads'] or torch.get_num_threads()}[/blue]")
 
         # Start the FastAPI server
         rprint("[green]INFO:     Server starting...[/green]")
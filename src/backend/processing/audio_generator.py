@@ -2,9 +2,11 @@ import numpy
 import pygame
 from rich import print as rprint
 import time
+import struct
 from queue import Queue
 import logging
-from typing import Optional, List, Iterator, Tuple
+from typing import Optional, List, Iterator, Tuple, Callable, Union
+from functools import lru_cache
 
 # Import Numba and math for the numerical optimizations.
 import numba
@@ -13,8 +15,27 @@ import math
 # -------------------------------
 # Numba-optimized utility functions
 # -------------------------------
+#
+# The kernels below are declared with explicit type signatures, so Numba
+# compiles them eagerly when this module is imported rather than on the first
+# request. ``cache=True`` persists the machine code on disk (``__pycache__``,
+# or ``NUMBA_CACHE_DIR`` when set), which lets later process starts and pool
+# workers load it instead of recompiling. The Python wrappers coerce inputs to
+# one of the compiled dtypes because no other specializations exist.
 
-@numba.njit
+SUPPORTED_AUDIO_DTYPES = (numpy.float32, numpy.float64)
+
+
+def _as_kernel_array(audio_data) -> numpy.ndarray:
+    """Return ``audio_data`` as a 1-D array with a dtype the kernels accept."""
+    audio_data = numpy.asarray(audio_data)
+    if audio_data.dtype not in SUPPORTED_AUDIO_DTYPES:
+        audio_data = audio_data.astype(numpy.float32)
+    return audio_data.reshape(-1)
+
+
+@numba.njit(["float32[:](float32[:], float64)",
+             "float64[:](float64[:], float64)"], cache=True)
 def normalize_audio_numba(audio_data, eps=1e-8):
     max_val = numpy.abs(audio_data).max()
     if max_val > eps:
@@ -25,10 +46,10 @@ def normalize_audio(audio_data: numpy.ndarray, eps: float = 1e-8) -> numpy.ndarr
     """
     Wrapper that uses the Numba-accelerated version.
     """
-    return normalize_audio_numba(audio_data, eps)
+    return normalize_audio_numba(_as_kernel_array(audio_data), eps)
 
 
-@numba.njit
+@numba.njit(["float64[:](int64)"], cache=True)
 def hann_window(M):
     """
     Compute a Hann window of length M.
@@ -39,7 +60,8 @@ def hann_window(M):
     return window
 
 
-@numba.njit
+@numba.njit(["float32[:](float32[:], float32[:], float64, int64)",
+             "float64[:](float64[:], float64[:], float64, int64)"], cache=True)
 def crossfade_numba(audio1, audio2, fade_duration=0.1, sample_rate=24000):
     fade_length = int(fade_duration * sample_rate)
     n_audio1 = audio1.shape[0]
@@ -79,8 +101,271 @@ def crossfade(audio1: numpy.ndarray, audio2: numpy.ndarray,
     """
     Wrapper that uses the Numba-accelerated crossfade.
     """
+    audio1 = _as_kernel_array(audio1)
+    audio2 = _as_kernel_array(audio2).astype(audio1.dtype, copy=False)
     return crossfade_numba(audio1, audio2, fade_duration, sample_rate)
 
+
+@numba.njit(["void(float32[:], int64, float32[:], float32[:], float32[:])",
+             "void(float64[:], int64, float64[:], float32[:], float32[:])"], cache=True)
+def overlap_add_numba(buffer, start, audio, fade_out, fade_in):
+    """
+    Crossfade the head of ``audio`` into ``buffer[start:start + len(fade_out)]``
+    in place, clipping the overlapped samples to [-1.0, 1.0].
+    """
+    for i in range(fade_out.shape[0]):
+        value = buffer[start + i] * fade_out[i] + audio[i] * fade_in[i]
+        if value > 1.0:
+            value = 1.0
+        elif value < -1.0:
+            value = -1.0
+        buffer[start + i] = value
+
+
+@lru_cache(maxsize=16)
+def crossfade_windows(fade_length: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Return the cached (fade_out, fade_in) halves of a Hann window for a fade
+    of ``fade_length`` samples.
+    """
+    window = hann_window(2 * fade_length).astype(numpy.float32)
+    return window[:fade_length], window[fade_length:]
+
+
+@numba.njit(["void(float32[:], int16[:], float64, float64)",
+             "void(float64[:], int16[:], float64, float64)"], cache=True)
+def quantize_pcm16_numba(audio_data, out, eps, dither):
+    """
+    Normalize, dither and convert ``audio_data`` to int16 in a single fused
+    pass, writing into the preallocated ``out``.
+
+    ``out`` may share memory with ``audio_data`` as long as both start at the
+    same address: sample ``i`` is written only after it has been read, and an
+    int16 sample never overlaps a later float sample.
+    """
+    max_val = 0.0
+    for i in range(audio_data.shape[0]):
+        value = abs(audio_data[i])
+        if value > max_val:
+            max_val = value
+    scale = 1.0 / max_val if max_val > eps else 1.0
+    for i in range(audio_data.shape[0]):
+        value = audio_data[i] * scale
+        if dither > 0.0:
+            value += numpy.random.random() * 2.0 * dither - dither
+        value *= 32767.0
+        if value > 32767.0:
+            value = 32767.0
+        elif value < -32767.0:
+            value = -32767.0
+        out[i] = numpy.int16(value)
+
+
+def pcm16_from_float(audio_data: numpy.ndarray, out: Optional[numpy.ndarray] = None,
+                     eps: float = 1e-8, dither: float = 0.0) -> numpy.ndarray:
+    """
+    Wrapper around the fused normalize-dither-quantize kernel.
+
+    Args:
+        audio_data: Float audio samples.
+        out: Optional preallocated int16 buffer with at least as many samples.
+        eps: Peak below which the audio is not normalized.
+        dither: Amplitude of uniform dither added before quantization.
+
+    Returns:
+        numpy.ndarray: The int16 samples (a view of ``out`` when given).
+    """
+    audio_data = _as_kernel_array(audio_data)
+    if out is None:
+        out = numpy.empty(audio_data.shape[0], dtype=numpy.int16)
+    out = out[:audio_data.shape[0]]
+    quantize_pcm16_numba(audio_data, out, eps, dither)
+    return out
+
+# -------------------------------
+# Incremental audio assembly
+# -------------------------------
+
+class AudioAssembler:
+    """
+    Stitch audio segments together with Hann crossfades in linear time.
+
+    Segments are written into a preallocated output buffer that grows
+    geometrically, and only the overlap region is crossfaded in place, so
+    assembling ``n`` segments costs O(total samples) instead of the O(n^2)
+    of chaining ``crossfade`` calls.
+
+    When a ``sink`` callable is given, the assembler streams instead of
+    accumulating: finished samples are passed to the sink as soon as they can
+    no longer be affected by a crossfade, and only the trailing fade region is
+    kept in memory. Call ``flush`` to emit that tail after the last segment.
+    """
+
+    def __init__(self,
+                 fade_duration: float = 0.1,
+                 sample_rate: int = 24000,
+                 initial_capacity: int = 24000 * 30,
+                 sink: Optional[Callable[[numpy.ndarray], None]] = None,
+                 dtype=numpy.float32):
+        """
+        Initialize the assembler.
+
+        Args:
+            fade_duration: Crossfade duration in seconds (0 disables crossfading).
+            sample_rate: Audio sample rate in Hz.
+            initial_capacity: Initial buffer size in samples.
+            sink: Optional callable receiving finished audio in streaming mode.
+            dtype: Sample dtype of the assembled audio (float32 or float64).
+        """
+        self.fade_length = int(fade_duration * sample_rate)
+        self.sample_rate = sample_rate
+        self.sink = sink
+        self.dtype = numpy.dtype(dtype)
+        if self.dtype not in SUPPORTED_AUDIO_DTYPES:
+            raise ValueError(f"Unsupported audio dtype: {self.dtype}")
+        self._buffer = numpy.empty(max(int(initial_capacity), self.fade_length, 1), dtype=self.dtype)
+        self._length = 0
+        self._total = 0
+        if self.fade_length > 0:
+            self._fade_out, self._fade_in = crossfade_windows(self.fade_length)
+
+    def __len__(self) -> int:
+        """Total number of samples appended so far (after crossfading)."""
+        return self._total
+
+    def _reserve(self, extra: int) -> None:
+        required = self._length + extra
+        capacity = self._buffer.shape[0]
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        grown = numpy.empty(capacity, dtype=self.dtype)
+        grown[:self._length] = self._buffer[:self._length]
+        self._buffer = grown
+
+    def append(self, audio) -> None:
+        """
+        Append a segment, crossfading it with the end of the assembled audio.
+
+        Args:
+            audio: 1-D audio samples (NumPy array or CPU tensor).
+        """
+        audio = numpy.asarray(audio, dtype=self.dtype).reshape(-1)
+        n_audio = audio.shape[0]
+        if n_audio == 0:
+            return
+
+        fade = self.fade_length
+        if fade > 0 and self._length >= fade and n_audio >= fade:
+            # Overlap-add only the fade region, then copy the remainder.
+            start = self._length - fade
+            overlap_add_numba(self._buffer, start, audio, self._fade_out, self._fade_in)
+            tail = audio[fade:]
+            self._reserve(tail.shape[0])
+            written = self._buffer[self._length:self._length + tail.shape[0]]
+            numpy.clip(tail, -1.0, 1.0, out=written)
+            self._length += tail.shape[0]
+            self._total += tail.shape[0]
+        else:
+            # Too short to crossfade: plain concatenation, like crossfade().
+            self._reserve(n_audio)
+            self._buffer[self._length:self._length + n_audio] = audio
+            self._length += n_audio
+            self._total += n_audio
+
+        if self.sink is not None and self._length > fade:
+            # Everything before the last ``fade`` samples is final.
+            ready = self._length - fade
+            self.sink(self._buffer[:ready].copy())
+            self._buffer[:fade] = self._buffer[ready:self._length]
+            self._length = fade
+
+    def flush(self) -> None:
+        """Emit any samples still held back for crossfading to the sink."""
+        if self.sink is not None and self._length:
+            self.sink(self._buffer[:self._length].copy())
+            self._length = 0
+
+    def getvalue(self) -> numpy.ndarray:
+        """
+        Return the assembled audio without copying it.
+
+        In streaming mode this is only the not-yet-emitted tail.
+        """
+        return self._buffer[:self._length]
+
+    def to_pcm16(self, dither: float = 0.0) -> numpy.ndarray:
+        """
+        Normalize and quantize the assembled audio to int16 in place.
+
+        The PCM samples are written over the start of the assembler's own
+        buffer, so no extra output array is allocated. The float samples are
+        destroyed and the assembler is reset afterwards.
+
+        Args:
+            dither: Amplitude of uniform dither added before quantization.
+
+        Returns:
+            numpy.ndarray: int16 view of the PCM samples.
+        """
+        pcm = self._buffer.view(numpy.int16)[:self._length]
+        quantize_pcm16_numba(self._buffer[:self._length], pcm, 1e-8, dither)
+        self._buffer = numpy.empty(self.fade_length or 1, dtype=self.dtype)
+        self._length = 0
+        self._total = 0
+        return pcm
+
+# -------------------------------
+# WAV encoding
+# -------------------------------
+
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(num_frames: int, sample_rate: int = 24000,
+               channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Build the canonical 44-byte RIFF/WAVE header for integer PCM data.
+
+    Args:
+        num_frames: Number of sample frames that follow the header.
+        sample_rate: Audio sample rate in Hz.
+        channels: Number of interleaved channels.
+        sample_width: Bytes per sample.
+
+    Returns:
+        bytes: The header.
+    """
+    block_align = channels * sample_width
+    data_size = num_frames * block_align
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', WAV_HEADER_SIZE - 8 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b'data', data_size,
+    )
+
+
+def wav_stream(pcm: numpy.ndarray, sample_rate: int = 24000,
+               chunk_size: int = 64 * 1024) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Yield a mono 16-bit WAV file as its header followed by zero-copy
+    ``memoryview`` slices of the PCM samples.
+
+    The total size is ``WAV_HEADER_SIZE + pcm.nbytes``.
+
+    Args:
+        pcm: int16 samples.
+        sample_rate: Audio sample rate in Hz.
+        chunk_size: Maximum number of bytes per yielded slice.
+    """
+    pcm = numpy.ascontiguousarray(pcm, dtype='<i2')
+    yield wav_header(pcm.shape[0], sample_rate)
+    data = memoryview(pcm).cast('B')
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
 # -------------------------------
 # Pygame audio playback (unchanged in API)
 # -------------------------------
@@ -95,9 +380,7 @@ def play_audio(audio_data: numpy.ndarray, sample_rate: int = 24000) -> None:
     """
     try:
         # Normalize and convert to int16 with simple dithering.
-        audio_normalized = normalize_audio(audio_data)
-        dither = numpy.random.random(len(audio_normalized)) * 2e-5 - 1e-5
-        audio_int16 = ((audio_normalized + dither) * 32767).astype(numpy.int16)
+        audio_int16 = pcm16_from_float(audio_data, dither=1e-5)
         
         sound = pygame.sndarray.make_sound(audio_int16)
         sound.set_volume(0.7)
@@ -155,7 +438,7 @@ class AudioGenerator:
         """
         Play audio chunks as they become available, with crossfading between them.
         """
-        prev_audio = None
+        assembler = AudioAssembler(sink=play_audio)
         
         try:
             while self.is_running:
@@ -163,13 +446,8 @@ class AudioGenerator:
                 if audio is None:
                     break
                 
-                if prev_audio is not None:
-                    combined_audio = crossfade(prev_audio, audio)
-                    play_audio(combined_audio)
-                else:
-                    play_audio(audio)
-                
-                prev_audio = audio
+                assembler.append(audio)
                 self.queue.task_done()
+            assembler.flush()
         except Exception as e:
-            logging.error(f"Error in audio playback loop: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error in audio playback loop: {str(e)}")
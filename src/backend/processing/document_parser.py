@@ -1,124 +1,358 @@
-from docx import Document
-from odf.opendocument import load
-from odf.text import P
 from pypdf import PdfReader
+import codecs
 import io
-from typing import Tuple
+import mmap
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Collection, IO, Iterator, List, NamedTuple, Optional, Tuple, Union
+from xml.etree.ElementTree import Element, iterparse
 
-def parse_pdf(content: bytes) -> Tuple[str, int]:
+# Parsers take the file's bytes or a seekable binary stream. PDFs may also be
+# given as a path, which is memory-mapped and lets pool workers open the file
+# themselves instead of receiving a copy of it.
+DocumentContent = Union[bytes, BinaryIO]
+PdfSource = Union[bytes, str, Path]
+
+# XML namespaces of the DOCX and ODT parts read below
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_STYLE = "{urn:oasis:names:tc:opendocument:xmlns:style:1.0}"
+_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+DOCX_HEADER_RE = re.compile(r"word/header\d*\.xml")
+
+# Characters per segment (and per estimated page) for formats without pages
+SEGMENT_CHARS = 3000
+
+class Segment(NamedTuple):
+    """A stored piece of a document; the segments concatenate to its text."""
+    text: str
+    page: int  # 1-based; estimated from SEGMENT_CHARS for formats without pages
+
+# PDFs with fewer pages are extracted in-process; below this the cost of
+# shipping the file to the workers outweighs the parallel speedup.
+PDF_PARALLEL_MIN_PAGES = 32
+# Page ranges handed out per worker; more than one evens out pages of uneven cost.
+PDF_RANGES_PER_WORKER = 2
+
+# Processes extracting PDFs (default: CPU count); with a single worker no
+# pool is created and extraction runs in-process.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+
+def get_pdf_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the process pool used for PDF extraction, created on first use.
+
+    Workers are spawned rather than forked: the pool is started from a parse
+    thread of a server that already runs other threads (and may have torch
+    loaded), and a forked child can deadlock on locks those threads held.
+    """
+    global _pdf_executor
+    if _pdf_executor is None and PDF_PARSE_WORKERS > 1:
+        _pdf_executor = ProcessPoolExecutor(max_workers=PDF_PARSE_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pdf_executor
+
+def shutdown_pdf_executor() -> None:
+    """Shut down the PDF extraction pool, if it was started."""
+    global _pdf_executor
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(cancel_futures=True)
+        _pdf_executor = None
+
+def _as_stream(content: DocumentContent) -> BinaryIO:
+    """Wrap bytes in a stream; streams are rewound and used as they are."""
+    if isinstance(content, (bytes, bytearray)):
+        return io.BytesIO(content)
+    content.seek(0)
+    return content
+
+@contextmanager
+def _open_pdf(source: PdfSource) -> Iterator[PdfReader]:
+    """Open a PDF from bytes, or from a path through a read-only memory map."""
+    if isinstance(source, (bytes, bytearray)):
+        yield PdfReader(io.BytesIO(source))
+        return
+    with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield PdfReader(mapped)
+
+def _extract_page_range(source: PdfSource, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``start`` to ``stop`` (runs in a worker process)."""
+    with _open_pdf(source) as pdf_reader:
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def extract_pdf_pages(content: PdfSource, executor: Optional[Executor] = None,
+                      workers: Optional[int] = None) -> List[str]:
+    """
+    Extract the text of every page of a PDF.
+
+    Large documents are split into contiguous page ranges that are extracted
+    in parallel on ``executor``; results come back in page order.
+
+    Args:
+        content: The bytes content of the PDF file, or its path
+        executor: Pool to extract on (default: ``get_pdf_executor()``)
+        workers: Size of ``executor`` (default: ``PDF_PARSE_WORKERS``)
+
+    Returns:
+        List[str]: Text of each page ("" for pages without extractable text)
+    """
+    with _open_pdf(content) as pdf_reader:
+        page_count = len(pdf_reader.pages)
+        if executor is None:
+            executor = get_pdf_executor()
+        workers = (workers or PDF_PARSE_WORKERS) if executor is not None else 1
+        if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+
+    range_count = min(page_count, workers * PDF_RANGES_PER_WORKER)
+    bounds = [page_count * i // range_count for i in range(range_count + 1)]
+    try:
+        futures = [
+            executor.submit(_extract_page_range, content, start, stop)
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        return [page_text for future in futures for page_text in future.result()]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        # and finish this document in-process.
+        if executor is _pdf_executor:
+            shutdown_pdf_executor()
+        return _extract_page_range(content, 0, page_count)
+
+def parse_pdf(content: PdfSource) -> Tuple[str, int]:
     """
     Extract text from a PDF file content.
     
     Args:
-        content: The bytes content of the PDF file
+        content: The bytes content of the PDF file, or its path
         
     Returns:
         Tuple[str, int]: Extracted text content and number of pages
     """
+    segments, page_count = parse_pdf_segments(content)
+    return "".join(segment.text for segment in segments), page_count
+
+def parse_pdf_segments(content: PdfSource) -> Tuple[List[Segment], int]:
+    """
+    Extract the text of a PDF as one segment per page with text.
+
+    Args:
+        content: The bytes content of the PDF file, or its path
+
+    Returns:
+        Tuple[List[Segment], int]: Page segments and number of pages
+    """
     try:
-        pdf_reader = PdfReader(io.BytesIO(content))
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
+        pages = extract_pdf_pages(content)
+        segments = [
+            Segment(page_text + "\n", number)
+            for number, page_text in enumerate(pages, start=1) if page_text
+        ]
         
-        if not text.strip():
+        if not any(segment.text.strip() for segment in segments):
             raise Exception("No extractable text found in the PDF")
             
-        return text, len(pdf_reader.pages)
+        return segments, len(pages)
     except Exception as e:
         raise Exception(f"Error parsing PDF file: {str(e)}")
 
-def parse_docx(content: bytes) -> Tuple[str, int]:
+def _iter_paragraphs(xml_stream: IO[bytes], paragraph_tags: Collection[str],
+                     paragraph_text: Callable[[Element], str],
+                     within: Optional[str] = None, skip: Optional[str] = None) -> Iterator[str]:
+    """
+    Stream the paragraphs of an XML document part.
+
+    Only the paragraph being read is kept in memory. Nested paragraphs (table
+    cells, text boxes, notes) are yielded when they end and then cleared, and
+    elements outside any paragraph are dropped as soon as they are parsed.
+
+    Args:
+        xml_stream: The XML part, e.g. a member opened from the zip archive
+        paragraph_tags: Qualified tags of paragraph elements
+        paragraph_text: Returns the text of a parsed paragraph element
+        within: Only yield paragraphs inside an element with this tag
+        skip: Ignore elements with this tag and everything inside them
+
+    Yields:
+        str: The text of each paragraph, in document order
+    """
+    stack: List[Element] = []
+    open_paragraphs = 0
+    inside = 0 if within else 1
+    skipping = 0
+    for event, elem in iterparse(xml_stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag in paragraph_tags:
+                open_paragraphs += 1
+            elif elem.tag == within:
+                inside += 1
+            elif elem.tag == skip:
+                skipping += 1
+            continue
+
+        stack.pop()
+        if elem.tag in paragraph_tags:
+            open_paragraphs -= 1
+            if inside and not skipping:
+                yield paragraph_text(elem)
+            # The tail is text of the enclosing paragraph, if any
+            tail = elem.tail
+            elem.clear()
+            elem.tail = tail
+        elif elem.tag == within:
+            inside -= 1
+        elif elem.tag == skip:
+            skipping -= 1
+            if stack:
+                # Also inside a paragraph: its runs aren't part of that paragraph's text
+                stack[-1].remove(elem)
+            continue
+        if not open_paragraphs and stack:
+            stack[-1].remove(elem)
+
+def _docx_paragraph_text(paragraph: Element) -> str:
+    """Text of a ``w:p`` element: its runs' text, tabs and line breaks."""
+    parts = []
+    for run in paragraph.iter(_W + "r"):
+        for child in run:
+            if child.tag == _W + "t":
+                parts.append(child.text or "")
+            elif child.tag == _W + "tab":
+                parts.append("\t")
+            elif child.tag in (_W + "br", _W + "cr"):
+                parts.append("\n")
+            elif child.tag == _W + "noBreakHyphen":
+                parts.append("-")
+    return "".join(parts)
+
+def _odt_paragraph_text(elem: Element) -> str:
+    """Text of a ``text:p``/``text:h`` element, including nested spans and links."""
+    parts = [elem.text or ""]
+    for child in elem:
+        if child.tag == _TEXT + "s":
+            parts.append(" " * int(child.get(_TEXT + "c", "1")))
+        elif child.tag == _TEXT + "tab":
+            parts.append("\t")
+        elif child.tag == _TEXT + "line-break":
+            parts.append("\n")
+        elif child.tag != _OFFICE + "annotation":  # Comments aren't part of the text
+            parts.append(_odt_paragraph_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+def iter_docx_paragraphs(content: DocumentContent) -> Iterator[str]:
+    """
+    Stream the paragraphs of a DOCX file: page headers, then the body
+    (including tables and text boxes).
+
+    Text boxes are stored twice, as a drawing (``mc:Choice``) and as VML for
+    older readers (``mc:Fallback``); the fallback copy is skipped.
+    """
+    with zipfile.ZipFile(_as_stream(content)) as archive:
+        names = archive.namelist()
+        if "word/document.xml" not in names:
+            raise Exception("Missing word/document.xml")
+        parts = sorted(name for name in names if DOCX_HEADER_RE.fullmatch(name))
+        for name in parts + ["word/document.xml"]:
+            with archive.open(name) as part:
+                yield from _iter_paragraphs(part, {_W + "p"}, _docx_paragraph_text, skip=_MC + "Fallback")
+
+def iter_odt_paragraphs(content: DocumentContent) -> Iterator[str]:
+    """
+    Stream the paragraphs and headings of an ODT file: page headers, then the
+    body (including tables, frames and notes).
+    """
+    paragraph_tags = {_TEXT + "p", _TEXT + "h"}
+    with zipfile.ZipFile(_as_stream(content)) as archive:
+        names = archive.namelist()
+        if "content.xml" not in names:
+            raise Exception("Missing content.xml")
+        if "styles.xml" in names:
+            with archive.open("styles.xml") as part:
+                yield from _iter_paragraphs(part, paragraph_tags, _odt_paragraph_text,
+                                            within=_STYLE + "header")
+        with archive.open("content.xml") as part:
+            yield from _iter_paragraphs(part, paragraph_tags, _odt_paragraph_text)
+
+def parse_docx(content: DocumentContent) -> Tuple[str, int]:
     """
     Extract text from a DOCX file content.
     
     Args:
-        content: The bytes content of the DOCX file
+        content: The bytes content of the DOCX file, or a binary stream
         
     Returns:
         Tuple[str, int]: Extracted text content and estimated number of pages
     """
     try:
-        doc = Document(io.BytesIO(content))
-        paragraphs = [para.text for para in doc.paragraphs]
-        text = "\n".join(paragraphs)
+        text = "\n".join(iter_docx_paragraphs(content))
         
         if not text.strip():
             raise Exception("No text found in the DOCX file")
             
-        # Estimate pages (rough approximation based on character count)
-        estimated_pages = max(1, len(text) // 3000)
-        return text, estimated_pages
+        return text, estimate_pages(text)
     except Exception as e:
         raise Exception(f"Error parsing DOCX file: {str(e)}")
 
-def parse_odt(content: bytes) -> Tuple[str, int]:
+def parse_odt(content: DocumentContent) -> Tuple[str, int]:
     """
     Extract text from an ODT file content.
     
     Args:
-        content: The bytes content of the ODT file
+        content: The bytes content of the ODT file, or a binary stream
         
     Returns:
         Tuple[str, int]: Extracted text content and estimated number of pages
     """
     try:
-        # Create a temporary BytesIO object to load the ODT file
-        with io.BytesIO(content) as buffer:
-            textdoc = load(buffer)
-            all_paragraphs = textdoc.getElementsByType(P)
-            
-            paragraphs_content = []
-            for paragraph in all_paragraphs:
-                # Each paragraph's text content is stored in child nodes
-                # So we join all textual child nodes for this paragraph
-                paragraphs_content.append("".join(
-                    node.data for node in paragraph.childNodes 
-                    if node.nodeType == node.TEXT_NODE
-                ))
+        text = "\n".join(iter_odt_paragraphs(content))
+        if not text.strip():
+            raise Exception("No text found in the ODT file")
             
-            text = "\n".join(paragraphs_content)
-            if not text.strip():
-                raise Exception("No text found in the ODT file")
-                
-            # Estimate pages (rough approximation based on character count)
-            estimated_pages = max(1, len(text) // 3000)
-            return text, estimated_pages
+        return text, estimate_pages(text)
     except Exception as e:
         raise Exception(f"Error parsing ODT file: {str(e)}")
 
-def parse_text(content: bytes) -> Tuple[str, int]:
+def parse_text(content: Union[bytes, mmap.mmap]) -> Tuple[str, int]:
     """
     Extract text from a plain text or markdown file content.
     
     Args:
-        content: The bytes content of the text file
+        content: The bytes content of the text file (or a memory map of it)
         
     Returns:
-        Tuple[str, int]: Extracted text content and page count (always 1 for text files)
+        Tuple[str, int]: Extracted text content and estimated number of pages
     """
     try:
         try:
-            text = content.decode('utf-8')
+            text = codecs.decode(content, 'utf-8')
         except UnicodeDecodeError:
             # Try with different encoding if UTF-8 fails
-            text = content.decode('latin-1')
+            text = codecs.decode(content, 'latin-1')
             
         if not text.strip():
             raise Exception("File is empty")
             
-        return text, 1
+        return text, estimate_pages(text)
     except Exception as e:
         raise Exception(f"Error parsing text file: {str(e)}")
 
-def parse_document(content: bytes, file_ext: str) -> Tuple[str, int]:
+def parse_document(content: DocumentContent, file_ext: str) -> Tuple[str, int]:
     """
     Parse any supported document type and extract its text content.
     
     Args:
-        content: The bytes content of the file
+        content: The bytes content of the file, or a binary stream
         file_ext: The file extension (without the dot)
         
     Returns:
@@ -135,4 +369,75 @@ def parse_document(content: bytes, file_ext: str) -> Tuple[str, int]:
     if file_ext not in parsers:
         raise Exception(f"Unsupported file type: {file_ext}")
         
-    return parsers[file_ext](content) 
\ No newline at end of file
+    return parsers[file_ext](content) 
+
+def parse_document_file(path: Union[str, Path], file_ext: str) -> Tuple[str, int]:
+    """
+    Parse a document stored on disk without reading it into memory first.
+
+    PDFs and text files are memory-mapped; DOCX and ODT archives are read
+    through the open file, so only the members being parsed are loaded.
+
+    Args:
+        path: Location of the file
+        file_ext: The file extension (without the dot)
+
+    Returns:
+        Tuple[str, int]: Extracted text content and page count
+    """
+    if file_ext == 'pdf':
+        return parse_pdf(Path(path))
+    if file_ext in ('txt', 'md'):
+        if os.path.getsize(path) == 0:
+            raise Exception("Error parsing text file: File is empty")
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_text(mapped)
+    with open(path, 'rb') as f:
+        return parse_document(f, file_ext)
+
+def _segment_bounds(text: str, size: int = SEGMENT_CHARS) -> Iterator[Tuple[int, int]]:
+    """
+    Start and end offsets of the segments of about ``size`` characters that
+    ``text`` is split into, ending each at the last line break (or else
+    whitespace) before the limit where there is one.
+    """
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind("\n", start + size // 2, end)
+            if cut < 0:
+                cut = max(text.rfind(" ", start + size // 2, end), text.rfind("\t", start + size // 2, end))
+            if cut >= 0:
+                end = cut + 1
+        yield start, end
+        start = end
+
+def estimate_pages(text: str) -> int:
+    """
+    Page count of a format without pages: one page per segment, so it matches
+    the page numbers of ``split_segments`` (``ceil(len(text) / SEGMENT_CHARS)``
+    unless segments end early at line breaks).
+    """
+    return max(1, sum(1 for _ in _segment_bounds(text)))
+
+def split_segments(text: str, size: int = SEGMENT_CHARS) -> List[Segment]:
+    """Split text into segments of about ``size`` characters, numbered as pages from 1."""
+    return [Segment(text[start:end], page) for page, (start, end) in enumerate(_segment_bounds(text, size), 1)]
+
+def parse_document_segments(path: Union[str, Path], file_ext: str) -> Tuple[List[Segment], int]:
+    """
+    Parse a document stored on disk into ordered segments: one per page for
+    PDFs, otherwise pieces of about ``SEGMENT_CHARS`` characters.
+
+    Args:
+        path: Location of the file
+        file_ext: The file extension (without the dot)
+
+    Returns:
+        Tuple[List[Segment], int]: Segments (concatenating to the text) and page count
+    """
+    if file_ext == 'pdf':
+        return parse_pdf_segments(Path(path))
+    text, pages = parse_document_file(path, file_ext)
+    return split_segments(text), pages
@@ -2,7 +2,7 @@ import re
 import logging
 from pathlib import Path
 from rich import print as rprint
-from typing import List, Optional
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
 
 # Set up logging (adjust logging configuration as needed)
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +13,66 @@ MAX_TOKENS = 400
 # Precompile regex patterns to improve performance
 SENTENCE_DELIMITER_RE = re.compile(r'([.!?]+)')
 PUNCTUATION_DELIMITER_RE = re.compile(r'([,;])')
+# Span patterns used by the streaming chunker. Each match starts at a
+# non-whitespace character and runs through its trailing delimiters (and any
+# closing quotes or brackets after them).
+_CLOSERS = '"\'\u201d\u2019\u300d\u300f\uff09)\\]'
+SENTENCE_SPAN_RE = re.compile(r'\S[^.!?]*[.!?]*')
+PUNCTUATION_SPAN_RE = re.compile(r'\S[^,;]*[,;]*')
+WORD_SPAN_RE = re.compile(r'\S+')
+
+# Kokoro's model context, in phoneme tokens. Longer inputs are re-split by the
+# pipeline, which costs an extra forward pass per split.
+PHONEME_CONTEXT = 510
+# Default chunk budget for the phoneme planner. The margin below the context
+# absorbs estimation error so chunks are not re-split.
+MAX_PHONEMES = 400
+
+# Chunk plan modes: 'throughput' packs every chunk to the full budget, while
+# 'latency' starts with a short first chunk (about one sentence, roughly 1-2 s
+# of speech) and grows the budget geometrically to favour time to first audio.
+PLAN_MODES = ('throughput', 'latency')
+LATENCY_FIRST_PHONEMES = 60
+LATENCY_GROWTH = 2.0
+
+# Han ideographs, kana and Hangul: "dense" scripts where one character maps to
+# several phonemes.
+DENSE_SCRIPT_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+
+class LanguageProfile(NamedTuple):
+    """Sentence boundaries and phoneme density for one pipeline language."""
+    sentence_re: re.Pattern
+    clause_re: re.Pattern
+    phonemes_per_char: float  # Letters, digits, spaces and punctuation
+    dense_phonemes_per_char: float  # Characters matched by DENSE_SCRIPT_RE
+
+
+def _sentence_span_re(terminators: str) -> re.Pattern:
+    return re.compile(rf'\S[^{terminators}]*[{terminators}]*[{_CLOSERS}]*')
+
+
+def _clause_span_re(delimiters: str) -> re.Pattern:
+    return re.compile(rf'\S[^{delimiters}]*[{delimiters}]*')
+
+
+_LATIN = LanguageProfile(_sentence_span_re('.!?\u2026'), _clause_span_re(',;:'), 1.0, 1.0)
+
+# Keyed by the pipeline language codes used by ModelManager. The phoneme
+# densities are rough averages of Kokoro's G2P output length per character.
+LANGUAGE_PROFILES = {
+    'a': _LATIN,  # American English
+    'b': _LATIN,  # British English
+    'e': _LATIN._replace(phonemes_per_char=1.05),  # Spanish
+    'f': _LATIN._replace(phonemes_per_char=0.9),  # French
+    'h': LanguageProfile(_sentence_span_re('.!?\u0964\u0965'), _clause_span_re(',;:'), 1.2, 1.2),  # Hindi
+    'i': _LATIN._replace(phonemes_per_char=1.05),  # Italian
+    'j': LanguageProfile(_sentence_span_re('.!?\u2026\u3002\uff01\uff1f'),
+                         _clause_span_re(',;:\u3001\uff0c\uff1b\uff1a'), 1.0, 2.5),  # Japanese
+    'p': _LATIN._replace(phonemes_per_char=1.05),  # Brazilian Portuguese
+    'z': LanguageProfile(_sentence_span_re('.!?\u2026\u3002\uff01\uff1f\uff1b'),
+                         _clause_span_re(',;:\u3001\uff0c\uff1a'), 1.0, 3.0),  # Mandarin Chinese
+}
 
 def split_sentences(text: str) -> List[str]:
     """
@@ -29,12 +89,219 @@ def split_sentences(text: str) -> List[str]:
     sentences = [''.join(pair) for pair in zip(parts[0::2], parts[1::2] + [''])]
     return sentences
 
+class TextChunk(NamedTuple):
+    """A chunk of text and its position in the source text."""
+    text: str
+    char_start: int
+    char_end: int
+    byte_start: int  # UTF-8 byte offsets
+    byte_end: int
+
+
+def _rstrip_span(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+class _ChunkBudget:
+    """
+    Per-chunk cost budget: ``first`` for the first chunk, then growing by a
+    factor of ``growth`` per chunk until it reaches ``limit``.
+    """
+
+    def __init__(self, limit: float, first: Optional[float] = None, growth: float = 1.0):
+        self.limit = limit
+        self.first = limit if first is None else min(first, limit)
+        self.growth = growth
+        self.index = 0  # Index of the chunk being packed
+
+    def current(self) -> float:
+        return min(self.limit, self.first * self.growth ** self.index)
+
+
+def _iter_pieces(text: str, budget: _ChunkBudget, cost: Callable[[int, int], float],
+                 sentence_re: re.Pattern, clause_re: re.Pattern) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) spans of the smallest units a chunk is built from, in
+    order and with surrounding whitespace excluded: whole sentences, or for
+    sentences over the current chunk budget their clauses, or for clauses over
+    the overall limit their words. A word over the limit (or an unspaced run of
+    CJK text) is cut into equal windows.
+    """
+    limit = budget.limit
+    for sentence in sentence_re.finditer(text):
+        start = sentence.start()
+        end = _rstrip_span(text, start, sentence.end())
+        if cost(start, end) <= budget.current():
+            yield start, end
+            continue
+        for part in clause_re.finditer(text, start, end):
+            part_start = part.start()
+            part_end = _rstrip_span(text, part_start, part.end())
+            if cost(part_start, part_end) <= limit:
+                yield part_start, part_end
+                continue
+            for word in WORD_SPAN_RE.finditer(text, part_start, part_end):
+                word_start, word_end = word.span()
+                word_cost = cost(word_start, word_end)
+                if word_cost <= limit:
+                    yield word_start, word_end
+                    continue
+                step = max(1, int((word_end - word_start) * limit // word_cost))
+                for window_start in range(word_start, word_end, step):
+                    yield window_start, min(window_start + step, word_end)
+
+
+def _pack_chunks(text: str, pieces: Iterator[Tuple[int, int]], budget: _ChunkBudget,
+                 cost: Callable[[int, int], float]) -> Iterator[TextChunk]:
+    """
+    Greedily pack consecutive pieces into chunks whose cost stays within the
+    budget. A chunk always takes at least one piece.
+    """
+    ascii_only = text.isascii()
+    # Position up to which UTF-8 byte offsets have been counted.
+    counted_chars = counted_bytes = 0
+
+    def byte_offset(char_offset: int) -> int:
+        nonlocal counted_chars, counted_bytes
+        if ascii_only:
+            return char_offset
+        counted_bytes += len(text[counted_chars:char_offset].encode('utf-8'))
+        counted_chars = char_offset
+        return counted_bytes
+
+    def make_chunk(start: int, end: int, chunk_cost: float) -> TextChunk:
+        chunk = TextChunk(text[start:end], start, end, byte_offset(start), byte_offset(end))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Chunk at chars %d-%d: %d chars, cost %.0f. Ends with: ...%s",
+                         start, end, end - start, chunk_cost, chunk.text[-50:])
+        return chunk
+
+    chunk_start = chunk_end = None
+    chunk_cost = 0.0
+    for start, end in pieces:
+        if chunk_start is not None:
+            # Cost of the gap since the previous piece plus this piece.
+            added = cost(chunk_end, end)
+            if chunk_cost + added <= budget.current():
+                chunk_end = end
+                chunk_cost += added
+                continue
+            yield make_chunk(chunk_start, chunk_end, chunk_cost)
+            budget.index += 1
+        chunk_start, chunk_end, chunk_cost = start, end, cost(start, end)
+    if chunk_start is not None:
+        yield make_chunk(chunk_start, chunk_end, chunk_cost)
+
+
+def _char_cost(start: int, end: int) -> int:
+    return end - start
+
+
+def iter_chunks(text: str, max_tokens: int = MAX_TOKENS) -> Iterator[TextChunk]:
+    """
+    Lazily split text into chunks of at most max_tokens characters.
+    
+    The text is scanned once. Sentences are packed into chunks greedily; a
+    sentence longer than max_tokens is split further at commas or semicolons,
+    and then at word boundaries. Each chunk is a slice of the input (with
+    surrounding whitespace trimmed), so its character and UTF-8 byte offsets
+    locate it in the source.
+    
+    Args:
+        text (str): The text to be chunked.
+        max_tokens (int): Maximum number of characters per chunk.
+    
+    Yields:
+        TextChunk: The chunks in order.
+    """
+    budget = _ChunkBudget(max_tokens)
+    pieces = _iter_pieces(text, budget, _char_cost, SENTENCE_SPAN_RE, PUNCTUATION_SPAN_RE)
+    return _pack_chunks(text, pieces, budget, _char_cost)
+
+
+def language_profile(lang_code: str) -> LanguageProfile:
+    """Return the profile for a pipeline language code (English-like if unknown)."""
+    return LANGUAGE_PROFILES.get(lang_code.lower()[:1], _LATIN)
+
+
+def estimate_phonemes(text: str, lang_code: str = 'a', start: int = 0, end: Optional[int] = None) -> float:
+    """
+    Estimate how many phoneme tokens the pipeline produces for ``text[start:end]``.
+    
+    Args:
+        text (str): The text.
+        lang_code (str): Pipeline language code.
+        start (int): Start of the span to estimate.
+        end (Optional[int]): End of the span (defaults to the end of the text).
+    
+    Returns:
+        float: The estimated number of phoneme tokens.
+    """
+    profile = language_profile(lang_code)
+    end = len(text) if end is None else end
+    length = end - start
+    if profile.dense_phonemes_per_char == profile.phonemes_per_char:
+        return length * profile.phonemes_per_char
+    dense = len(DENSE_SCRIPT_RE.findall(text, start, end))
+    return (length - dense) * profile.phonemes_per_char + dense * profile.dense_phonemes_per_char
+
+
+def plan_chunks(text: str, lang_code: str = 'a', max_phonemes: int = MAX_PHONEMES,
+                mode: str = 'throughput', first_phonemes: int = LATENCY_FIRST_PHONEMES,
+                growth: float = LATENCY_GROWTH) -> Iterator[TextChunk]:
+    """
+    Lazily split text into chunks sized by estimated phoneme count.
+    
+    Sentence and clause boundaries follow the language (e.g. 。！？ for
+    Japanese and Chinese, । for Hindi), and chunks are packed up to
+    max_phonemes estimated phoneme tokens. That keeps each chunk close to the
+    model's optimal length: fewer forward passes than character budgets for
+    sparse scripts, and no re-splits inside the pipeline for dense ones.
+    
+    In ``'latency'`` mode the first chunk is limited to first_phonemes, so it
+    holds a single sentence (or clause, if the sentence is longer), and later
+    budgets grow by ``growth`` per chunk up to max_phonemes. Playback can then
+    start after a short synthesis while later chunks reach full size.
+    
+    Args:
+        text (str): The text to be chunked.
+        lang_code (str): Pipeline language code ('a', 'b', 'e', 'f', 'h', 'i', 'j', 'p', 'z').
+        max_phonemes (int): Phoneme budget per chunk (at most PHONEME_CONTEXT).
+        mode (str): One of PLAN_MODES, 'throughput' or 'latency'.
+        first_phonemes (int): Budget of the first chunk in 'latency' mode.
+        growth (float): Budget growth factor per chunk in 'latency' mode.
+    
+    Yields:
+        TextChunk: The chunks in order.
+    
+    Raises:
+        ValueError: If mode is not one of PLAN_MODES.
+    """
+    if mode not in PLAN_MODES:
+        raise ValueError(f"Unsupported chunk plan mode: {mode}")
+    profile = language_profile(lang_code)
+    max_phonemes = min(max_phonemes, PHONEME_CONTEXT)
+    if mode == 'latency':
+        budget = _ChunkBudget(max_phonemes, first_phonemes, growth)
+    else:
+        budget = _ChunkBudget(max_phonemes)
+
+    def cost(start: int, end: int) -> float:
+        return estimate_phonemes(text, lang_code, start, end)
+
+    pieces = _iter_pieces(text, budget, cost, profile.sentence_re, profile.clause_re)
+    return _pack_chunks(text, pieces, budget, cost)
+
+
 def chunk_text(text: str, max_tokens: int = MAX_TOKENS) -> List[str]:
     """
     Split text into chunks that do not exceed max_tokens characters.
     
     If a sentence exceeds max_tokens, further splits are performed at commas 
-    or by word boundaries.
+    or by word boundaries. See ``iter_chunks`` for a lazy variant that also
+    reports chunk offsets.
     
     Args:
         text (str): The text to be chunked.
@@ -43,61 +310,8 @@ def chunk_text(text: str, max_tokens: int = MAX_TOKENS) -> List[str]:
     Returns:
         List[str]: A list of text chunks.
     """
-    sentences = split_sentences(text)
-    chunks = []
-    current_chunk = []
-    current_token_count = 0
-
-    for sentence in sentences:
-        sentence_length = len(sentence)
-        if sentence_length > max_tokens:
-            # If a sentence is too long, split further at commas/semicolons.
-            parts = PUNCTUATION_DELIMITER_RE.split(sentence)
-            parts = [''.join(pair) for pair in zip(parts[0::2], parts[1::2] + [''])]
-            for part in parts:
-                if len(part) > max_tokens:
-                    # For parts that are still too long, split on word boundaries.
-                    words = part.split()
-                    temp_chunk = []
-                    temp_count = 0
-                    for word in words:
-                        word_length = len(word) + 1  # Account for the space.
-                        if temp_count + word_length > max_tokens:
-                            chunks.append(' '.join(temp_chunk))
-                            temp_chunk = [word]
-                            temp_count = word_length
-                        else:
-                            temp_chunk.append(word)
-                            temp_count += word_length
-                    if temp_chunk:
-                        chunks.append(' '.join(temp_chunk))
-                else:
-                    if current_token_count + len(part) > max_tokens:
-                        chunks.append(' '.join(current_chunk))
-                        current_chunk = [part]
-                        current_token_count = len(part)
-                    else:
-                        current_chunk.append(part)
-                        current_token_count += len(part)
-        else:
-            if current_token_count + sentence_length > max_tokens:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [sentence]
-                current_token_count = sentence_length
-            else:
-                current_chunk.append(sentence)
-                current_token_count += sentence_length
-
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-
-    # Debug info: Print and log chunk details.
-    rprint(f"[cyan]Split into {len(chunks)} chunks:[/cyan]")
-    for i, chunk in enumerate(chunks, 1):
-        debug_message = f"[dim]Chunk {i}: {len(chunk)} chars. Ends with: ...{chunk[-50:]}[/dim]"
-        rprint(debug_message)
-        logger.debug(debug_message)
-    
+    chunks = [chunk.text for chunk in iter_chunks(text, max_tokens)]
+    logger.debug("Split into %d chunks", len(chunks))
     return chunks
 
 def read_text_file(file_path: str) -> Optional[str]:
@@ -0,0 +1,39 @@
+"""HTTP conditional requests (ETag / If-None-Match).
+
+Responses carry a strong ETag derived from the versions or content hashes of
+the data they are built from. A client sending that ETag back in
+``If-None-Match`` gets ``304 Not Modified`` without the data being read or
+rendered again.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response
+
+# Browsers may keep the response but revalidate it before each use
+REVALIDATE = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong entity tag for the values a response is built from."""
+    return '"' + hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an ``If-None-Match`` header lists ``etag`` (compared weakly, as
+    RFC 9110 requires for this header) or is ``*``.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    """A ``304 Not Modified`` response for ``etag``."""
+    return Response(status_code=304, headers=dict(headers or {}, ETag=etag))
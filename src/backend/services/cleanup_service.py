@@ -0,0 +1,52 @@
+"""Background cleanup after deletions.
+
+Deleting a profile or a file removes its rows with a few set-based
+statements and returns. What they leave behind can take much longer to remove
+for large libraries, so a background task removes it afterwards: shared
+documents no file references any more (with their segments and search index
+entries) and rendered audio files no row references.
+"""
+
+import asyncio
+from typing import Iterable, Set
+
+from rich import print as rprint
+
+from storage.models import purge_orphaned_documents
+from storage.audio_store import get_audio_store
+
+# Running cleanups (referenced until they finish)
+_pending: Set[asyncio.Future] = set()
+
+
+def _cleanup(document_ids: Iterable[int], audio_hashes: Iterable[str]) -> None:
+    purge_orphaned_documents(document_ids)
+    audio_store = get_audio_store()
+    if audio_store is not None and audio_hashes:
+        audio_store.delete_unreferenced_files(audio_hashes)
+
+
+def _finished(future: asyncio.Future) -> None:
+    _pending.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        rprint(f"[red]Cleanup after deletion failed: {future.exception()}[/red]")
+
+
+def schedule_cleanup(document_ids: Iterable[int] = (), audio_hashes: Iterable[str] = ()) -> asyncio.Future:
+    """
+    Remove the documents and audio files left unreferenced by a deletion in
+    the background.
+
+    The work is handed to the event loop's executor right away, so it still
+    runs to completion if the loop shuts down before it is done.
+
+    Args:
+        document_ids: Documents the deleted files used
+        audio_hashes: Content hashes of the deleted audio rows
+    """
+    future = asyncio.get_running_loop().run_in_executor(
+        None, _cleanup, list(document_ids), set(audio_hashes)
+    )
+    _pending.add(future)
+    future.add_done_callback(_finished)
+    return future
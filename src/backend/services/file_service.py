@@ -1,13 +1,22 @@
 from fastapi import HTTPException, UploadFile
-from processing.document_parser import parse_document
+from processing.document_parser import SEGMENT_CHARS, Segment, parse_document_segments, split_segments
 try:  # pragma: no cover - optional SQLAlchemy import for core functions
-    from sqlalchemy import select, delete
+    from sqlalchemy import select, delete, func, bindparam, text
 except Exception:  # pragma: no cover - SQLAlchemy missing or not fully available
-    select = delete = None
+    select = delete = func = bindparam = text = None
 try:
     from sqlalchemy.orm import Session
 except Exception:  # pragma: no cover - ORM components missing
     Session = None
+try:
+    from sqlalchemy.orm import joinedload, undefer
+except Exception:  # pragma: no cover - ORM components missing
+    joinedload = undefer = None
+try:
+    from sqlalchemy.exc import IntegrityError
+except Exception:  # pragma: no cover - SQLAlchemy missing
+    class IntegrityError(Exception):
+        pass
 
 # Import the storage models module in a way that works even when tests provide
 # a lightweight stub.  Attributes may be missing when SQLAlchemy is not
@@ -23,116 +32,691 @@ except Exception:  # pragma: no cover - when storage module is missing
 engine = getattr(_models, "engine", None)
 Profile = getattr(_models, "Profile", None)
 DBFile = getattr(_models, "File", None)
+Document = getattr(_models, "Document", None)
+DocumentSegment = getattr(_models, "DocumentSegment", None)
+CompressedText = getattr(_models, "CompressedText", None)
+bump_profile_version = getattr(_models, "bump_profile_version", None)
+index_segments = getattr(_models, "index_segments", None)
+contains_pattern = getattr(_models, "contains_pattern", None)
+LIKE_ESCAPE = getattr(_models, "LIKE_ESCAPE", "/")
 ASYNC_DB = getattr(_models, "ASYNC_DB", False)
 AsyncSessionLocal = getattr(_models, "AsyncSessionLocal", None)
+SEARCH_AVAILABLE = getattr(_models, "SEARCH_AVAILABLE", False)
+try:  # pragma: no cover - needs the real storage modules
+    from services.cleanup_service import schedule_cleanup
+except Exception:  # pragma: no cover - storage stubbed in tests
+    schedule_cleanup = None
+try:  # pragma: no cover - imported as part of the backend
+    from services.metrics_service import DOCUMENT_PARSE_ERRORS, DOCUMENT_PARSE_SECONDS, request_timing
+except Exception:  # pragma: no cover - imported on its own in tests
+    DOCUMENT_PARSE_ERRORS = DOCUMENT_PARSE_SECONDS = request_timing = None
 # When ``SA_AVAILABLE`` is not provided (as in tests using a lightweight stub),
 # assume SQLAlchemy-like functionality is present if an engine object exists.
 SA_AVAILABLE = getattr(_models, "SA_AVAILABLE", engine is not None)
 import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import AsyncIterator, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+# Uploads are streamed to a temporary file in chunks and never held in memory
+# as a whole; anything over the cap is rejected as soon as it is exceeded.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 2**20
+# Total size of a batch upload (each file in it is still capped at MAX_UPLOAD_BYTES)
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_MB", "2048")) * 2**20
+UPLOAD_CHUNK_SIZE = 2**20
+# Seconds an upload may wait for and spend in parsing before it is rejected.
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT_SECONDS", "120"))
+# Bounds how many documents are parsed (and held in memory) at once.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+_parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+# Parses given up on (timed out, or the client went away) that are still
+# running: a thread can't be stopped, so each holds its worker until it ends.
+_abandoned_parses = 0
+_abandoned_lock = threading.Lock()
+
+def _too_large() -> HTTPException:
+    return HTTPException(413, f"File exceeds the {MAX_UPLOAD_BYTES // 2**20} MB upload limit")
+
+async def _hash_upload(file: UploadFile) -> str:
+    """
+    Hash an upload where Starlette has already spooled it, then rewind it.
+
+    Its bytes are only copied to a file of our own when they need parsing.
+    """
+    too_large = _too_large()
+    if (getattr(file, "size", None) or 0) > MAX_UPLOAD_BYTES:
+        raise too_large
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise too_large
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+async def _spool_upload(file: UploadFile) -> Tuple[str, str]:
+    """Stream an upload to a temporary file; return its path and SHA-256."""
+    too_large = _too_large()
+    if (getattr(file, "size", None) or 0) > MAX_UPLOAD_BYTES:
+        raise too_large
+    digest = hashlib.sha256()
+    tmp = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+    try:
+        with tmp:
+            size = 0
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise too_large
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name, digest.hexdigest()
+
+def _parse_timed(path: str, file_ext: str):
+    """Parse a document, recording the parse time (or failure) in the metrics."""
+    if DOCUMENT_PARSE_SECONDS is None:
+        return parse_document_segments(path, file_ext)
+    start = time.perf_counter()
+    try:
+        result = parse_document_segments(path, file_ext)
+    except Exception:
+        DOCUMENT_PARSE_ERRORS.labels(file_ext).inc()
+        raise
+    DOCUMENT_PARSE_SECONDS.labels(file_ext).observe(time.perf_counter() - start)
+    return result
+
+def _timing(name: str):
+    """Time an upload stage into the request's ``Server-Timing`` header."""
+    return request_timing(name) if request_timing is not None else nullcontext()
+
+def _parse_finished(future: Future) -> None:
+    global _abandoned_parses
+    with _abandoned_lock:
+        _abandoned_parses -= 1
+
+def _abandon_parse(future: Future) -> None:
+    """Count a parse that is no longer awaited against the pool until it ends."""
+    global _abandoned_parses
+    if future.cancel():  # Still queued: it never runs
+        return
+    with _abandoned_lock:
+        _abandoned_parses += 1
+    future.add_done_callback(_parse_finished)
+
+async def _parse_spooled(path: str, file_ext: str):
+    """
+    Parse a spooled upload into segments on the parse pool.
+
+    While every worker is taken by abandoned parses, new ones are refused
+    with 503 rather than queued behind them until they time out as well.
+    """
+    if _abandoned_parses >= PARSE_WORKERS:
+        raise HTTPException(status_code=503, detail="Document parsing is busy with earlier uploads; try again later")
+    future = _parse_executor.submit(_parse_timed, path, file_ext)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), PARSE_TIMEOUT)
+    except asyncio.CancelledError:
+        _abandon_parse(future)
+        raise
+    except asyncio.TimeoutError:
+        _abandon_parse(future)
+        raise HTTPException(status_code=422, detail=f"Error processing file: parsing took longer than {PARSE_TIMEOUT:g}s")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+
+# The hot queries below are built once, with bound parameters, and executed
+# with fresh values: SQLAlchemy then finds their compiled SQL in its cache
+# without rebuilding and re-hashing the statement on every request.
+
+@lru_cache(maxsize=None)
+def _file_listing_statement(paged: bool, by_type: bool, searching: bool, limited: bool):
+    """Select the listed columns of a profile's files, for one combination of filters."""
+    stmt = (
+        select(DBFile.id, DBFile.filename, DBFile.file_type, DBFile.pages, DBFile.created_at)
+        .where(DBFile.profile_id == bindparam("profile_id"))
+        .order_by(DBFile.id)
+    )
+    if paged:
+        stmt = stmt.where(DBFile.id > bindparam("after"))
+    if by_type:
+        stmt = stmt.where(DBFile.file_type == bindparam("file_type"))
+    if searching:
+        stmt = stmt.where(DBFile.filename.like(bindparam("pattern"), escape=LIKE_ESCAPE))
+    if limited:
+        stmt = stmt.limit(bindparam("limit"))
+    return stmt
+
+@lru_cache(maxsize=None)
+def _segment_totals_statement():
+    """Count a document's segments and get its length in characters."""
+    return (
+        select(func.count(), func.coalesce(func.max(DocumentSegment.char_end), 0))
+        .where(DocumentSegment.document_id == bindparam("document_id"))
+    )
+
+@lru_cache(maxsize=None)
+def _segment_range_statement(kind: str):
+    """Select a document's segments in a range of ``kind`` "page", "chars" or "seq"."""
+    if kind == "page":
+        conditions = [DocumentSegment.page == bindparam("page")]
+    elif kind == "chars":
+        conditions = [DocumentSegment.char_end > bindparam("start"),
+                      DocumentSegment.char_start < bindparam("end")]
+    else:
+        conditions = [DocumentSegment.seq >= bindparam("segment"),
+                      DocumentSegment.seq < bindparam("segment") + bindparam("count")]
+    return (
+        select(DocumentSegment.seq, DocumentSegment.page, DocumentSegment.char_start,
+               DocumentSegment.char_end, DocumentSegment.content)
+        .where(DocumentSegment.document_id == bindparam("document_id"), *conditions)
+        .order_by(DocumentSegment.seq)
+    )
+
+def _stored_document_sync(session, content_hash: str, file_type: str):
+    """
+    The text, page count and segments of the stored document parsed from
+    identical bytes, or None. The segments are cut from the text at their
+    stored offsets, so their own copies of the text aren't read.
+    """
+    document = session.query(Document).filter_by(content_hash=content_hash, file_type=file_type).first()
+    if document is None:
+        return None
+    text = document.content
+    layout = sorted(session.query(DocumentSegment).filter_by(document_id=document.id).all(),
+                    key=lambda row: row.seq)
+    return text, document.pages, [Segment(text[row.char_start:row.char_end], row.page) for row in layout]
+
+async def _find_document(content_hash: str, file_type: str):
+    """Find the shared document parsed from identical bytes, if any (see ``_stored_document_sync``)."""
+    if not SA_AVAILABLE or engine is None or Document is None:
+        return None
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(_stored_document_sync, content_hash, file_type)
+
+    def _sync_op():
+        with Session(engine) as session:
+            return _stored_document_sync(session, content_hash, file_type)
+
+    return await asyncio.to_thread(_sync_op)
+
+async def _read_upload(file: UploadFile) -> Tuple[str, str, int, list]:
+    """
+    Get the text of an upload, reusing the parse of an earlier upload with
+    the same bytes instead of parsing it again.
+
+    A new document is spooled to a file of its own for the parser, which
+    reads by path: PDF pages are parsed in worker processes and text is
+    memory-mapped. Starlette's spool has no path to hand over (it is held
+    in memory, or in an unnamed temporary file once large).
+
+    Returns:
+        Tuple[str, str, int, list]: Content hash, text, page count and
+        segments. The segments are kept even when a stored document was
+        reused, so it can be stored again should it be purged before the
+        upload is.
+    """
+    file_ext = file.filename.lower().split('.')[-1]
+    with _timing("hash"):
+        content_hash = await _hash_upload(file)
+    with _timing("dedupe"):
+        stored = await _find_document(content_hash, file_ext)
+    if stored is not None:
+        return (content_hash, *stored)
+    with _timing("spool"):
+        path, _ = await _spool_upload(file)
+    try:
+        with _timing("parse"):
+            segments, pages = await _parse_spooled(path, file_ext)
+        text = "".join(segment.text for segment in segments)
+        return content_hash, text, pages, segments
+    finally:
+        # Safe even if a timed-out parse is still reading: the open file stays valid.
+        os.unlink(path)
+
+def _segment_rows(document_id: int, segments) -> list:
+    """DocumentSegment rows for parsed segments, with their character offsets."""
+    rows = []
+    offset = 0
+    for seq, segment in enumerate(segments):
+        rows.append(DocumentSegment(
+            document_id=document_id,
+            seq=seq,
+            page=segment.page,
+            char_start=offset,
+            char_end=offset + len(segment.text),
+            content=segment.text,
+        ))
+        offset += len(segment.text)
+    return rows
+
+def _file_listing_query(profile_id: int, limit: Optional[int], after: Optional[int],
+                        file_type: Optional[str], search: Optional[str]):
+    """
+    Select the listed columns of a profile's files, never their content.
 
-async def list_profile_files_service(profile_id: int):
+    Files are ordered by id, so a page continues after the last id of the
+    previous one (keyset pagination) and stays cheap however deep it is.
+
+    Returns:
+        The statement and the parameters to execute it with
+    """
+    stmt = _file_listing_statement(after is not None, bool(file_type), bool(search), limit is not None)
+    params = {"profile_id": profile_id, "after": after, "limit": limit,
+              "file_type": file_type.lower() if file_type else None,
+              "pattern": contains_pattern(search) if search else None}
+    return stmt, {key: value for key, value in params.items() if value is not None}
+
+async def list_profile_files_service(profile_id: int, limit: Optional[int] = None, after: Optional[int] = None,
+                                     file_type: Optional[str] = None, search: Optional[str] = None):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
+    stmt, params = _file_listing_query(profile_id, limit, after, file_type, search)
     if ASYNC_DB and AsyncSessionLocal:
         async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(DBFile).where(DBFile.profile_id == profile_id)
-            )
-            files = result.scalars().all()
-            return [
-                {
-                    "id": f.id,
-                    "filename": f.filename,
-                    "file_type": f.file_type,
-                    "pages": f.pages,
-                    "created_at": f.created_at,
-                }
-                for f in files
-            ]
+            result = await session.execute(stmt, params)
+            return [dict(row._mapping) for row in result.all()]
     else:
         def _sync_op():
             with Session(engine) as session:
-                files = session.query(DBFile).filter_by(profile_id=profile_id).all()
-                return [
-                    {
-                        "id": f.id,
-                        "filename": f.filename,
-                        "file_type": f.file_type,
-                        "pages": f.pages,
-                        "created_at": f.created_at,
-                    }
-                    for f in files
-                ]
+                return [dict(row._mapping) for row in session.execute(stmt, params).all()]
 
         return await asyncio.to_thread(_sync_op)
 
+def _document_id_sync(session, content_hash: str, file_type: str, text: str, pages: int, segments) -> int:
+    """
+    Id of the shared document for these bytes, storing it (and its segments)
+    if there is none.
+
+    Call it after the transaction has written something: on SQLite it then
+    holds the write lock, so a concurrent purge can't delete the document
+    before the files referencing it are committed.
+    """
+    document = session.query(Document).filter_by(content_hash=content_hash, file_type=file_type).first()
+    if document is not None:
+        return document.id
+    document = Document(content_hash=content_hash, file_type=file_type, content=text, pages=pages)
+    try:
+        with session.begin_nested():
+            session.add(document)
+            session.flush()
+    except IntegrityError:
+        # A concurrent upload of the same bytes stored it first
+        return session.query(Document).filter_by(content_hash=content_hash, file_type=file_type).one().id
+    session.add_all(_segment_rows(document.id, segments))
+    if index_segments is not None:
+        index_segments(session, document.id, [segment.text for segment in segments])
+    return document.id
+
+def _store_upload_sync(session, profile_id: int, filename: str, file_type: str, content_hash: str,
+                       text: str, pages: int, segments) -> dict:
+    """Store an uploaded file and, if need be, its shared document, in one transaction."""
+    # The first write, so the document lookup below runs under the write lock
+    session.execute(bump_profile_version(profile_id))
+    document_id = _document_id_sync(session, content_hash, file_type, text, pages, segments)
+    db_file = DBFile(
+        profile_id=profile_id,
+        document_id=document_id,
+        filename=filename,
+        file_type=file_type,
+        pages=pages,
+    )
+    session.add(db_file)
+    session.commit()
+    return {
+        "id": db_file.id,
+        "filename": db_file.filename,
+        "file_type": db_file.file_type,
+        "content": text,
+        "pages": db_file.pages,
+        "created_at": db_file.created_at,
+    }
+
 async def upload_profile_file_service(profile_id: int, file: UploadFile):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
     if ASYNC_DB and AsyncSessionLocal:
         async with AsyncSessionLocal() as session:
             profile = await session.get(Profile, profile_id)
-            if not profile:
-                raise HTTPException(404, "Profile not found")
+        if not profile:
+            raise HTTPException(404, "Profile not found")
 
-            content = await file.read()
-            file_ext = file.filename.lower().split('.')[-1]
+        # Parse outside of any session so no transaction is held open meanwhile.
+        content_hash, text, pages, segments = await _read_upload(file)
+        file_ext = file.filename.lower().split('.')[-1]
 
-            try:
-                text, pages = parse_document(content, file_ext)
-                db_file = DBFile(
-                    profile_id=profile_id,
-                    filename=file.filename,
-                    file_type=file_ext,
-                    content=text,
-                    pages=pages,
+        with _timing("store"):
+            async with AsyncSessionLocal() as session:
+                return await session.run_sync(
+                    _store_upload_sync, profile_id, file.filename, file_ext, content_hash, text, pages, segments
                 )
-                session.add(db_file)
-                await session.commit()
-                await session.refresh(db_file)
-                return {
-                    "id": db_file.id,
-                    "filename": db_file.filename,
-                    "file_type": db_file.file_type,
-                    "content": text,
-                    "pages": db_file.pages,
-                    "created_at": db_file.created_at,
-                }
-            except Exception as e:
-                await session.rollback()
-                raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
     else:
-        content = await file.read()
+        def _profile_exists():
+            with Session(engine) as session:
+                return session.query(Profile).filter_by(id=profile_id).first() is not None
+
+        if not await asyncio.to_thread(_profile_exists):
+            raise HTTPException(404, "Profile not found")
+
+        content_hash, text, pages, segments = await _read_upload(file)
         file_ext = file.filename.lower().split('.')[-1]
 
         def _sync_db():
             with Session(engine) as session:
-                profile = session.query(Profile).filter_by(id=profile_id).first()
-                if not profile:
-                    raise HTTPException(404, "Profile not found")
+                return _store_upload_sync(
+                    session, profile_id, file.filename, file_ext, content_hash, text, pages, segments
+                )
+
+        with _timing("store"):
+            return await asyncio.to_thread(_sync_db)
+
+# Document types accepted by the batch upload, directly or inside zip archives
+DOCUMENT_TYPES = ("pdf", "docx", "odt", "txt", "md")
+# Most documents in one batch (counting those inside archives)
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "1000"))
+
+class BatchItem(NamedTuple):
+    """An upload of a batch, spooled to a temporary file."""
+    filename: str
+    file_type: str
+    path: str
+    content_hash: str
+
+def _file_type(filename: str) -> str:
+    return filename.lower().split('.')[-1]
+
+def _add_batch_item(items: List[BatchItem], item: BatchItem):
+    items.append(item)
+    if len(items) > MAX_BATCH_FILES:
+        raise HTTPException(413, f"A batch may contain at most {MAX_BATCH_FILES} documents")
+
+def _spool_archive(archive_file: BinaryIO, filename: str, items: List[BatchItem]) -> List[dict]:
+    """
+    Extract the documents in a zip archive to temporary files, adding them
+    to ``items``.
+
+    Returns:
+        List[dict]: Status events for archive entries that were not extracted
+    """
+    events = []
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        return [{"filename": filename, "status": "error", "detail": "Not a valid zip archive"}]
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            file_type = _file_type(name)
+            if file_type not in DOCUMENT_TYPES:
+                events.append({"filename": name, "status": "skipped", "detail": f"Unsupported file type: {file_type}"})
+                continue
+            # The sizes in the archive can't be trusted; count while extracting.
+            too_large = _too_large()
+            if info.file_size > MAX_UPLOAD_BYTES:
+                events.append({"filename": name, "status": "error", "detail": too_large.detail})
+                continue
+            digest = hashlib.sha256()
+            tmp = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            try:
+                with tmp, archive.open(info) as entry:
+                    size = 0
+                    while chunk := entry.read(UPLOAD_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > MAX_UPLOAD_BYTES:
+                            raise too_large
+                        digest.update(chunk)
+                        tmp.write(chunk)
+            except (HTTPException, zipfile.BadZipFile, OSError) as e:
+                os.unlink(tmp.name)
+                events.append({"filename": name, "status": "error", "detail": getattr(e, "detail", str(e))})
+                continue
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+            _add_batch_item(items, BatchItem(name, file_type, tmp.name, digest.hexdigest()))
+    return events
+
+async def _stored_documents(keys) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Ids and page counts of the stored documents with these (content hash, file type) keys."""
+    if not keys:
+        return {}
+    stmt = select(Document.id, Document.content_hash, Document.file_type, Document.pages).where(
+        Document.content_hash.in_({content_hash for content_hash, _ in keys})
+    )
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(stmt)).all()
+    else:
+        def _sync_op():
+            with Session(engine) as session:
+                return session.execute(stmt).all()
+
+        rows = await asyncio.to_thread(_sync_op)
+    return {(row.content_hash, row.file_type): (row.id, row.pages) for row in rows
+            if (row.content_hash, row.file_type) in keys}
+
+def _store_batch_sync(session, profile_id: int, rows, parsed) -> Tuple[List[dict], set]:
+    """
+    Store the files of a batch, and the documents parsed for it, in one
+    transaction.
+
+    Args:
+        rows: (item, pages) of every file to store
+        parsed: (text, pages, segments) of the documents parsed for the
+            batch, by (content hash, file type)
+
+    Returns:
+        Tuple[List[dict], set]: The stored files, and the keys of documents
+        that were stored before the batch was parsed but have been purged
+        since. If there are any, nothing is stored.
+    """
+    # The first write, so the documents are looked up under the write lock
+    session.execute(bump_profile_version(profile_id))
+    document_ids = {}
+    missing = set()
+    for item, _ in rows:
+        key = (item.content_hash, item.file_type)
+        if key in document_ids or key in missing:
+            continue
+        if key in parsed:
+            document_ids[key] = _document_id_sync(session, *key, *parsed[key])
+            continue
+        document = session.query(Document).filter_by(content_hash=key[0], file_type=key[1]).first()
+        if document is None:
+            missing.add(key)
+        else:
+            document_ids[key] = document.id
+    if missing:
+        session.rollback()
+        return [], missing
+    files = [
+        DBFile(profile_id=profile_id, document_id=document_ids[(item.content_hash, item.file_type)],
+               filename=item.filename, file_type=item.file_type, pages=pages)
+        for item, pages in rows
+    ]
+    session.add_all(files)
+    session.flush()
+    file_ids = [f.id for f in files]
+    session.commit()
+    # Reload the committed rows in one query, so created_at reads as stored,
+    # the way the single upload and the listing return it
+    session.query(DBFile).filter(DBFile.id.in_(file_ids)).all()
+    result = [
+        {"id": f.id, "filename": f.filename, "file_type": f.file_type, "pages": f.pages, "created_at": f.created_at}
+        for f in files
+    ]
+    return result, missing
+
+async def _store_batch(profile_id: int, rows, parsed) -> Tuple[List[dict], set]:
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(_store_batch_sync, profile_id, rows, parsed)
+
+    def _sync_op():
+        with Session(engine) as session:
+            return _store_batch_sync(session, profile_id, rows, parsed)
+
+    return await asyncio.to_thread(_sync_op)
+
+async def _batch_events(profile_id: int, items: List[BatchItem], events: List[dict]) -> AsyncIterator[dict]:
+    """
+    Parse the documents of a batch and store them, yielding a status event
+    per file as it finishes and a final event once the files are committed.
+
+    Identical files are parsed once and documents already stored aren't
+    parsed at all; the rest are parsed concurrently on the parse pool. The
+    parsed documents and all the files are stored in one transaction at the
+    end, which also checks that the documents found before parsing are still
+    there: either all of the files appear or none do, and none of them can
+    reference a document purged in the meantime (such documents are parsed
+    from the spooled files and the transaction is retried).
+    """
+    groups: Dict[Tuple[str, str], List[BatchItem]] = {}
+    for item in items:
+        groups.setdefault((item.content_hash, item.file_type), []).append(item)
+    parsed = {}
+    failed = set()
+    tasks = []
+    semaphore = asyncio.Semaphore(PARSE_WORKERS)
+
+    async def parse(key, group):
+        # Submit only as many parses as there are workers, so the timeout
+        # covers parsing and not waiting behind the rest of the batch.
+        async with semaphore:
+            try:
+                return key, group, await _parse_spooled(group[0].path, key[1]), None
+            except HTTPException as e:
+                return key, group, None, e
+
+    try:
+        for event in events:
+            yield event
+        stored = await _stored_documents(set(groups))
+        for key, group in groups.items():
+            if key in stored:
+                for item in group:
+                    yield {"filename": item.filename, "status": "stored", "pages": stored[key][1]}
+            else:
+                tasks.append(asyncio.ensure_future(parse(key, group)))
+        while True:
+            for next_parsed in asyncio.as_completed(tasks):
+                key, group, result, error = await next_parsed
+                if error is not None:
+                    failed.add(key)
+                    for item in group:
+                        yield {"filename": item.filename, "status": "error", "detail": error.detail}
+                    continue
+                segments, pages = result
+                parsed[key] = ("".join(segment.text for segment in segments), pages, segments)
+                for item in group:
+                    yield {"filename": item.filename, "status": "parsed", "pages": pages}
+            rows = [(item, parsed[key][1] if key in parsed else stored[key][1])
+                    for key, group in groups.items() if key not in failed for item in group]
+            try:
+                files, missing = await _store_batch(profile_id, rows, parsed) if rows else ([], set())
+            except Exception as e:
+                yield {"status": "failed", "detail": f"Error storing files: {str(e)}"}
+                return
+            if not missing:
+                break
+            tasks = [asyncio.ensure_future(parse(key, groups[key])) for key in missing]
+        yield {"status": "committed", "files": files}
+    finally:
+        for task in tasks:
+            task.cancel()
+        for item in items:
+            # Safe even if a timed-out parse is still reading: the open file stays valid.
+            os.unlink(item.path)
+
+async def upload_profile_files_batch_service(profile_id: int, files: List[UploadFile]) -> AsyncIterator[dict]:
+    """
+    Upload many documents to a profile at once, directly or in zip archives.
+
+    The uploads are spooled to temporary files before this returns, so
+    missing profiles and oversized batches are rejected up front.
+
+    Returns:
+        AsyncIterator[dict]: Status events: one per file ("stored" when an
+        identical document was stored already, "parsed", "skipped" or
+        "error"), then {"status": "committed", "files": [...]} or, if
+        the files couldn't be stored, {"status": "failed", "detail": ...}
+    """
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+
+    def _profile_exists():
+        with Session(engine) as session:
+            return session.query(Profile).filter_by(id=profile_id).first() is not None
+
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            exists = await session.get(Profile, profile_id) is not None
+    else:
+        exists = await asyncio.to_thread(_profile_exists)
+    if not exists:
+        raise HTTPException(404, "Profile not found")
+
+    items: List[BatchItem] = []
+    events = []
+    try:
+        for file in files:
+            file_type = _file_type(file.filename)
+            if file_type == "zip":
+                events += await asyncio.to_thread(_spool_archive, file.file, file.filename, items)
+            elif file_type not in DOCUMENT_TYPES:
+                events.append({"filename": file.filename, "status": "skipped",
+                               "detail": f"Unsupported file type: {file_type}"})
+            else:
                 try:
-                    text, pages = parse_document(content, file_ext)
-                    db_file = DBFile(
-                        profile_id=profile_id,
-                        filename=file.filename,
-                        file_type=file_ext,
-                        content=text,
-                        pages=pages,
-                    )
-                    session.add(db_file)
-                    session.commit()
-                    return {
-                        "id": db_file.id,
-                        "filename": db_file.filename,
-                        "file_type": db_file.file_type,
-                        "content": text,
-                        "pages": db_file.pages,
-                        "created_at": db_file.created_at,
-                    }
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
-
-        return await asyncio.to_thread(_sync_db)
+                    path, content_hash = await _spool_upload(file)
+                except HTTPException as e:
+                    events.append({"filename": file.filename, "status": "error", "detail": e.detail})
+                    continue
+                _add_batch_item(items, BatchItem(file.filename, file_type, path, content_hash))
+    except BaseException:
+        for item in items:
+            os.unlink(item.path)
+        raise
+    return _batch_events(profile_id, items, events)
+
+async def profile_file_version_service(profile_id: int, file_id: int) -> Optional[tuple]:
+    """
+    Version of a file: files are never modified, so its creation time and
+    its document's content hash identify its text. None when the profile or
+    file doesn't exist.
+    """
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+    stmt = (
+        select(DBFile.created_at, Document.content_hash)
+        .outerjoin(Document, Document.id == DBFile.document_id)
+        .where(DBFile.id == file_id, DBFile.profile_id == profile_id)
+    )
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(stmt)).first()
+    else:
+        def _sync_op():
+            with Session(engine) as session:
+                return session.execute(stmt).first()
+
+        row = await asyncio.to_thread(_sync_op)
+    return tuple(row) if row is not None else None
 
 async def get_profile_file_service(profile_id: int, file_id: int):
     if not SA_AVAILABLE or engine is None:
@@ -143,9 +727,9 @@ async def get_profile_file_service(profile_id: int, file_id: int):
             if not profile:
                 raise HTTPException(404, "Profile not found")
             result = await session.execute(
-                select(DBFile).where(
-                    DBFile.id == file_id, DBFile.profile_id == profile_id
-                )
+                select(DBFile)
+                .options(joinedload(DBFile.document).undefer(Document.content), undefer(DBFile.content))
+                .where(DBFile.id == file_id, DBFile.profile_id == profile_id)
             )
             file_obj = result.scalars().first()
             if not file_obj:
@@ -154,7 +738,7 @@ async def get_profile_file_service(profile_id: int, file_id: int):
                 "id": file_obj.id,
                 "filename": file_obj.filename,
                 "file_type": file_obj.file_type,
-                "content": file_obj.content,
+                "content": file_obj.text,
                 "pages": file_obj.pages,
                 "created_at": file_obj.created_at,
             }
@@ -171,30 +755,131 @@ async def get_profile_file_service(profile_id: int, file_id: int):
                     "id": file_obj.id,
                     "filename": file_obj.filename,
                     "file_type": file_obj.file_type,
-                    "content": file_obj.content,
+                    "content": file_obj.text,
                     "pages": file_obj.pages,
                     "created_at": file_obj.created_at,
                 }
 
         return await asyncio.to_thread(_sync_op)
 
-async def delete_profile_file_service(profile_id: int, file_id: int):
+# Largest range returned by one content request
+MAX_RANGE_SEGMENTS = 50
+
+class ContentRange(NamedTuple):
+    """A requested part of a document: a page, a run of segments or a character window."""
+    page: Optional[int] = None
+    segment: Optional[int] = None
+    count: int = 1
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+def _content_range(page, segment, count, start, end) -> ContentRange:
+    """Validate range parameters; with none given, the first segment is returned."""
+    if sum(x is not None for x in (page, segment, start)) > 1:
+        raise HTTPException(400, "Request a page, a segment or a character range, not several")
+    if page is not None and page < 1:
+        raise HTTPException(400, "Pages start at 1")
+    if not 1 <= count <= MAX_RANGE_SEGMENTS:
+        raise HTTPException(400, f"count must be between 1 and {MAX_RANGE_SEGMENTS}")
+    if start is not None:
+        end = start + MAX_RANGE_SEGMENTS * SEGMENT_CHARS if end is None else end
+        if start < 0 or end <= start or end - start > MAX_RANGE_SEGMENTS * SEGMENT_CHARS:
+            raise HTTPException(400, f"Character ranges must be non-empty and at most {MAX_RANGE_SEGMENTS * SEGMENT_CHARS} long")
+    elif end is not None:
+        raise HTTPException(400, "end requires start")
+    if page is None and start is None and segment is None:
+        segment = 0
+    return ContentRange(page, segment, count, start, end)
+
+def _segment_query(content_range: ContentRange, document_id: int):
+    """Statement and parameters selecting the segments of a range."""
+    if content_range.page is not None:
+        return _segment_range_statement("page"), {"document_id": document_id, "page": content_range.page}
+    if content_range.start is not None:
+        return _segment_range_statement("chars"), {
+            "document_id": document_id, "start": content_range.start, "end": content_range.end,
+        }
+    return _segment_range_statement("seq"), {
+        "document_id": document_id, "segment": content_range.segment, "count": content_range.count,
+    }
+
+def _text_segments(text: str) -> List[tuple]:
+    """Segments of text stored whole, as (seq, page, char_start, char_end, content)."""
+    segments = []
+    offset = 0
+    for seq, segment in enumerate(split_segments(text)):
+        segments.append((seq, segment.page, offset, offset + len(segment.text), segment.text))
+        offset += len(segment.text)
+    return segments
+
+def _in_range(segment: tuple, content_range: ContentRange) -> bool:
+    seq, page, char_start, char_end, _ = segment
+    if content_range.page is not None:
+        return page == content_range.page
+    if content_range.start is not None:
+        return char_end > content_range.start and char_start < content_range.end
+    return content_range.segment <= seq < content_range.segment + content_range.count
+
+def _range_response(file_obj, segments: List[tuple], total_segments: int, total_chars: int,
+                    content_range: ContentRange) -> dict:
+    content = "".join(segment[4] for segment in segments)
+    char_start = segments[0][2] if segments else 0
+    char_end = segments[-1][3] if segments else 0
+    if content_range.start is not None and segments:
+        # Trim the first and last segment to the requested window
+        window_start = max(content_range.start, char_start)
+        window_end = min(content_range.end, char_end)
+        content = content[window_start - char_start:window_end - char_start]
+        char_start, char_end = window_start, window_end
+    return {
+        "id": file_obj.id,
+        "filename": file_obj.filename,
+        "pages": file_obj.pages,
+        "total_segments": total_segments,
+        "total_chars": total_chars,
+        "char_start": char_start,
+        "char_end": char_end,
+        "content": content,
+        "segments": [
+            {"seq": seq, "page": page, "char_start": start, "char_end": end}
+            for seq, page, start, end, _ in segments
+        ],
+    }
+
+async def get_profile_file_content_service(profile_id: int, file_id: int, page: Optional[int] = None,
+                                           segment: Optional[int] = None, count: int = 1,
+                                           start: Optional[int] = None, end: Optional[int] = None):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
+    content_range = _content_range(page, segment, count, start, end)
     if ASYNC_DB and AsyncSessionLocal:
         async with AsyncSessionLocal() as session:
             profile = await session.get(Profile, profile_id)
             if not profile:
                 raise HTTPException(404, "Profile not found")
-            result = await session.execute(
-                select(DBFile).where(DBFile.id == file_id, DBFile.profile_id == profile_id)
-            )
-            file_obj = result.scalars().first()
-            if not file_obj:
+            file_obj = await session.get(DBFile, file_id, options=[undefer(DBFile.content)])
+            if not file_obj or file_obj.profile_id != profile_id:
                 raise HTTPException(404, "File not found")
-            await session.delete(file_obj)
-            await session.commit()
-            return {"message": "File deleted successfully"}
+            total_segments = total_chars = 0
+            if file_obj.document_id is not None:
+                result = await session.execute(
+                    _segment_totals_statement(), {"document_id": file_obj.document_id}
+                )
+                total_segments, total_chars = result.one()
+            if total_segments:
+                result = await session.execute(*_segment_query(content_range, file_obj.document_id))
+                segments = [tuple(row) for row in result.all()]
+            else:
+                # Stored before documents were segmented: split the full text
+                if file_obj.document_id is None:
+                    text = file_obj.content
+                else:
+                    document = await session.get(Document, file_obj.document_id, options=[undefer(Document.content)])
+                    text = document.content
+                all_segments = _text_segments(text)
+                total_segments, total_chars = len(all_segments), len(text)
+                segments = [s for s in all_segments if _in_range(s, content_range)]
+            return _range_response(file_obj, segments, total_segments, total_chars, content_range)
     else:
         def _sync_op():
             with Session(engine) as session:
@@ -204,12 +889,157 @@ async def delete_profile_file_service(profile_id: int, file_id: int):
                 file_obj = session.query(DBFile).filter_by(id=file_id, profile_id=profile_id).first()
                 if not file_obj:
                     raise HTTPException(404, "File not found")
-                session.delete(file_obj)
-                session.commit()
-                return {"message": "File deleted successfully"}
+                total_segments = total_chars = 0
+                if file_obj.document_id is not None:
+                    total_segments, total_chars = session.execute(
+                        _segment_totals_statement(), {"document_id": file_obj.document_id}
+                    ).one()
+                if total_segments:
+                    rows = session.execute(*_segment_query(content_range, file_obj.document_id)).all()
+                    segments = [tuple(row) for row in rows]
+                else:
+                    # Stored before documents were segmented: split the full text
+                    all_segments = _text_segments(file_obj.text)
+                    total_segments, total_chars = len(all_segments), len(file_obj.text)
+                    segments = [s for s in all_segments if _in_range(s, content_range)]
+                return _range_response(file_obj, segments, total_segments, total_chars, content_range)
+
+        return await asyncio.to_thread(_sync_op)
+
+# Best-ranked segments matched by one search, and most files returned
+MAX_SEARCH_HITS = 200
+MAX_SEARCH_FILES = 100
+# Characters of text returned around each hit
+SNIPPET_CHARS = 160
+
+def _fts_query(query: str) -> Tuple[str, List[str]]:
+    """FTS5 query matching segments that contain every word of ``query``, and the words."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise HTTPException(400, "Search for at least one word")
+    return " ".join(f'"{word}"' for word in words), words
+
+@lru_cache(maxsize=None)
+def _search_statement():
+    """Select the best-ranked segments matching ``query`` in a profile's files."""
+    return text(
+        "SELECT files.id AS file_id, files.filename AS filename, document_segments.seq AS seq, "
+        "document_segments.page AS page, document_segments.char_start AS char_start, "
+        "document_segments.content AS content "
+        "FROM document_fts "
+        "JOIN document_segments ON document_segments.rowid = document_fts.rowid "
+        "JOIN files ON files.document_id = document_segments.document_id "
+        "WHERE document_fts MATCH :query AND files.profile_id = :profile_id "
+        "ORDER BY bm25(document_fts) LIMIT :limit"
+    ).columns(content=CompressedText)
+
+def _search_results(rows, words: List[str], limit: int) -> List[dict]:
+    """
+    Group matching segments by file, best match first, locating the first
+    search word in each segment.
+
+    Returns:
+        List[dict]: Files with their hits: the segment (to start reading or
+        playback at), its page, the document offset of the word and a snippet
+    """
+    pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\b", re.IGNORECASE)
+    files = {}
+    for row in rows:
+        result = files.get(row.file_id)
+        if result is None:
+            if len(files) == limit:
+                continue
+            result = files[row.file_id] = {"id": row.file_id, "filename": row.filename, "hits": []}
+        match = pattern.search(row.content)
+        offset = match.start() if match else 0
+        snippet_start = max(0, offset - SNIPPET_CHARS // 4)
+        result["hits"].append({
+            "segment": row.seq,
+            "page": row.page,
+            "char_offset": row.char_start + offset,
+            "snippet": row.content[snippet_start:snippet_start + SNIPPET_CHARS].strip(),
+        })
+    for result in files.values():
+        result["hits"].sort(key=lambda hit: hit["segment"])
+    return list(files.values())
+
+async def search_profile_files_service(profile_id: int, query: str, limit: int = 20):
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+    if not SEARCH_AVAILABLE:
+        raise HTTPException(501, "Full-text search requires a SQLite database")
+    if not 1 <= limit <= MAX_SEARCH_FILES:
+        raise HTTPException(400, f"limit must be between 1 and {MAX_SEARCH_FILES}")
+    fts_query, words = _fts_query(query)
+    params = {"query": fts_query, "profile_id": profile_id, "limit": MAX_SEARCH_HITS}
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            profile = await session.get(Profile, profile_id)
+            if not profile:
+                raise HTTPException(404, "Profile not found")
+            result = await session.execute(_search_statement(), params)
+            return _search_results(result.all(), words, limit)
+    else:
+        def _sync_op():
+            with Session(engine) as session:
+                profile = session.query(Profile).filter_by(id=profile_id).first()
+                if not profile:
+                    raise HTTPException(404, "Profile not found")
+                return _search_results(session.execute(_search_statement(), params).all(), words, limit)
 
         return await asyncio.to_thread(_sync_op)
 
+def _schedule_cleanup(document_ids) -> None:
+    """Drop the shared documents only the deleted files used, in the background."""
+    # Files uploaded before documents were shared have no document
+    document_ids = [document_id for document_id in document_ids if document_id is not None]
+    if schedule_cleanup is not None and document_ids:
+        schedule_cleanup(document_ids)
+
+def _delete_file_statement(profile_id: int, file_id: int):
+    """
+    Delete one file of a profile, returning its id (so a delete that matched
+    nothing can be told apart from one of a file without a document) and its
+    document id.
+    """
+    return (
+        delete(DBFile)
+        .where(DBFile.id == file_id, DBFile.profile_id == profile_id)
+        .returning(DBFile.id, DBFile.document_id)
+    )
+
+async def delete_profile_file_service(profile_id: int, file_id: int):
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            profile = await session.get(Profile, profile_id)
+            if not profile:
+                raise HTTPException(404, "Profile not found")
+            result = await session.execute(_delete_file_statement(profile_id, file_id))
+            deleted = result.first()
+            if deleted is None:
+                raise HTTPException(404, "File not found")
+            await session.execute(bump_profile_version(profile_id))
+            await session.commit()
+            document_id = deleted.document_id
+    else:
+        def _sync_op():
+            with Session(engine) as session:
+                profile = session.query(Profile).filter_by(id=profile_id).first()
+                if not profile:
+                    raise HTTPException(404, "Profile not found")
+                deleted = session.execute(_delete_file_statement(profile_id, file_id)).first()
+                if deleted is None:
+                    raise HTTPException(404, "File not found")
+                session.execute(bump_profile_version(profile_id))
+                session.commit()
+                return deleted.document_id
+
+        document_id = await asyncio.to_thread(_sync_op)
+    _schedule_cleanup([document_id])
+    return {"message": "File deleted successfully"}
+
 async def delete_all_profile_files_service(profile_id: int):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
@@ -218,29 +1048,28 @@ async def delete_all_profile_files_service(profile_id: int):
             profile = await session.get(Profile, profile_id)
             if not profile:
                 raise HTTPException(404, "Profile not found")
-            await session.execute(
-                delete(DBFile).where(DBFile.profile_id == profile_id)
-            )
+            document_ids = set(await session.scalars(
+                delete(DBFile).where(DBFile.profile_id == profile_id).returning(DBFile.document_id)
+            ))
+            await session.execute(bump_profile_version(profile_id))
             await session.commit()
-            return {"message": "All files deleted successfully"}
     else:
         def _sync_op():
             with Session(engine) as session:
                 profile = session.query(Profile).filter_by(id=profile_id).first()
                 if not profile:
                     raise HTTPException(404, "Profile not found")
-                session.query(DBFile).filter_by(profile_id=profile_id).delete()
+                document_ids = set(session.scalars(
+                    delete(DBFile).where(DBFile.profile_id == profile_id).returning(DBFile.document_id)
+                ))
+                session.execute(bump_profile_version(profile_id))
                 session.commit()
-                return {"message": "All files deleted successfully"}
+                return document_ids
 
-        return await asyncio.to_thread(_sync_op)
+        document_ids = await asyncio.to_thread(_sync_op)
+    _schedule_cleanup(document_ids)
+    return {"message": "All files deleted successfully"}
 
 async def upload_file_service(file: UploadFile):
-    content = await file.read()
-    file_ext = file.filename.lower().split('.')[-1]
-    
-    try:
-        text, pages = parse_document(content, file_ext)
-        return {"text": text, "pages": pages}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}") 
\ No newline at end of file
+    _, text, pages, _ = await _read_upload(file)
+    return {"text": text, "pages": pages}
@@ -0,0 +1,172 @@
+"""Memory accounting for the process, the model and synthesis requests.
+
+Process memory is read from ``/proc/self/status`` (resident set size and its
+high-water mark), falling back to ``getrusage`` for the peak elsewhere. The
+CUDA allocator numbers in the model status say nothing on CPU-only nodes,
+where the model lives in ordinary process memory.
+
+The peak of a request is the process high-water mark while it ran: on Linux
+the mark is reset to the current RSS when a request starts with no other in
+flight, so the peak belongs to that request alone. Overlapping requests share
+the peak, and are flagged as such.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Recent synthesis requests kept for ``recent_requests``
+REQUEST_HISTORY_SIZE = int(os.getenv("MEMORY_REQUEST_HISTORY", "100"))
+
+_PROC_STATUS = "/proc/self/status"
+_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _read_proc_status() -> Dict[str, int]:
+    """The memory fields of ``/proc/self/status`` in bytes, or {} where it doesn't exist."""
+    fields = {}
+    try:
+        with open(_PROC_STATUS) as status:
+            for line in status:
+                if line.startswith("Vm"):
+                    name, _, value = line.partition(":")
+                    amount, _, unit = value.strip().partition(" ")
+                    if unit == "kB":
+                        fields[name] = int(amount) * 1024
+    except OSError:
+        pass
+    return fields
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """
+    Memory of this process.
+
+    Returns:
+        Dict[str, Optional[int]]: ``rss_bytes`` (None where it can't be read)
+        and ``peak_rss_bytes``, the high-water mark since start or the last
+        reset by a request
+    """
+    fields = _read_proc_status()
+    rss = fields.get("VmRSS")
+    peak = fields.get("VmHWM")
+    if peak is None and resource is not None:
+        # Kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == "darwin" else 1024
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def current_rss() -> Optional[int]:
+    return _read_proc_status().get("VmRSS")
+
+
+def _reset_peak() -> bool:
+    """Reset the RSS high-water mark to the current RSS (Linux 4.0+)."""
+    try:
+        with open(_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def tensor_bytes(tensors: Iterable[Any]) -> int:
+    """Bytes held by ``tensors`` (anything with ``numel`` and ``element_size``)."""
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def trim_heap() -> bool:
+    """
+    Return freed heap memory to the OS (glibc ``malloc_trim``).
+
+    Memory freed by Python and torch often stays mapped in the allocator's
+    arenas; RSS that a trim gives back was fragmentation, not a leak.
+
+    Returns:
+        bool: Whether a trim was possible on this platform
+    """
+    libc_name = ctypes.util.find_library("c") if sys.platform.startswith("linux") else None
+    if not libc_name:
+        return False
+    try:
+        ctypes.CDLL(libc_name).malloc_trim(0)
+    except (OSError, AttributeError):  # pragma: no cover - musl and other libcs
+        return False
+    return True
+
+
+class _RequestMemory:
+    """Per-request peak memory, for the requests in flight and the recent ones."""
+
+    def __init__(self, history_size: int):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Incremented on every start, so a request can tell whether it overlapped another
+        self._started = 0
+        self.history = deque(maxlen=history_size)
+
+    def start(self) -> dict:
+        with self._lock:
+            self._in_flight += 1
+            self._started += 1
+            alone = self._in_flight == 1
+            reset = alone and _reset_peak()
+            return {
+                "started_at": time.time(),
+                "rss_start_bytes": current_rss(),
+                "peak_is_own": reset,
+                "_started": self._started,
+            }
+
+    def finish(self, record: dict, mode: str) -> None:
+        memory = process_memory()
+        with self._lock:
+            self._in_flight -= 1
+            overlapped = self._started != record.pop("_started") or self._in_flight > 0
+            record.update(
+                mode=mode,
+                seconds=time.time() - record["started_at"],
+                rss_end_bytes=memory["rss_bytes"],
+                peak_rss_bytes=memory["peak_rss_bytes"],
+                overlapped=overlapped,
+            )
+            record["peak_is_own"] = record["peak_is_own"] and not overlapped
+            if record["peak_rss_bytes"] is not None and record["rss_start_bytes"] is not None:
+                record["peak_increase_bytes"] = record["peak_rss_bytes"] - record["rss_start_bytes"]
+            self.history.append(record)
+
+
+_requests = _RequestMemory(REQUEST_HISTORY_SIZE)
+
+
+class track_request:
+    """Record the peak memory of the synthesis request run in the block."""
+
+    __slots__ = ("mode", "record")
+
+    def __init__(self, mode: str):
+        self.mode = mode
+
+    def __enter__(self):
+        self.record = _requests.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        _requests.finish(self.record, self.mode)
+
+
+def recent_requests() -> list:
+    """Peak memory of the most recent synthesis requests, oldest first."""
+    with _requests._lock:
+        return list(_requests.history)
@@ -0,0 +1,327 @@
+"""Process metrics in the Prometheus text exposition format.
+
+A small, dependency-free take on counters, gauges and histograms. Updating a
+metric takes a lock and a few arithmetic operations (about a microsecond), so
+they can be updated on every chunk of the synthesis path. ``render_metrics``
+writes them all out for the ``/metrics`` endpoint.
+
+Stage timings are also collected per request (see ``collect_timings``) for the
+``Server-Timing`` header, so a slow response shows where its time went.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from a G2P call to a model load
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """A named metric with optional labels; each label combination is a child."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()  # Exported (as zero) before its first update
+        _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The child for these label values, in ``labelnames`` order (keep it for hot paths)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            values = tuple(str(value) for value in values)
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """A value that only goes up (use ``rate()`` on it)."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{self._label_text(values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    @contextmanager
+    def track(self, *values: str):
+        """Count the code in the block while it runs (e.g. requests in flight)."""
+        child = self.labels(*values)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Observe how long the block takes, in seconds."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _StageTimer(_Timer):
+    """A timer that also adds its duration to the current request's timings."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, child: _HistogramChild, name: str):
+        super().__init__(child)
+        self.name = name
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.child.observe(seconds)
+        record_timing(self.name, seconds)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{self._label_text(values, le)} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(values)} {_format_value(total)}"
+            yield f"{self.name}_count{self._label_text(values)} {cumulative}"
+
+
+class RequestTimings:
+    """Durations of the stages of one request, summed per stage in the order they first ran."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._lock = threading.Lock()  # Stages may run in worker threads
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def __bool__(self) -> bool:
+        return bool(self.durations)
+
+    def header(self, total: Optional[float] = None) -> str:
+        """The ``Server-Timing`` header value, durations in milliseconds."""
+        with self._lock:
+            durations = list(self.durations.items())
+        if total is not None:
+            durations.append(("total", total))
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations)
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """
+    Collect the stage timings recorded while the block runs, including in
+    threads started from it with a copy of its context (``asyncio.to_thread``).
+
+    Yields:
+        RequestTimings: The timings collected so far
+    """
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add ``seconds`` to stage ``name`` of the current request, if its timings are collected."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+class request_timing:
+    """Time the block into the current request's timings only (no histogram)."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_timing(self.name, time.perf_counter() - self.start)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# Synthesis
+TTS_REQUESTS = Counter(
+    "torchts_tts_requests_total", "Synthesis requests by mode and audio cache result",
+    ("mode", "cache"),
+)
+TTS_IN_FLIGHT = Gauge("torchts_tts_requests_in_flight", "Synthesis requests being handled")
+TTS_STAGE_SECONDS = Histogram(
+    "torchts_tts_stage_seconds",
+    "Time spent per synthesis stage (chunking, cache_lookup, g2p, inference, normalization, encoding)",
+    ("stage",),
+)
+TTS_AUDIO_SECONDS = Counter("torchts_tts_audio_seconds_total", "Seconds of audio synthesized")
+TTS_SYNTHESIS_SECONDS = Counter(
+    "torchts_tts_synthesis_seconds_total", "Seconds spent synthesizing (G2P and inference)"
+)
+TTS_REAL_TIME_FACTOR = Histogram(
+    "torchts_tts_real_time_factor", "Synthesis time divided by the duration of the audio, per request",
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0),
+)
+
+# Model lifecycle
+MODEL_LOADED = Gauge("torchts_model_loaded", "Whether the model is loaded (1) or not (0)")
+MODEL_LOAD_SECONDS = Histogram("torchts_model_load_seconds", "Time taken to load the model and pipelines")
+MODEL_UNLOAD_SECONDS = Histogram("torchts_model_unload_seconds", "Time taken to unload the model")
+MODEL_WAITING = Gauge(
+    "torchts_model_waiting_requests", "Requests waiting for a pipeline (e.g. while the model loads)"
+)
+
+# Documents
+DOCUMENT_PARSE_SECONDS = Histogram(
+    "torchts_document_parse_seconds", "Time taken to parse an uploaded document", ("file_type",),
+)
+DOCUMENT_PARSE_ERRORS = Counter(
+    "torchts_document_parse_errors_total", "Uploaded documents that failed to parse", ("file_type",),
+)
+
+
+def stage(name: str) -> _StageTimer:
+    """Time a synthesis stage into ``torchts_tts_stage_seconds`` and the request's timings."""
+    return _StageTimer(TTS_STAGE_SECONDS.labels(name), name)
@@ -6,12 +6,77 @@ from typing import Optional, Dict, Any
 from contextlib import contextmanager
 import torch
 import gc
+from collections import deque
 from kokoro import KPipeline, KModel
 from rich.console import Console
 from rich import print as rprint
+from services.metrics_service import (
+    MODEL_LOADED,
+    MODEL_LOAD_SECONDS,
+    MODEL_UNLOAD_SECONDS,
+    MODEL_WAITING,
+    TTS_STAGE_SECONDS,
+    record_timing,
+    request_timing,
+)
+from services.memory_service import current_rss, process_memory, recent_requests, tensor_bytes, trim_heap
 
 console = Console()
 
+# Pipelines created for every model load
+LANGUAGES = {
+    'a': 'American English',
+    'b': 'British English',
+    'e': 'Spanish',
+    'f': 'French',
+    'h': 'Hindi',
+    'i': 'Italian',
+    'j': 'Japanese',
+    'p': 'Brazilian Portuguese',
+    'z': 'Mandarin Chinese',
+}
+# Load and unload events kept for the memory report
+MODEL_HISTORY_SIZE = int(os.getenv("MODEL_HISTORY_SIZE", "50"))
+
+def _bytes_delta(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    return after - before if before is not None and after is not None else None
+
+# Children of the stage histogram updated on every model call
+_G2P_SECONDS = TTS_STAGE_SECONDS.labels("g2p")
+_INFERENCE_SECONDS = TTS_STAGE_SECONDS.labels("inference")
+_inference_started = threading.local()
+
+def _timed(fn, histogram, name: str):
+    """Wrap ``fn`` so every call is observed into ``histogram`` and the request's ``name`` timing."""
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            histogram.observe(seconds)
+            record_timing(name, seconds)
+    return timed
+
+def _start_inference(module, inputs):
+    _inference_started.value = time.perf_counter()
+
+def _end_inference(module, inputs, output):
+    seconds = time.perf_counter() - _inference_started.value
+    _INFERENCE_SECONDS.observe(seconds)
+    record_timing("inference", seconds)
+
+def _instrument(model, pipelines) -> None:
+    """
+    Time the forward passes of the model and the G2P step of each pipeline,
+    which ``KPipeline`` interleaves while yielding audio.
+    """
+    model.register_forward_pre_hook(_start_inference)
+    model.register_forward_hook(_end_inference)
+    for pipeline in pipelines:
+        if callable(getattr(pipeline, "g2p", None)):
+            pipeline.g2p = _timed(pipeline.g2p, _G2P_SECONDS, "g2p")
+
 class ModelManager:
     """
     Manages the lifecycle of the Kokoro TTS model and pipelines.
@@ -41,6 +106,10 @@ class ModelManager:
         self._loading_event = threading.Event()
         self._is_loading = False
         
+        # Memory accounting: what the current load took, and past loads and unloads
+        self._load_memory: Dict[str, Any] = {}
+        self._memory_history = deque(maxlen=MODEL_HISTORY_SIZE)
+        
         # Activity tracking
         self._last_activity = time.time()
         self._unload_task: Optional[asyncio.Task] = None
@@ -80,7 +149,7 @@ class ModelManager:
                         with self._lock:
                             if self._model is not None:  # Double-check after acquiring lock
                                 rprint("[yellow]Unloading model due to inactivity[/yellow]")
-                                self._unload_model_internal()
+                                self._unload_model_internal(reason="inactivity")
                                 
             except asyncio.CancelledError:
                 break
@@ -95,25 +164,40 @@ class ModelManager:
         
         rprint(f"[yellow]Loading Kokoro model on {self.device}...[/yellow]")
         start_time = time.time()
+        rss_before = current_rss()
         
         try:
             # Load the model
             self._model = KModel().to(self.device).eval()
+            rss_model = current_rss()
             
-            # Initialize pipelines for all supported languages
-            self._pipelines = {
-                'a': KPipeline(lang_code='a', model=self._model),  # American English
-                'b': KPipeline(lang_code='b', model=self._model),  # British English
-                'e': KPipeline(lang_code='e', model=self._model),  # Spanish
-                'f': KPipeline(lang_code='f', model=self._model),  # French
-                'h': KPipeline(lang_code='h', model=self._model),  # Hindi
-                'i': KPipeline(lang_code='i', model=self._model),  # Italian
-                'j': KPipeline(lang_code='j', model=self._model),  # Japanese
-                'p': KPipeline(lang_code='p', model=self._model),  # Brazilian Portuguese
-                'z': KPipeline(lang_code='z', model=self._model)   # Mandarin Chinese
-            }
+            # Initialize pipelines for all supported languages, measuring the
+            # RSS each one's G2P resources (lexicons, taggers) add
+            self._pipelines = {}
+            pipeline_rss = {}
+            for lang_code in LANGUAGES:
+                rss_pipeline = current_rss()
+                self._pipelines[lang_code] = KPipeline(lang_code=lang_code, model=self._model)
+                pipeline_rss[lang_code] = _bytes_delta(rss_pipeline, current_rss())
             
+            _instrument(self._model, self._pipelines.values())
             load_time = time.time() - start_time
+            self._load_memory = {
+                "rss_before_bytes": rss_before,
+                "weights_bytes": tensor_bytes(self._model.parameters()) + tensor_bytes(self._model.buffers()),
+                "model_rss_bytes": _bytes_delta(rss_before, rss_model),
+                "pipeline_rss_bytes": pipeline_rss,
+            }
+            self._memory_history.append({
+                "event": "load",
+                "at": time.time(),
+                "seconds": load_time,
+                "rss_after_bytes": current_rss(),
+                **self._load_memory,
+            })
+            MODEL_LOAD_SECONDS.observe(load_time)
+            record_timing("model_load", load_time)
+            MODEL_LOADED.set(1)
             rprint(f"[green]Model loaded successfully in {load_time:.2f}s[/green]")
             
         except Exception as e:
@@ -122,12 +206,21 @@ class ModelManager:
             self._pipelines = {}
             raise
     
-    def _unload_model_internal(self):
-        """Internal method to unload the model and free memory. Must be called with lock held."""
+    def _unload_model_internal(self, reason: str = "forced"):
+        """
+        Internal method to unload the model and free memory. Must be called with lock held.
+        
+        Records how much RSS is left over compared with before the load, both
+        after garbage collection and after returning freed heap memory to the
+        OS: what only the trim gives back is allocator fragmentation, what
+        stays across load/unload cycles is a leak.
+        """
         if self._model is None:
             return  # Already unloaded
         
         rprint("[yellow]Unloading model and freeing memory...[/yellow]")
+        start_time = time.perf_counter()
+        rss_before = current_rss()
         
         try:
             # Clear pipelines
@@ -143,6 +236,24 @@ class ModelManager:
                 torch.cuda.empty_cache()
                 torch.cuda.synchronize()
             
+            rss_after = current_rss()
+            rss_after_trim = current_rss() if trim_heap() else rss_after
+            rss_before_load = self._load_memory.get("rss_before_bytes")
+            self._load_memory = {}
+            self._memory_history.append({
+                "event": "unload",
+                "at": time.time(),
+                "reason": reason,
+                "seconds": time.perf_counter() - start_time,
+                "rss_before_bytes": rss_before,
+                "rss_after_bytes": rss_after,
+                "rss_after_trim_bytes": rss_after_trim,
+                "leftover_bytes": _bytes_delta(rss_before_load, rss_after),
+                "leftover_after_trim_bytes": _bytes_delta(rss_before_load, rss_after_trim),
+            })
+            
+            MODEL_UNLOAD_SECONDS.observe(time.perf_counter() - start_time)
+            MODEL_LOADED.set(0)
             rprint("[green]Model unloaded successfully[/green]")
             
         except Exception as e:
@@ -164,13 +275,14 @@ class ModelManager:
             ValueError: If lang_code is not supported
             RuntimeError: If model loading fails
         """
-        if lang_code not in ['a', 'b', 'e', 'f', 'h', 'i', 'j', 'p', 'z']:
+        if lang_code not in LANGUAGES:
             raise ValueError(f"Unsupported language code: {lang_code}")
         
         # Update activity timestamp
         self._last_activity = time.time()
         
-        with self._lock:
+        # Time to get the pipeline, including any wait for the lock or a load
+        with request_timing("get_pipeline"), MODEL_WAITING.track(), self._lock:
             # If model is not loaded, load it
             if self._model is None:
                 if self._is_loading:
@@ -226,7 +338,8 @@ class ModelManager:
                 "unload_timeout": self.unload_timeout,
                 "time_since_last_activity": time_since_activity,
                 "is_loading": self._is_loading,
-                "available_languages": list(self._pipelines.keys()) if is_loaded else []
+                "available_languages": list(self._pipelines.keys()) if is_loaded else [],
+                **process_memory(),
             }
             
             if torch.cuda.is_available():
@@ -235,6 +348,34 @@ class ModelManager:
             
             return status
     
+    def get_memory_report(self) -> Dict[str, Any]:
+        """
+        Memory of the process, of the loaded model and its pipelines, of recent
+        synthesis requests, and the history of loads and unloads.
+        
+        Returns:
+            Dict containing the memory report (sizes in bytes, None where the
+            platform doesn't report RSS)
+        """
+        with self._lock:
+            pipelines = {
+                lang_code: {
+                    "load_rss_bytes": self._load_memory.get("pipeline_rss_bytes", {}).get(lang_code),
+                    # Voice packs are loaded into a pipeline as voices are first used
+                    "voice_bytes": tensor_bytes(getattr(pipeline, "voices", {}).values()),
+                }
+                for lang_code, pipeline in self._pipelines.items()
+            }
+            return {
+                "process": process_memory(),
+                "model_loaded": self._model is not None,
+                "weights_bytes": self._load_memory.get("weights_bytes"),
+                "model_rss_bytes": self._load_memory.get("model_rss_bytes"),
+                "pipelines": pipelines,
+                "requests": recent_requests(),
+                "history": list(self._memory_history),
+            }
+    
     def update_timeout(self, new_timeout: int):
         """Update the unload timeout."""
         if new_timeout < 60:
@@ -252,7 +393,7 @@ class ModelManager:
             self._unload_task.cancel()
         
         with self._lock:
-            self._unload_model_internal()
+            self._unload_model_internal(reason="shutdown")
         
         rprint("[green]ModelManager shut down[/green]")
 
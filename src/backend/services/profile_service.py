@@ -1,20 +1,27 @@
 try:  # pragma: no cover - optional SQLAlchemy
-    from sqlalchemy import select
+    from sqlalchemy import select, delete, func, bindparam
     from sqlalchemy.orm import Session
 except Exception:  # pragma: no cover - missing dependency
-    select = None
+    select = delete = func = bindparam = None
     Session = None
 
 from storage.models import (
     engine,
     Profile,
+    File,
+    AudioOutput,
     ASYNC_DB,
     AsyncSessionLocal,
     SA_AVAILABLE,
+    contains_pattern,
+    LIKE_ESCAPE,
 )
 from sqlite3 import IntegrityError
 from fastapi import HTTPException
+from services.cleanup_service import schedule_cleanup
 import asyncio
+from functools import lru_cache
+from typing import Optional
 
 async def create_profile_service(profile):
     if not SA_AVAILABLE or engine is None:
@@ -64,59 +71,115 @@ async def create_profile_service(profile):
 
         return await asyncio.to_thread(_sync_op)
 
-async def list_profiles_service():
+@lru_cache(maxsize=None)
+def _profile_listing_statement(paged: bool, searching: bool, limited: bool):
+    """Select profiles ordered by id, for one combination of filters (built once, with bound parameters)."""
+    stmt = select(
+        Profile.id, Profile.name, Profile.voice_preset, Profile.volume, Profile.created_at
+    ).order_by(Profile.id)
+    if paged:
+        stmt = stmt.where(Profile.id > bindparam("after"))
+    if searching:
+        stmt = stmt.where(Profile.name.like(bindparam("pattern"), escape=LIKE_ESCAPE))
+    if limited:
+        stmt = stmt.limit(bindparam("limit"))
+    return stmt
+
+def _profile_listing_query(limit: Optional[int], after: Optional[int], search: Optional[str]):
+    """Statement and parameters selecting profiles after ``after`` (keyset pagination)."""
+    stmt = _profile_listing_statement(after is not None, bool(search), limit is not None)
+    params = {"after": after, "limit": limit, "pattern": contains_pattern(search) if search else None}
+    return stmt, {key: value for key, value in params.items() if value is not None}
+
+async def list_profiles_service(limit: Optional[int] = None, after: Optional[int] = None,
+                                search: Optional[str] = None):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
+    stmt, params = _profile_listing_query(limit, after, search)
     if ASYNC_DB and AsyncSessionLocal:
         async with AsyncSessionLocal() as session:
-            result = await session.execute(select(Profile))
-            profiles = result.scalars().all()
-            return [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "voice_preset": p.voice_preset,
-                    "volume": p.volume,
-                    "created_at": p.created_at,
-                }
-                for p in profiles
-            ]
+            result = await session.execute(stmt, params)
+            return [dict(row._mapping) for row in result.all()]
     else:
         def _sync_op():
             with Session(engine) as session:
-                profiles = session.query(Profile).all()
-                return [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "voice_preset": p.voice_preset,
-                        "volume": p.volume,
-                        "created_at": p.created_at,
-                    }
-                    for p in profiles
-                ]
+                return [dict(row._mapping) for row in session.execute(stmt, params).all()]
 
         return await asyncio.to_thread(_sync_op)
 
+async def _scalar_row(stmt) -> Optional[tuple]:
+    if ASYNC_DB and AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(stmt)).first()
+    else:
+        def _sync_op():
+            with Session(engine) as session:
+                return session.execute(stmt).first()
+
+        row = await asyncio.to_thread(_sync_op)
+    return tuple(row) if row is not None else None
+
+async def profiles_version_service() -> tuple:
+    """
+    Version of the profile listing: changes whenever a profile is created or
+    deleted (profiles are never updated).
+    """
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+    return await _scalar_row(select(func.count(Profile.id), func.max(Profile.created_at)))
+
+async def profile_version_service(profile_id: int) -> Optional[tuple]:
+    """
+    Version of a profile's files and audio, or None when the profile doesn't
+    exist. Includes the creation time, so a profile recreated under a reused
+    id never matches its predecessor.
+    """
+    if not SA_AVAILABLE or engine is None:
+        raise RuntimeError("SQLAlchemy is not available")
+    return await _scalar_row(select(Profile.created_at, Profile.version).where(Profile.id == profile_id))
+
+def _profile_document_ids(profile_id: int):
+    return select(File.document_id).where(File.profile_id == profile_id).distinct()
+
+def _profile_audio_hashes(profile_id: int):
+    return select(AudioOutput.content_hash).where(AudioOutput.profile_id == profile_id).distinct()
+
+def _delete_profile_statements(profile_id: int) -> list:
+    """
+    Delete a profile and its rows with set-based statements, so none of its
+    (possibly huge) rows are loaded into the session as ORM cascades would.
+    """
+    return [
+        delete(File).where(File.profile_id == profile_id),
+        delete(AudioOutput).where(AudioOutput.profile_id == profile_id),
+        delete(Profile).where(Profile.id == profile_id),
+    ]
+
 async def delete_profile_service(profile_id: int):
     if not SA_AVAILABLE or engine is None:
         raise RuntimeError("SQLAlchemy is not available")
     if ASYNC_DB and AsyncSessionLocal:
         async with AsyncSessionLocal() as session:
-            result = await session.get(Profile, profile_id)
-            if not result:
+            if await session.scalar(select(Profile.id).where(Profile.id == profile_id)) is None:
                 raise HTTPException(404, "Profile not found")
-            await session.delete(result)
+            document_ids = list(await session.scalars(_profile_document_ids(profile_id)))
+            audio_hashes = list(await session.scalars(_profile_audio_hashes(profile_id)))
+            for stmt in _delete_profile_statements(profile_id):
+                await session.execute(stmt)
             await session.commit()
-            return {"message": "Profile deleted successfully"}
     else:
         def _sync_op():
             with Session(engine) as session:
-                profile = session.query(Profile).filter_by(id=profile_id).first()
-                if not profile:
+                if session.scalar(select(Profile.id).where(Profile.id == profile_id)) is None:
                     raise HTTPException(404, "Profile not found")
-                session.delete(profile)
+                document_ids = list(session.scalars(_profile_document_ids(profile_id)))
+                audio_hashes = list(session.scalars(_profile_audio_hashes(profile_id)))
+                for stmt in _delete_profile_statements(profile_id):
+                    session.execute(stmt)
                 session.commit()
-                return {"message": "Profile deleted successfully"}
+                return document_ids, audio_hashes
 
-        return await asyncio.to_thread(_sync_op)
+        document_ids, audio_hashes = await asyncio.to_thread(_sync_op)
+    # Drop shared documents only the profile's files used, and its audio files
+    schedule_cleanup(document_ids, audio_hashes)
+    return {"message": "Profile deleted successfully"}
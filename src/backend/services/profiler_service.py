@@ -0,0 +1,120 @@
+"""Sampling profiler for the running process.
+
+Samples the Python stack of every thread at a fixed interval for a few
+seconds and counts identical stacks. The result is in the collapsed-stack
+format read by flamegraph.pl, speedscope and inferno: one line per stack,
+frames from the thread down to the innermost call separated by ``;``, then
+the number of samples. A thread blocked in native code (a forward pass, a
+database call) is sampled at the Python call that entered it, so that time
+shows up too.
+
+Sampling needs no instrumentation and no restart; it only pauses the
+process for the moment each sample takes (tens of microseconds).
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+# The profile endpoint shows the server's code and keeps a thread busy, so it
+# only exists where it is switched on
+PROFILING_ENABLED = os.getenv("TORCHTS_ENABLE_PROFILING", "false").lower() in ("1", "true", "yes")
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL = 0.005  # 200 samples per second
+# Innermost frames of threads that are parked waiting for work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# One profile at a time: concurrent ones would sample each other
+_profile_lock = threading.Lock()
+
+
+def _short_path(filename: str) -> str:
+    """``filename`` relative to the import path it was found on."""
+    for root in sorted((entry for entry in sys.path if entry), key=len, reverse=True):
+        root = os.path.join(os.path.abspath(root), "")
+        if filename.startswith(root):
+            return filename[len(root):]
+    return filename
+
+
+def _frame_label(code, labels: Dict[object, str]) -> str:
+    label = labels.get(code)
+    if label is None:
+        # The function's first line rather than the sampled one, so samples
+        # anywhere in a function are merged into one frame
+        label = labels[code] = (
+            f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+        )
+    return label
+
+
+def _is_idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def require_profiling() -> None:
+    """
+    Raises:
+        HTTPException: 404 unless ``TORCHTS_ENABLE_PROFILING`` is set
+    """
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+def sample_stacks(seconds: float, interval: float = DEFAULT_INTERVAL, include_idle: bool = False) -> Tuple[str, int]:
+    """
+    Sample the stacks of all threads (but this one) for ``seconds``.
+
+    Args:
+        seconds: How long to sample for
+        interval: Seconds between samples
+        include_idle: Keep samples of threads waiting for work (thread pool
+            workers, the event loop in ``select``)
+
+    Returns:
+        Tuple[str, int]: The collapsed stacks, most sampled first, and the
+        number of samples taken
+
+    Raises:
+        HTTPException: 409 if a profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        own_thread = threading.get_ident()
+        stacks: Counter = Counter()
+        labels: Dict[object, str] = {}
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread or (not include_idle and _is_idle(frame.f_code)):
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stacks[(names.get(thread_id, str(thread_id)), tuple(reversed(codes)))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        lines = []
+        for (thread_name, codes), count in stacks.most_common():
+            frames = [thread_name.replace(";", ":")]
+            frames.extend(_frame_label(code, labels) for code in codes)
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n" if lines else "", samples
+    finally:
+        _profile_lock.release()
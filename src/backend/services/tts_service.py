@@ -1,14 +1,26 @@
 import hashlib
-import io
-import numpy
-import soundfile as sf
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse
-from processing.text_processor import chunk_text
-from processing.audio_generator import normalize_audio
+from fastapi.responses import StreamingResponse, FileResponse
+from processing.text_processor import plan_chunks
+from processing.audio_generator import AudioAssembler, wav_stream, WAV_HEADER_SIZE
 import asyncio
 from services.model_service import get_model_manager
+from services.tuning_service import get_tuned_settings
+from storage.audio_store import AudioStore, get_audio_store
+from services.cache_service import REVALIDATE, etag_matches, not_modified
+from services.memory_service import track_request
+from services.metrics_service import (
+    TTS_AUDIO_SECONDS,
+    TTS_IN_FLIGHT,
+    TTS_REAL_TIME_FACTOR,
+    TTS_REQUESTS,
+    TTS_SYNTHESIS_SECONDS,
+    stage,
+)
+import time
+from functools import wraps
 from threading import Lock
+from typing import Optional
 
 # Global variable to track active generation sessions
 # Access to this set must be synchronized because FastAPI can handle
@@ -18,6 +30,44 @@ active_generations = set()
 # Lock protecting modifications to ``active_generations``
 active_generations_lock = Lock()
 
+def _stored_audio_response(audio_store, stored, headers, if_none_match=None):
+    """
+    Serve a stored render from disk; ``FileResponse`` answers Range requests
+    with 206. The render's content hash is its ETag, so a client that already
+    has it gets a 304 instead.
+    """
+    headers = dict(headers, **{"X-Audio-ID": str(stored["id"])})
+    if stored["content_hash"]:
+        etag = headers["ETag"] = f'"{stored["content_hash"]}"'
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, headers)
+    path = audio_store.path_for(stored["file_path"])
+    return FileResponse(path, media_type="audio/wav", headers=headers)
+
+def _in_flight(mode: str):
+    """Count the requests being handled by a synthesis endpoint and record their peak memory."""
+    def decorator(fn):
+        @wraps(fn)
+        def tracked(*args, **kwargs):
+            with TTS_IN_FLIGHT.track(), track_request(mode):
+                return fn(*args, **kwargs)
+        return tracked
+    return decorator
+
+def _record_synthesis(seconds: float, frames: int) -> None:
+    """Account ``seconds`` of synthesis producing ``frames`` samples of audio."""
+    audio_seconds = frames / 24000
+    TTS_SYNTHESIS_SECONDS.inc(seconds)
+    TTS_AUDIO_SECONDS.inc(audio_seconds)
+    if audio_seconds > 0:
+        TTS_REAL_TIME_FACTOR.observe(seconds / audio_seconds)
+
+def _cache_result(audio_store, stored) -> str:
+    if audio_store is None:
+        return "disabled"
+    return "hit" if stored is not None else "miss"
+
+@_in_flight("single")
 def generate_single_tts(request):
     session_data = f"{request.voice}_{request.text[:32]}".encode('utf-8')
     session_id = hashlib.md5(session_data).hexdigest()
@@ -39,38 +89,69 @@ def generate_single_tts(request):
         
         voice_type = request.voice[0].lower()
         model_manager = get_model_manager()
-        chunks = chunk_text(request.text)
-        
-        if not 0 <= request.chunk_id < len(chunks):
-            raise HTTPException(status_code=400, detail="Invalid chunk ID")
-            
-        chunk = chunks[request.chunk_id]
-        
-        all_audio = []
-        with model_manager.get_pipeline(voice_type) as pipeline:
-            for _, _, audio in pipeline(chunk, voice=request.voice, speed=request.speed):
-                if session_id not in active_generations:
-                    raise HTTPException(status_code=499, detail="Client cancelled request")
-                all_audio.append(audio)
+        max_phonemes = get_tuned_settings()["max_phonemes"]
         
-        final_audio = numpy.concatenate(all_audio)
-        audio_normalized = normalize_audio(final_audio)
-        audio_int16 = (audio_normalized * 32767).astype(numpy.int16)
+        # Scan the text once, keeping only the requested chunk and the count.
+        chunk = None
+        total_chunks = 0
+        with stage("chunking"):
+            for index, text_chunk in enumerate(plan_chunks(request.text, voice_type, max_phonemes, mode=request.plan)):
+                if index == request.chunk_id:
+                    chunk = text_chunk.text
+                total_chunks += 1
         
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_int16, 24000, format='WAV', subtype='PCM_16')
-        buffer.seek(0)
+        if chunk is None:
+            raise HTTPException(status_code=400, detail="Invalid chunk ID")
         
         headers = {
-            "X-Total-Chunks": str(len(chunks)),
+            "X-Total-Chunks": str(total_chunks),
             "X-Current-Chunk": str(request.chunk_id),
             "Content-Type": "audio/wav",
-            "Cache-Control": "public, max-age=31536000",
+            "Cache-Control": REVALIDATE,
             "Accept-Ranges": "bytes",
             "X-Session-ID": session_id
         }
         
-        return StreamingResponse(buffer, media_type="audio/wav", headers=headers)
+        audio_store = get_audio_store()
+        render_key = AudioStore.render_key("single", request.voice, request.speed, chunk)
+        stored = None
+        if audio_store is not None:
+            with stage("cache_lookup"):
+                stored = audio_store.lookup(render_key, request.profile_id)
+        TTS_REQUESTS.labels("single", _cache_result(audio_store, stored)).inc()
+        if stored is not None:
+            return _stored_audio_response(audio_store, stored, headers)
+        
+        # Pipeline segments are joined back to back (no crossfade) into a
+        # single growable buffer.
+        assembler = AudioAssembler(fade_duration=0.0)
+        with model_manager.get_pipeline(voice_type) as pipeline:
+            synthesis_start = time.perf_counter()
+            for _, _, audio in pipeline(chunk, voice=request.voice, speed=request.speed):
+                if session_id not in active_generations:
+                    raise HTTPException(status_code=499, detail="Client cancelled request")
+                assembler.append(audio)
+            synthesis_seconds = time.perf_counter() - synthesis_start
+        
+        # Normalize and quantize in place, then stream the WAV header followed
+        # by memoryview slices of the PCM samples.
+        with stage("normalization"):
+            pcm = assembler.to_pcm16()
+        _record_synthesis(synthesis_seconds, len(pcm))
+        
+        if audio_store is not None:
+            with stage("encoding"):
+                stored = audio_store.put(
+                    wav_stream(pcm, 24000),
+                    render_key=render_key,
+                    profile_id=request.profile_id,
+                    voice=request.voice,
+                    text_content=chunk,
+                )
+            return _stored_audio_response(audio_store, stored, headers)
+        
+        headers["Content-Length"] = str(WAV_HEADER_SIZE + pcm.nbytes)
+        return StreamingResponse(wav_stream(pcm, 24000), media_type="audio/wav", headers=headers)
     except HTTPException as he:
         with active_generations_lock:
             active_generations.discard(session_id)
@@ -80,6 +161,7 @@ def generate_single_tts(request):
             active_generations.discard(session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
+@_in_flight("multi")
 def generate_multi_tts(request):
     session_data = ("multi_" + request.text[:32]).encode('utf-8')
     session_id = hashlib.md5(session_data).hexdigest()
@@ -109,7 +191,33 @@ def generate_multi_tts(request):
         if not segments:
             raise HTTPException(status_code=400, detail="No valid segments found in text")
         
-        all_audio_segments = []
+        headers = {
+            "Content-Type": "audio/wav",
+            "Cache-Control": REVALIDATE,
+            "Accept-Ranges": "bytes",
+            "X-Session-ID": session_id,
+            "X-Mode": "multi",
+            "X-Segment-Count": str(len(segments))
+        }
+        
+        audio_store = get_audio_store()
+        # The chunk plan changes the audio; throughput keys stay as they were
+        plan = () if request.plan == "throughput" else (request.plan,)
+        render_key = AudioStore.render_key(
+            "multi", request.text, request.speed, sorted(request.speakers.items()), *plan
+        )
+        stored = None
+        if audio_store is not None:
+            with stage("cache_lookup"):
+                stored = audio_store.lookup(render_key, request.profile_id)
+        TTS_REQUESTS.labels("multi", _cache_result(audio_store, stored)).inc()
+        if stored is not None:
+            with active_generations_lock:
+                active_generations.discard(session_id)
+            return _stored_audio_response(audio_store, stored, headers)
+        
+        assembler = AudioAssembler(fade_duration=0.0)
+        synthesis_seconds = 0.0
         for idx, (speaker_id, segment_text) in enumerate(segments):
             if not segment_text:
                 continue
@@ -118,45 +226,49 @@ def generate_multi_tts(request):
                 raise HTTPException(status_code=400, detail=f"Voice for speaker {speaker_id} is invalid or not provided")
             voice_type = voice[0].lower()
             model_manager = get_model_manager()
-            chunks = chunk_text(segment_text)
+            with stage("chunking"):
+                chunks = [
+                    text_chunk.text
+                    for text_chunk in plan_chunks(
+                        segment_text, voice_type, get_tuned_settings()["max_phonemes"], mode=request.plan
+                    )
+                ]
             if not chunks:
                 continue
-            segment_audio_chunks = []
             with model_manager.get_pipeline(voice_type) as pipeline:
+                synthesis_start = time.perf_counter()
                 for chunk in chunks:
                     if session_id not in active_generations:
                         raise HTTPException(status_code=499, detail="Client cancelled request")
                     for _, _, audio in pipeline(chunk, voice=voice, speed=request.speed):
                         if session_id not in active_generations:
                             raise HTTPException(status_code=499, detail="Client cancelled request")
-                        segment_audio_chunks.append(audio)
-            if segment_audio_chunks:
-                final_segment_audio = numpy.concatenate(segment_audio_chunks)
-                all_audio_segments.append(final_segment_audio)
+                        assembler.append(audio)
+                synthesis_seconds += time.perf_counter() - synthesis_start
                 
-        if not all_audio_segments:
+        if not len(assembler):
             raise HTTPException(status_code=400, detail="No audio generated for any segment")
         
-        final_audio = numpy.concatenate(all_audio_segments)
-        audio_normalized = normalize_audio(final_audio)
-        audio_int16 = (audio_normalized * 32767).astype(numpy.int16)
-        
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_int16, 24000, format='WAV', subtype='PCM_16')
-        buffer.seek(0)
+        with stage("normalization"):
+            pcm = assembler.to_pcm16()
+        _record_synthesis(synthesis_seconds, len(pcm))
         
         with active_generations_lock:
             active_generations.discard(session_id)
         
-        headers = {
-            "Content-Type": "audio/wav",
-            "Cache-Control": "public, max-age=31536000",
-            "Accept-Ranges": "bytes",
-            "X-Session-ID": session_id,
-            "X-Mode": "multi",
-            "X-Segment-Count": str(len(segments))
-        }
-        return StreamingResponse(buffer, media_type="audio/wav", headers=headers)
+        if audio_store is not None:
+            with stage("encoding"):
+                stored = audio_store.put(
+                    wav_stream(pcm, 24000),
+                    render_key=render_key,
+                    profile_id=request.profile_id,
+                    voice=",".join(sorted(set(request.speakers.values()))),
+                    text_content=request.text,
+                )
+            return _stored_audio_response(audio_store, stored, headers)
+        
+        headers["Content-Length"] = str(WAV_HEADER_SIZE + pcm.nbytes)
+        return StreamingResponse(wav_stream(pcm, 24000), media_type="audio/wav", headers=headers)
     except HTTPException as he:
         with active_generations_lock:
             active_generations.discard(session_id)
@@ -176,6 +288,16 @@ def stop_generation_service(session_id: str):
         else:
             return {"message": "No active generation found for this session", "session_id": session_id}
 
+async def get_audio_service(audio_id: int, if_none_match: Optional[str] = None):
+    """Serve a stored render by its ``AudioOutput`` id, honouring Range and conditional requests."""
+    audio_store = get_audio_store()
+    stored = await asyncio.to_thread(audio_store.get, audio_id) if audio_store is not None else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    # Audio ids are reused once deleted, so the URL doesn't identify the
+    # content: revalidate against the ETag instead of caching for good
+    return _stored_audio_response(audio_store, stored, {"Cache-Control": REVALIDATE}, if_none_match)
+
 async def list_profile_audio_service(profile_id: int):
     """List audio outputs for a profile. Returns empty list if SQLAlchemy is not available."""
     try:
@@ -204,6 +326,7 @@ async def list_profile_audio_service(profile_id: int):
                         "voice": a.voice,
                         "created_at": a.created_at,
                         "file_path": a.file_path,
+                        "size_bytes": a.size_bytes,
                     }
                     for a in outputs
                 ]
@@ -217,6 +340,7 @@ async def list_profile_audio_service(profile_id: int):
                             "voice": a.voice,
                             "created_at": a.created_at,
                             "file_path": a.file_path,
+                            "size_bytes": a.size_bytes,
                         }
                         for a in outputs
                     ]
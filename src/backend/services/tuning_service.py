@@ -0,0 +1,65 @@
+"""Hardware-specific tuning settings.
+
+``autotune.py`` measures synthesis under a grid of settings on the deployment
+hardware and writes the best combination to a JSON profile. The server loads
+that profile at startup; settings missing from the file (or the whole file)
+fall back to the built-in defaults.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from processing.text_processor import MAX_PHONEMES
+
+TUNING_FILE = Path(os.getenv("TORCHTS_TUNING_FILE", Path.cwd() / "data" / "tuning.json"))
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "max_phonemes": MAX_PHONEMES,  # Chunk budget for plan_chunks
+    "num_threads": None,  # torch intra-op threads (None keeps torch's default)
+}
+
+_settings: Optional[Dict[str, Any]] = None
+
+
+def load_tuned_settings(path: Path = TUNING_FILE) -> Dict[str, Any]:
+    """
+    Read a tuning profile, merged over ``DEFAULT_SETTINGS``.
+
+    Args:
+        path: Location of the profile written by ``autotune.py``.
+
+    Returns:
+        Dict[str, Any]: The settings (defaults only if the file doesn't exist).
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    if path.exists():
+        with path.open('r', encoding='utf-8') as f:
+            profile = json.load(f)
+        settings.update({key: profile[key] for key in DEFAULT_SETTINGS if key in profile})
+    return settings
+
+
+def save_tuned_settings(profile: Dict[str, Any], path: Path = TUNING_FILE) -> None:
+    """Write a tuning profile (settings plus any measurement details)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, default=str)
+
+
+def get_tuned_settings() -> Dict[str, Any]:
+    """Get the tuned settings, loading the profile on first use."""
+    global _settings
+    if _settings is None:
+        _settings = load_tuned_settings()
+    return _settings
+
+
+def apply_tuned_settings() -> Dict[str, Any]:
+    """Apply process-wide settings (torch threads) and return the settings."""
+    settings = get_tuned_settings()
+    if settings["num_threads"]:
+        import torch
+        torch.set_num_threads(int(settings["num_threads"]))
+    return settings
@@ -0,0 +1,258 @@
+"""Persistent, content-addressed store for rendered audio.
+
+Rendered WAV files are written under ``<data dir>/audio`` and named after the
+SHA-256 of their bytes, so identical renders share a single file. Each stored
+render is tracked by an ``AudioOutput`` row holding the render key (a hash of
+the synthesis inputs used for lookups), the file size and the last access
+time. When a profile's renders exceed its quota, the least recently used rows
+are evicted and files that are no longer referenced are deleted.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:  # pragma: no cover - optional SQLAlchemy
+    from sqlalchemy import select, delete, func
+    from sqlalchemy.orm import Session
+except Exception:  # pragma: no cover - missing dependency
+    select = delete = func = None
+    Session = None
+
+from storage.models import engine, AudioOutput, SA_AVAILABLE, DATA_DIR, bump_profile_version, utc_now
+
+AUDIO_STORE_DIR = DATA_DIR / "audio"
+
+
+class AudioStore:
+    """
+    Stores rendered audio on disk and tracks it in the ``audio_outputs`` table.
+    """
+
+    def __init__(self, root: Path = AUDIO_STORE_DIR, profile_quota_bytes: int = 1024 * 2**20):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory the audio files are written to.
+            profile_quota_bytes: Maximum bytes of audio kept per profile.
+        """
+        self.root = Path(root)
+        self.profile_quota_bytes = profile_quota_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Serializes eviction so concurrent writers don't delete each other's files.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def render_key(*parts: Any) -> str:
+        """Hash the synthesis inputs that fully determine a render."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(repr(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, file_path: str) -> Path:
+        """Resolve a stored (relative) file path to its location on disk."""
+        return self.root / file_path
+
+    @staticmethod
+    def _profile_filter(profile_id: Optional[int]):
+        if profile_id is None:
+            return AudioOutput.profile_id.is_(None)
+        return AudioOutput.profile_id == profile_id
+
+    @staticmethod
+    def _profile_changed(session, profile_id: Optional[int]) -> None:
+        """Mark the profile's audio listing as changed (in the session's transaction)."""
+        if profile_id is not None:
+            session.execute(bump_profile_version(profile_id))
+
+    @staticmethod
+    def _as_dict(row) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "profile_id": row.profile_id,
+            "file_path": row.file_path,
+            "content_hash": row.content_hash,
+            "size_bytes": row.size_bytes,
+        }
+
+    def lookup(self, render_key: str, profile_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored render for ``render_key``.
+
+        A render stored for another profile is reused by adding a row for this
+        profile, so it counts toward this profile's quota without re-synthesis.
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored audio entry, or None on a miss.
+        """
+        with Session(engine) as session:
+            rows = session.execute(
+                select(AudioOutput)
+                .where(AudioOutput.render_key == render_key)
+                .order_by(AudioOutput.last_accessed.desc())
+            ).scalars().all()
+            own = next((row for row in rows if row.profile_id == profile_id), None)
+            source = own or next(iter(rows), None)
+            if source is None or not self.path_for(source.file_path).exists():
+                return None
+            if own is None:
+                own = AudioOutput(
+                    profile_id=profile_id,
+                    file_path=source.file_path,
+                    voice=source.voice,
+                    text_content=source.text_content,
+                    render_key=render_key,
+                    content_hash=source.content_hash,
+                    size_bytes=source.size_bytes,
+                )
+                session.add(own)
+                self._profile_changed(session, profile_id)
+            own.last_accessed = utc_now()
+            session.commit()
+            entry = self._as_dict(own)
+        self.enforce_quota(profile_id, keep_id=entry["id"])
+        return entry
+
+    def get(self, audio_id: int) -> Optional[Dict[str, Any]]:
+        """Return the stored audio entry with the given id, marking it as used."""
+        with Session(engine) as session:
+            row = session.get(AudioOutput, audio_id)
+            if row is None or not row.content_hash or not self.path_for(row.file_path).exists():
+                return None
+            row.last_accessed = utc_now()
+            session.commit()
+            return self._as_dict(row)
+
+    def put(self, chunks: Iterable[Union[bytes, memoryview]], *, render_key: str,
+            profile_id: Optional[int], voice: str, text_content: str) -> Dict[str, Any]:
+        """
+        Write a render to its content-addressed file and record it.
+
+        Args:
+            chunks: The encoded audio, e.g. the output of ``wav_stream``.
+            render_key: Hash of the synthesis inputs (see ``render_key``).
+            profile_id: Profile the render is accounted to (None for no profile).
+            voice: Voice used for the render.
+            text_content: Text that was synthesized.
+
+        Returns:
+            Dict[str, Any]: The stored audio entry.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp = tempfile.NamedTemporaryFile(dir=self.root, suffix=".tmp", delete=False)
+        try:
+            with tmp:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            content_hash = digest.hexdigest()
+            file_path = f"{content_hash[:2]}/{content_hash}.wav"
+            target = self.path_for(file_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            # Hold the eviction lock until the row exists, so a concurrent eviction
+            # can't delete the file as unreferenced in between.
+            with self._lock, Session(engine) as session:
+                # Identical renders produce identical files, so replacing is harmless.
+                os.replace(tmp.name, target)
+                row = AudioOutput(
+                    profile_id=profile_id,
+                    file_path=file_path,
+                    voice=voice,
+                    text_content=text_content,
+                    render_key=render_key,
+                    content_hash=content_hash,
+                    size_bytes=size,
+                )
+                session.add(row)
+                self._profile_changed(session, profile_id)
+                session.commit()
+                entry = self._as_dict(row)
+        except BaseException:
+            # A render that failed partway (or a failed write) leaves no file behind
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            raise
+        self.enforce_quota(profile_id, keep_id=entry["id"])
+        return entry
+
+    def enforce_quota(self, profile_id: Optional[int], keep_id: Optional[int] = None) -> List[int]:
+        """
+        Evict the least recently used renders of a profile until it is within
+        its quota. The row ``keep_id`` (usually the render just served) is never
+        evicted.
+
+        Returns:
+            List[int]: Ids of the evicted rows.
+        """
+        with self._lock, Session(engine) as session:
+            profile_filter = self._profile_filter(profile_id)
+            total = session.scalar(
+                select(func.coalesce(func.sum(AudioOutput.size_bytes), 0)).where(profile_filter)
+            )
+            if total <= self.profile_quota_bytes:
+                return []
+
+            rows = session.execute(
+                select(AudioOutput.id, AudioOutput.content_hash, AudioOutput.size_bytes)
+                .where(profile_filter, AudioOutput.id != keep_id)
+                .order_by(AudioOutput.last_accessed)
+            ).all()
+            evicted, hashes = [], set()
+            for row in rows:
+                if total <= self.profile_quota_bytes:
+                    break
+                evicted.append(row.id)
+                hashes.add(row.content_hash)
+                total -= row.size_bytes or 0
+            if not evicted:
+                return []
+
+            session.execute(delete(AudioOutput).where(AudioOutput.id.in_(evicted)))
+            self._profile_changed(session, profile_id)
+            session.commit()
+            self._delete_unreferenced(session, hashes)
+            return evicted
+
+    def _delete_unreferenced(self, session, content_hashes: Iterable[str]) -> int:
+        """Delete the files of these hashes that no row references any more (hold ``_lock``)."""
+        content_hashes = set(content_hashes)
+        still_used = set(session.scalars(
+            select(AudioOutput.content_hash).where(AudioOutput.content_hash.in_(content_hashes))
+        ))
+        for content_hash in content_hashes - still_used:
+            self.path_for(f"{content_hash[:2]}/{content_hash}.wav").unlink(missing_ok=True)
+        return len(content_hashes - still_used)
+
+    def delete_unreferenced_files(self, content_hashes: Iterable[str]) -> int:
+        """
+        Delete the audio files of these hashes once their rows are gone
+        (e.g. after a profile was deleted). Files still referenced by other
+        rows are kept.
+
+        Returns:
+            int: Number of files deleted.
+        """
+        with self._lock, Session(engine) as session:
+            return self._delete_unreferenced(session, content_hashes)
+
+
+# Global instance
+_audio_store: Optional[AudioStore] = None
+
+
+def get_audio_store() -> Optional[AudioStore]:
+    """Get the global AudioStore instance, or None when SQLAlchemy is unavailable."""
+    global _audio_store
+    if _audio_store is None and SA_AVAILABLE and engine is not None:
+        quota_mb = int(os.getenv("AUDIO_STORE_PROFILE_QUOTA_MB", "1024"))
+        _audio_store = AudioStore(AUDIO_STORE_DIR, profile_quota_bytes=quota_mb * 2**20)
+    return _audio_store
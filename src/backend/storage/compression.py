@@ -0,0 +1,94 @@
+"""Compression of stored document text.
+
+Document text is stored compressed with zstd when the ``zstandard`` package is
+installed and with zlib otherwise. Every stored value starts with one byte
+naming its codec, so values written with either codec (or stored raw because
+they were too short to be worth compressing) can always be read back, and
+text stored as plain strings before compression was introduced is returned as
+it is.
+"""
+
+import os
+import threading
+import zlib
+from typing import Optional, Union
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - fall back to zlib
+    zstandard = None
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+CODECS = {"none": RAW, "zlib": ZLIB, "zstd": ZSTD}
+
+# Codec for newly stored text: "zstd", "zlib" or "none"
+TEXT_CODEC = os.getenv("TORCHTS_TEXT_COMPRESSION", "zstd" if zstandard else "zlib")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+# Shorter values are stored raw; compressing them gains nothing
+MIN_COMPRESS_BYTES = 64
+
+# zstd (de)compressors are not thread-safe; keep one per thread
+_local = threading.local()
+
+
+def _zstd_compressor():
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _local.compressor
+
+
+def _zstd_decompressor():
+    if not hasattr(_local, "decompressor"):
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+def compress_text(text: str, codec: Optional[str] = None) -> bytes:
+    """
+    Encode text for storage.
+
+    Args:
+        text: The text to store
+        codec: "zstd", "zlib" or "none" (default: ``TEXT_CODEC``)
+
+    Returns:
+        bytes: The codec byte followed by the (compressed) UTF-8 text
+    """
+    codec = codec or TEXT_CODEC
+    if codec not in CODECS:
+        raise ValueError(f"Unknown text compression codec: {codec}")
+    data = text.encode("utf-8")
+    if codec == "none" or len(data) < MIN_COMPRESS_BYTES:
+        return RAW + data
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd text compression requires the 'zstandard' package")
+        return ZSTD + _zstd_compressor().compress(data)
+    return ZLIB + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_text(value: Union[bytes, str]) -> str:
+    """
+    Decode a value written by ``compress_text`` (or stored as plain text).
+
+    Raises:
+        RuntimeError: If the value is zstd-compressed and ``zstandard`` is missing
+        ValueError: If the value doesn't start with a known codec byte
+    """
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    tag, payload = value[:1], value[1:]
+    if tag == RAW:
+        return payload.decode("utf-8")
+    if tag == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if tag == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed text requires the 'zstandard' package")
+        return _zstd_decompressor().decompress(payload).decode("utf-8")
+    raise ValueError("Stored text has an unknown compression codec")
@@ -15,10 +15,24 @@ try:  # pragma: no cover - optional dependency
         ForeignKey,
         DateTime,
         Float,
+        LargeBinary,
         MetaData,
+        UniqueConstraint,
+        Index,
         select,
+        delete,
+        update,
+        exists,
+        inspect,
+        text,
+        event,
+        func,
+        bindparam,
+        literal_column,
     )
-    from sqlalchemy.orm import declarative_base, relationship, Session, sessionmaker
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.orm import declarative_base, deferred, relationship, Session, sessionmaker
+    from sqlalchemy.types import TypeDecorator
     SA_AVAILABLE = True
     try:
         from sqlalchemy.ext.asyncio import (
@@ -39,16 +53,23 @@ except Exception:  # pragma: no cover - SQLAlchemy missing completely
     AsyncSession = None
     create_async_engine = None
     create_engine = None
-    Column = Integer = String = ForeignKey = DateTime = Float = MetaData = select = None
-    declarative_base = relationship = Session = sessionmaker = None
+    Column = Integer = String = ForeignKey = DateTime = Float = LargeBinary = MetaData = UniqueConstraint = Index = None
+    select = delete = update = exists = inspect = text = event = func = bindparam = literal_column = make_url = None
+    declarative_base = deferred = relationship = Session = sessionmaker = None
+    TypeDecorator = object
 from datetime import datetime, timezone
 import os
 from pathlib import Path
 
+from storage.compression import compress_text, decompress_text
+
+# Directory for the database and other persistent data (e.g. rendered audio)
+DATA_DIR = Path(os.getenv("TORCHTS_DATA_DIR", Path.cwd() / "data"))
+
 # Determine database location
 db_url = os.getenv("TORCHTS_DB_URL")
 if db_url is None:
-    db_path = Path.cwd() / "data" / "torchts.db"
+    db_path = DATA_DIR / "torchts.db"
     db_path.parent.mkdir(parents=True, exist_ok=True)
     db_url = f"sqlite:///{db_path}"
 else:
@@ -71,6 +92,20 @@ Base = declarative_base(metadata=metadata)
 def utc_now():
     return datetime.now(timezone.utc)
 
+class CompressedText(TypeDecorator):
+    """
+    Text stored compressed (see ``storage.compression``). Text stored as plain
+    strings, before compression was introduced, is read as it is.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decompress_text(value)
+
 class Profile(Base):
     __tablename__ = 'profiles'
     
@@ -79,6 +114,8 @@ class Profile(Base):
     created_at: datetime = Column(DateTime(timezone=True), default=utc_now)
     voice_preset: str = Column(String)
     volume: float = Column(Float, default=0.8)
+    # Bumped whenever the profile's files or audio change (see ``bump_profile_version``)
+    version: int = Column(Integer, nullable=False, default=0, server_default="0")
     
     files = relationship("File", back_populates="profile", cascade="all, delete-orphan")
     audio_outputs = relationship("AudioOutput", back_populates="profile", cascade="all, delete-orphan")
@@ -86,18 +123,66 @@ class Profile(Base):
     def __repr__(self):
         return f"<Profile(id={self.id}, name={self.name})>"
 
+class Document(Base):
+    __tablename__ = 'documents'
+    __table_args__ = (UniqueConstraint('content_hash', 'file_type'),)
+    
+    id: int = Column(Integer, primary_key=True)
+    content_hash: str = Column(String, nullable=False)  # SHA-256 of the uploaded bytes
+    file_type: str = Column(String, nullable=False)
+    # Parsed text, loaded (and decompressed) only when accessed
+    content = deferred(Column(CompressedText, nullable=False))
+    pages: int = Column(Integer)
+    created_at: datetime = Column(DateTime(timezone=True), default=utc_now)
+    
+    files = relationship("File", back_populates="document")
+    segments = relationship(
+        "DocumentSegment", back_populates="document",
+        cascade="all, delete-orphan", order_by="DocumentSegment.seq",
+    )
+    
+    def __repr__(self):
+        return f"<Document(id={self.id}, content_hash={self.content_hash})>"
+
+class DocumentSegment(Base):
+    __tablename__ = 'document_segments'
+    
+    document_id: int = Column(Integer, ForeignKey('documents.id'), primary_key=True)
+    seq: int = Column(Integer, primary_key=True)  # 0-based position in the document
+    page: int = Column(Integer, nullable=False)  # Page (estimated for formats without pages)
+    char_start: int = Column(Integer, nullable=False)  # Offsets into the document text
+    char_end: int = Column(Integer, nullable=False)
+    content = deferred(Column(CompressedText, nullable=False))
+    
+    document = relationship("Document", back_populates="segments")
+    
+    def __repr__(self):
+        return f"<DocumentSegment(document_id={self.document_id}, seq={self.seq})>"
+
 class File(Base):
     __tablename__ = 'files'
+    # Covers file listings, so they never read rows (and their inline content)
+    __table_args__ = (
+        Index('ix_files_listing', 'profile_id', 'id', 'filename', 'file_type', 'pages', 'created_at'),
+    )
     
     id: int = Column(Integer, primary_key=True)
     profile_id: int = Column(Integer, ForeignKey('profiles.id'), index=True)
+    document_id: int = Column(Integer, ForeignKey('documents.id'), index=True)
     filename: str = Column(String, nullable=False)
     file_type: str = Column(String, nullable=False)
-    content: str = Column(String, nullable=False)  # Stored text content
+    # Text of files uploaded before documents were shared; empty when document_id is set
+    content = deferred(Column(CompressedText, nullable=False, default=""))
     pages: int = Column(Integer)
     created_at: datetime = Column(DateTime(timezone=True), default=utc_now)
     
     profile = relationship("Profile", back_populates="files")
+    document = relationship("Document", back_populates="files")
+    
+    @property
+    def text(self) -> str:
+        """The file's text, from its shared document or the legacy inline column."""
+        return self.document.content if self.document_id is not None else self.content
     
     def __repr__(self):
         return f"<File(id={self.id}, filename={self.filename})>"
@@ -111,24 +196,81 @@ class AudioOutput(Base):
     voice: str = Column(String, nullable=False)
     text_content: str = Column(String, nullable=False)
     created_at: datetime = Column(DateTime(timezone=True), default=utc_now)
+    render_key: str = Column(String, index=True)  # Hash of the synthesis inputs
+    content_hash: str = Column(String, index=True)  # SHA-256 of the stored file
+    size_bytes: int = Column(Integer, default=0)
+    last_accessed: datetime = Column(DateTime(timezone=True), default=utc_now)
     
     profile = relationship("Profile", back_populates="audio_outputs")
     
     def __repr__(self):
         return f"<AudioOutput(id={self.id}, file_path={self.file_path})>"
 
+# Applied to every SQLite connection
+SQLITE_PRAGMAS = {
+    "busy_timeout": 5000,  # Wait this many ms for the write lock instead of failing
+    "journal_mode": "WAL",  # Readers and the writer don't block each other
+    "synchronous": "NORMAL",  # Durable with WAL; fsync only at checkpoints
+    "mmap_size": 256 * 2**20,  # Read pages through a memory map
+    "cache_size": -64 * 1024,  # Page cache per connection (negative: KiB)
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",  # Off by default in SQLite: reject files referencing purged documents
+}
+
+# Connections kept open per engine (the same number again may be opened under load)
+DB_POOL_SIZE = int(os.getenv("TORCHTS_DB_POOL_SIZE", "8"))
+
+def _sqlite_connect_listener(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+def create_db_engine(url: str = db_url, *, use_async: bool = False, pragmas=None,
+                     pool_size: int = DB_POOL_SIZE):
+    """
+    Create the engine for a database URL.
+
+    SQLite connections get ``SQLITE_PRAGMAS`` (or ``pragmas``) when they are
+    opened. For an async engine, plain ``sqlite://`` URLs use the aiosqlite
+    driver.
+
+    Args:
+        url: Database URL (default: ``TORCHTS_DB_URL`` or the data directory)
+        use_async: Create an ``AsyncEngine``
+        pragmas: SQLite pragmas to apply instead of ``SQLITE_PRAGMAS``
+        pool_size: Connections kept in the pool
+
+    Returns:
+        Engine or AsyncEngine
+    """
+    url = make_url(url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    if use_async and url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    options = {}
+    # In-memory SQLite databases live in a single connection; keep its default pool.
+    if not (is_sqlite and url.database in (None, "", ":memory:")):
+        options.update(pool_size=pool_size, max_overflow=pool_size)
+    db_engine = (create_async_engine if use_async else create_engine)(url, **options)
+    if is_sqlite:
+        target = db_engine.sync_engine if use_async else db_engine
+        event.listen(target, "connect", _sqlite_connect_listener(SQLITE_PRAGMAS if pragmas is None else pragmas))
+    return db_engine
+
 if SA_AVAILABLE:
     # Create synchronous engine
-    engine = create_engine('sqlite:///data/torchts.db')
+    engine = create_db_engine(db_url)
 else:  # pragma: no cover - SQLAlchemy not installed
     engine = None
 
 # Attempt to create asynchronous engine if supported
 if ASYNC_AVAILABLE:
     try:
-        async_engine: AsyncEngine = create_async_engine(
-            'sqlite+aiosqlite:///data/torchts.db'
-        )
+        async_engine: AsyncEngine = create_db_engine(db_url, use_async=True)
         AsyncSessionLocal = sessionmaker(
             bind=async_engine,
             expire_on_commit=False,
@@ -144,9 +286,186 @@ else:
     AsyncSessionLocal = None
     ASYNC_DB = False
 
+def add_missing_columns():
+    """
+    Add columns and indexes that were introduced after the database was
+    created. ``create_all`` only creates missing tables, so existing databases
+    would otherwise lack newly declared columns and indexes.
+    """
+    if engine is None:
+        return
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = [column for column in table.columns if column.name not in existing]
+            for column in added:
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def compress_stored_text(batch_size: int = 200):
+    """
+    Compress text stored before compression was introduced.
+
+    Rows are rewritten in batches, each in its own transaction, and the
+    database is vacuumed afterwards so the freed pages are returned to the
+    file system.
+    """
+    rowid = literal_column("rowid")
+    converted = 0
+    for column in (Document.__table__.c.content, DocumentSegment.__table__.c.content, File.__table__.c.content):
+        table = column.table
+        update = (
+            table.update()
+            .where(rowid == bindparam("row"))
+            .values({column.name: bindparam("value", type_=LargeBinary)})
+        )
+        last = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(rowid, column)
+                    .where(rowid > last, func.typeof(column) == "text")
+                    .order_by(rowid)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                conn.execute(update, [{"row": row[0], "value": compress_text(row[1])} for row in rows])
+            last = rows[-1][0]
+            converted += len(rows)
+    if converted:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+
+# Full-text index over document segments. It is contentless (the text stays
+# compressed in document_segments only) and its rowids are the segments'
+# rowids. SQL can't read the compressed text, so the index is kept in step
+# from Python, by ``index_segments`` and ``delete_orphaned_documents``:
+# segments written by other means aren't indexed.
+SEARCH_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5("
+    "content, content='', tokenize='unicode61 remove_diacritics 2')"
+)
+SEARCH_INDEX_INSERT = (
+    "INSERT INTO document_fts(rowid, content) SELECT rowid, :content FROM document_segments "
+    "WHERE document_id = :document_id AND seq = :seq"
+)
+# Removing an entry from a contentless index takes the text it was indexed with
+SEARCH_INDEX_DELETE = "INSERT INTO document_fts(document_fts, rowid, content) VALUES ('delete', :rowid, :content)"
+
+def create_search_index(batch_size: int = 500):
+    """Create the full-text index and index the stored segments, in batches."""
+    rowid = literal_column("rowid")
+    content = DocumentSegment.__table__.c.content
+    with engine.begin() as conn:
+        conn.exec_driver_sql(SEARCH_INDEX_DDL)
+    last = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select(rowid, content).where(rowid > last).order_by(rowid).limit(batch_size)).all()
+            if not rows:
+                break
+            conn.execute(text("INSERT INTO document_fts(rowid, content) VALUES (:rowid, :content)"),
+                         [{"rowid": row[0], "content": row[1]} for row in rows])
+        last = rows[-1][0]
+
+def drop_search_triggers():
+    """
+    Drop the triggers that maintained the search index in SQL: they called a
+    function only this backend's connections had, so any other writer failed.
+    """
+    with engine.begin() as conn:
+        for action in ("insert", "delete", "update"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS document_segments_fts_{action}")
+
+# Migrations that rewrite existing data, in order. A SQLite database records
+# how many it has applied as PRAGMA user_version.
+MIGRATIONS = (compress_stored_text, create_search_index, drop_search_triggers)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate_database():
+    """Apply the migrations a SQLite database hasn't had yet."""
+    if engine is None or engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+
+# Escape character for LIKE patterns built by ``contains_pattern``
+LIKE_ESCAPE = "/"
+
+def contains_pattern(value: str) -> str:
+    """LIKE pattern matching strings that contain ``value`` literally (use ``escape=LIKE_ESCAPE``)."""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        value = value.replace(char, LIKE_ESCAPE + char)
+    return f"%{value}%"
+
+def index_segments(session, document_id: int, texts) -> None:
+    """Add a new document's segments, given their texts in order, to the search index."""
+    if not SEARCH_AVAILABLE or not texts:
+        return
+    session.flush()  # The segments need their rowids
+    session.execute(text(SEARCH_INDEX_INSERT),
+                    [{"document_id": document_id, "seq": seq, "content": content} for seq, content in enumerate(texts)])
+
+def delete_orphaned_documents(session, document_ids=None) -> None:
+    """
+    Delete the documents that no file references any more, their segments and
+    the segments' search index entries, in the session's transaction.
+
+    Args:
+        document_ids: Only consider these documents (default: all of them)
+    """
+    orphaned = select(Document.id).where(~exists().where(File.document_id == Document.id))
+    if document_ids is not None:
+        orphaned = orphaned.where(Document.id.in_(document_ids))
+    segments = delete(DocumentSegment).where(DocumentSegment.document_id.in_(orphaned))
+    if SEARCH_AVAILABLE:
+        rows = session.execute(segments.returning(literal_column("rowid"), DocumentSegment.content)).all()
+        if rows:
+            session.execute(text(SEARCH_INDEX_DELETE), [{"rowid": row[0], "content": row[1]} for row in rows])
+    else:
+        session.execute(segments)
+    session.execute(delete(Document).where(Document.id.in_(orphaned)))
+
+def bump_profile_version(profile_id):
+    """
+    Statement marking a profile's files or audio as changed. Execute it in
+    the transaction making the change; listings use ``Profile.version`` as
+    their cache validator.
+    """
+    return update(Profile).where(Profile.id == profile_id).values(version=Profile.version + 1)
+
+def purge_orphaned_documents(document_ids, batch_size: int = 20) -> None:
+    """
+    Delete the documents among ``document_ids`` that no file references any
+    more, a few per transaction. Removing a large document's segments (and
+    their full-text index entries) takes a while, so this is done after the
+    files are gone instead of while the request that deleted them waits.
+    """
+    document_ids = sorted(set(document_ids) - {None})
+    for start in range(0, len(document_ids), batch_size):
+        with Session(engine) as session:
+            delete_orphaned_documents(session, document_ids[start:start + batch_size])
+            session.commit()
+
 # Create all tables
 if engine is not None:
     Base.metadata.create_all(engine)
+    add_missing_columns()
+    migrate_database()
+
+# Whether the full-text index exists (SQLite only)
+SEARCH_AVAILABLE = engine is not None and engine.dialect.name == "sqlite"
 
 # Create default profile if none exists
 def create_default_profile():
@@ -0,0 +1,26 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.backend.services import cache_service
+
+
+def test_etag_depends_on_every_part():
+    etag = cache_service.make_etag("files", 1, 3)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == cache_service.make_etag("files", 1, 3)
+    assert etag != cache_service.make_etag("files", 1, 4)
+
+
+def test_if_none_match_lists_and_weak_tags():
+    etag = '"abc"'
+    assert cache_service.etag_matches('"x", "abc"', etag)
+    assert cache_service.etag_matches('W/"abc"', etag)
+    assert cache_service.etag_matches("*", etag)
+    assert not cache_service.etag_matches('"abcd"', etag)
+    assert not cache_service.etag_matches(None, etag)
+
+
+def test_not_modified_carries_the_etag():
+    response = cache_service.not_modified('"abc"', {"Cache-Control": "no-cache"})
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,27 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import pytest
+
+from src.backend.storage import compression
+
+
+def test_compressed_text_round_trip():
+    text = "Chapter one. " * 500
+    stored = compression.compress_text(text, "zlib")
+    assert stored[:1] == compression.ZLIB
+    assert len(stored) < len(text)
+    assert compression.decompress_text(stored) == text
+
+
+def test_short_text_is_stored_raw():
+    stored = compression.compress_text("short", "zlib")
+    assert stored == compression.RAW + b"short"
+    assert compression.decompress_text(stored) == "short"
+
+
+def test_plain_text_from_before_compression_is_returned_as_is():
+    assert compression.decompress_text("stored as text") == "stored as text"
+
+
+def test_unknown_codec_byte_is_rejected():
+    with pytest.raises(ValueError):
+        compression.decompress_text(b"\x7fgarbage")
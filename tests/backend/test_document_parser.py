@@ -0,0 +1,49 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import io
+import zipfile
+
+from src.backend.processing import document_parser
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+
+def _text_box(text: str) -> str:
+    """A text box as Word saves it: a drawing, and a VML copy for older readers."""
+    content = f"<w:txbxContent><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:txbxContent>"
+    return (
+        "<w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx>{content}</wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:shape><v:textbox>{content}</v:textbox></v:shape></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r>"
+    )
+
+
+def _docx(body: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>")
+    return buffer.getvalue()
+
+
+def test_docx_text_box_is_read_once():
+    content = _docx(
+        "<w:p><w:r><w:t>Before </w:t></w:r>" + _text_box("Boxed") + "<w:r><w:t>after</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>Next</w:t></w:r></w:p>"
+    )
+    assert list(document_parser.iter_docx_paragraphs(content)) == ["Boxed", "Before after", "Next"]
+
+
+def test_estimated_pages_match_segment_pages(tmp_path):
+    lines = ["line %d of a document without pages" % i for i in range(500)]
+    for text in ("x" * 6001, "\n".join(lines)):
+        path = tmp_path / "doc.txt"
+        path.write_text(text)
+        segments, pages = document_parser.parse_document_segments(path, "txt")
+        assert pages == segments[-1].page == len(segments)
+        assert pages >= -(-len(text) // document_parser.SEGMENT_CHARS)
+    assert document_parser.parse_text(b"short")[1] == 1
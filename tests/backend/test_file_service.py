@@ -1,5 +1,7 @@
 import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 import asyncio
+import collections
+import contextlib
 import sys
 import types
 import pytest
@@ -18,27 +20,53 @@ class UploadFile:
     def __init__(self, filename: str, content: bytes):
         self.filename = filename
         self._content = content
-    async def read(self):
-        return self._content
+        self._position = 0
+        self.size = len(content)
+    async def read(self, size=-1):
+        if size < 0:
+            size = len(self._content)
+        chunk = self._content[self._position:self._position + size]
+        self._position += len(chunk)
+        return chunk
+    async def seek(self, offset):
+        self._position = offset
 
 sys.modules['fastapi'] = types.SimpleNamespace(HTTPException=HTTPException, UploadFile=UploadFile)
 
 # Stub document parser
-sys.modules['processing.document_parser'] = types.SimpleNamespace(parse_document=lambda c, e: ("parsed", 1))
+Segment = collections.namedtuple("Segment", "text page")
+sys.modules['processing.document_parser'] = types.SimpleNamespace(
+    SEGMENT_CHARS=3000,
+    Segment=Segment,
+    parse_document_segments=lambda p, e: ([Segment("parsed", 1)], 1),
+    split_segments=lambda text: [Segment(text, 1)],
+)
 
 # Fake in-memory DB structures
-DB = {"profiles": {}, "files": []}
+DB = {"profiles": {}, "files": [], "documents": [], "segments": [], "statements": []}
 
 class FakeProfile:
     def __init__(self, pid):
         self.id = pid
 
+class FakeDocument:
+    def __init__(self, content_hash, file_type, content, pages):
+        self.content_hash = content_hash
+        self.file_type = file_type
+        self.content = content
+        self.pages = pages
+        self.id = None
+
+class FakeSegment:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
 class FakeDBFile:
-    def __init__(self, profile_id, filename, file_type, content, pages):
+    def __init__(self, profile_id, document_id, filename, file_type, pages):
         self.profile_id = profile_id
+        self.document_id = document_id
         self.filename = filename
         self.file_type = file_type
-        self.content = content
         self.pages = pages
         self.id = None
         self.created_at = "now"
@@ -57,12 +85,67 @@ class FakeSession:
     def first(self):
         if self.model is FakeProfile:
             return DB["profiles"].get(self.kwargs.get("id"))
+        if self.model is FakeDocument:
+            return next((d for d in DB["documents"]
+                         if all(getattr(d, k) == v for k, v in self.kwargs.items())), None)
+    def all(self):
+        return [s for s in DB["segments"] if all(getattr(s, k) == v for k, v in self.kwargs.items())]
+    def begin_nested(self):
+        return contextlib.nullcontext()
     def add(self, obj):
-        obj.id = len(DB["files"]) + 1
-        DB["files"].append(obj)
+        table = DB["documents"] if isinstance(obj, FakeDocument) else DB["files"]
+        obj.id = len(table) + 1
+        table.append(obj)
+    def add_all(self, objs):
+        DB["segments"].extend(objs)
+    def execute(self, stmt):
+        DB["statements"].append(stmt)
+        if isinstance(stmt, FakeDelete):
+            return stmt.run()
+    def flush(self):
+        pass
     def commit(self):
         pass
 
+class FakeColumn:
+    def __init__(self, name):
+        self.name = name
+    def __eq__(self, value):
+        return (self.name, value)
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+class FakeDelete:
+    """``delete(File).where(...).returning(...)`` over ``DB["files"]``."""
+    def __init__(self, model):
+        self.conditions = []
+    def where(self, *conditions):
+        self.conditions += conditions
+        return self
+    def returning(self, *columns):
+        self.columns = [column.name for column in columns]
+        return self
+    def run(self):
+        Row = collections.namedtuple("Row", self.columns)
+        matched = [f for f in DB["files"] if all(getattr(f, k) == v for k, v in self.conditions)]
+        DB["files"] = [f for f in DB["files"] if f not in matched]
+        return FakeResult([Row(*(getattr(f, c) for c in self.columns)) for f in matched])
+
+class FakeAsyncSession:
+    """``AsyncSession`` over the same fake tables: ``run_sync`` gets a ``FakeSession``."""
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        pass
+    async def get(self, model, pk):
+        return DB["profiles"].get(pk) if model is FakeProfile else None
+    async def run_sync(self, fn, *args):
+        return fn(FakeSession(), *args)
+
 class SessionFactory:
     def __call__(self, engine):
         return FakeSession()
@@ -74,6 +157,9 @@ fake_models = types.ModuleType('storage.models')
 fake_models.engine = object()
 fake_models.Profile = FakeProfile
 fake_models.File = FakeDBFile
+fake_models.Document = FakeDocument
+fake_models.DocumentSegment = FakeSegment
+fake_models.bump_profile_version = lambda profile_id: ("bump_profile_version", profile_id)
 sys.modules['storage.models'] = fake_models
 
 from importlib import import_module
@@ -85,8 +171,9 @@ def test_upload_profile_file_service_success():
     file = UploadFile("test.txt", b"data")
     result = asyncio.run(file_service.upload_profile_file_service(1, file))
     assert result["filename"] == "test.txt"
-    assert DB["files"][0].content == "parsed"
+    assert DB["documents"][DB["files"][0].document_id - 1].content == "parsed"
     assert result["pages"] == 1
+    assert ("bump_profile_version", 1) in DB["statements"]
 
 
 def test_upload_profile_file_service_profile_not_found():
@@ -99,10 +186,201 @@ def test_upload_profile_file_service_profile_not_found():
 
 def test_upload_profile_file_service_parse_error(monkeypatch):
     DB["profiles"][1] = FakeProfile(1)
-    def bad_parse(content, ext):
+    DB["documents"].clear()  # no earlier parse of these bytes to reuse
+    def bad_parse(path, ext):
         raise Exception("boom")
-    monkeypatch.setattr(file_service, "parse_document", bad_parse)
+    monkeypatch.setattr(file_service, "parse_document_segments", bad_parse)
     file = UploadFile("test.txt", b"data")
     with pytest.raises(HTTPException) as exc:
         asyncio.run(file_service.upload_profile_file_service(1, file))
     assert exc.value.status_code == 400
+
+
+def test_upload_profile_file_service_spools_upload_to_disk(monkeypatch):
+    DB["profiles"][1] = FakeProfile(1)
+    seen = {}
+    def read_spooled(path, ext):
+        with open(path, "rb") as f:
+            seen["content"] = f.read()
+        seen["path"] = path
+        return [Segment("parsed", 1)], 1
+    monkeypatch.setattr(file_service, "parse_document_segments", read_spooled)
+    monkeypatch.setattr(file_service, "UPLOAD_CHUNK_SIZE", 3)
+    file = UploadFile("test.txt", b"chunked data")
+    asyncio.run(file_service.upload_profile_file_service(1, file))
+    assert seen["content"] == b"chunked data"
+    assert not os.path.exists(seen["path"])
+
+
+def test_upload_profile_file_service_rejects_oversized_upload(monkeypatch):
+    DB["profiles"][1] = FakeProfile(1)
+    monkeypatch.setattr(file_service, "MAX_UPLOAD_BYTES", 3)
+    file = UploadFile("test.txt", b"data")
+    file.size = None  # size unknown up front: rejected while streaming
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_service.upload_profile_file_service(1, file))
+    assert exc.value.status_code == 413
+
+
+def test_upload_profile_file_service_reuses_parsed_document(monkeypatch):
+    DB["profiles"].update({1: FakeProfile(1), 2: FakeProfile(2)})
+    DB["files"].clear()
+    DB["documents"].clear()
+    calls = []
+    def counting_parse(path, ext):
+        calls.append(path)
+        return [Segment("parsed ", 1), Segment("once", 2)], 3
+    monkeypatch.setattr(file_service, "parse_document_segments", counting_parse)
+    first = asyncio.run(file_service.upload_profile_file_service(1, UploadFile("a.pdf", b"same bytes")))
+    second = asyncio.run(file_service.upload_profile_file_service(2, UploadFile("b.pdf", b"same bytes")))
+    assert len(calls) == 1
+    assert len(DB["documents"]) == 1
+    assert [(s.seq, s.char_start, s.char_end) for s in DB["segments"][-2:]] == [(0, 0, 7), (1, 7, 11)]
+    assert DB["files"][0].document_id == DB["files"][1].document_id
+    assert second["content"] == first["content"] == "parsed once"
+    assert second["pages"] == 3
+
+
+def test_upload_of_a_stored_document_is_not_spooled(monkeypatch):
+    DB["profiles"][1] = FakeProfile(1)
+    async def stored(content_hash, file_type):
+        return "stored text", 1, [Segment("stored text", 1)]
+    async def no_spool(file):
+        raise AssertionError("a stored document was spooled again")
+    monkeypatch.setattr(file_service, "_find_document", stored)
+    monkeypatch.setattr(file_service, "_spool_upload", no_spool)
+    result = asyncio.run(file_service.upload_profile_file_service(1, UploadFile("a.txt", b"bytes")))
+    assert result["content"] == "stored text"
+
+
+def test_upload_stores_a_document_purged_after_the_dedupe_lookup(monkeypatch):
+    DB["profiles"][1] = FakeProfile(1)
+    DB["files"].clear()
+    DB["documents"].clear()
+    DB["segments"].clear()
+    async def purged(content_hash, file_type):
+        # Found when the upload was read, then purged before the file was stored
+        return "stored text", 2, [Segment("stored ", 1), Segment("text", 2)]
+    monkeypatch.setattr(file_service, "_find_document", purged)
+    result = asyncio.run(file_service.upload_profile_file_service(1, UploadFile("a.pdf", b"bytes")))
+    assert result["content"] == "stored text"
+    assert [d.content for d in DB["documents"]] == ["stored text"]
+    assert DB["files"][0].document_id == DB["documents"][0].id
+    assert [(s.page, s.char_start, s.char_end) for s in DB["segments"]] == [(1, 0, 7), (2, 7, 11)]
+
+
+def test_range_response_trims_character_window():
+    segments = [(0, 1, 0, 5, "hello"), (1, 1, 5, 11, " world")]
+    file_obj = types.SimpleNamespace(id=1, filename="a.txt", pages=1)
+    content_range = file_service._content_range(None, None, 1, 3, 8)
+    result = file_service._range_response(file_obj, segments, 2, 11, content_range)
+    assert result["content"] == "lo wo"
+    assert (result["char_start"], result["char_end"]) == (3, 8)
+    assert [s["seq"] for s in result["segments"]] == [0, 1]
+
+
+def test_content_range_rejects_conflicting_selectors():
+    with pytest.raises(HTTPException) as exc:
+        file_service._content_range(2, 0, 1, None, None)
+    assert exc.value.status_code == 400
+
+
+def test_fts_query_quotes_words_and_rejects_empty_queries():
+    assert file_service._fts_query('dragon "OR* 42') == ('"dragon" "OR" "42"', ["dragon", "OR", "42"])
+    with pytest.raises(HTTPException) as exc:
+        file_service._fts_query('"*')
+    assert exc.value.status_code == 400
+
+
+def test_search_results_group_hits_by_file():
+    Row = collections.namedtuple("Row", "file_id filename seq page char_start content")
+    rows = [
+        Row(2, "b.txt", 4, 2, 1000, "then the Dragon woke"),
+        Row(1, "a.txt", 0, 1, 0, "no match here"),
+        Row(2, "b.txt", 1, 1, 300, "a dragon"),
+    ]
+    results = file_service._search_results(rows, ["dragon"], limit=1)
+    assert [r["id"] for r in results] == [2]
+    assert [(h["segment"], h["char_offset"]) for h in results[0]["hits"]] == [(1, 302), (4, 1009)]
+
+
+def test_spool_archive_extracts_documents_and_skips_the_rest():
+    import io
+    import zipfile
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("books/one.txt", "text")
+        archive.writestr("books/cover.png", "png")
+        archive.writestr("__MACOSX/books/._one.txt", "junk")
+    items = []
+    events = file_service._spool_archive(buffer, "books.zip", items)
+    try:
+        assert [(i.filename, i.file_type) for i in items] == [("books/one.txt", "txt")]
+        assert [(e["filename"], e["status"]) for e in events] == [("books/cover.png", "skipped")]
+        with open(items[0].path, "rb") as f:
+            assert f.read() == b"text"
+    finally:
+        for item in items:
+            os.unlink(item.path)
+    assert file_service._spool_archive(io.BytesIO(b"nope"), "bad.zip", [])[0]["status"] == "error"
+
+
+def test_delete_file_without_a_shared_document(monkeypatch):
+    DB["profiles"][1] = FakeProfile(1)
+    legacy = FakeDBFile(1, None, "old.txt", "txt", 1)  # Uploaded before documents were shared
+    legacy.id = 7
+    DB["files"] = [legacy]
+    cleaned = []
+    monkeypatch.setattr(file_service, "delete", FakeDelete)
+    monkeypatch.setattr(file_service, "DBFile", types.SimpleNamespace(
+        id=FakeColumn("id"), profile_id=FakeColumn("profile_id"), document_id=FakeColumn("document_id")))
+    monkeypatch.setattr(file_service, "schedule_cleanup", cleaned.append)
+    result = asyncio.run(file_service.delete_profile_file_service(1, 7))
+    assert result == {"message": "File deleted successfully"}
+    assert DB["files"] == [] and cleaned == []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_service.delete_profile_file_service(1, 7))
+    assert exc.value.status_code == 404
+
+
+def test_timed_out_parses_hold_the_pool_until_they_finish(monkeypatch):
+    import threading
+    DB["profiles"][1] = FakeProfile(1)
+    DB["documents"].clear()
+    release = threading.Event()
+    def stuck_parse(path, ext):
+        release.wait(5)
+        return [Segment("parsed", 1)], 1
+    monkeypatch.setattr(file_service, "parse_document_segments", stuck_parse)
+    monkeypatch.setattr(file_service, "PARSE_TIMEOUT", 0.05)
+    monkeypatch.setattr(file_service, "PARSE_WORKERS", 1)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_service.upload_profile_file_service(1, UploadFile("a.txt", b"first")))
+    assert exc.value.status_code == 422
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_service.upload_profile_file_service(1, UploadFile("b.txt", b"second")))
+    assert exc.value.status_code == 503
+    release.set()
+    for _ in range(100):
+        if file_service._abandoned_parses == 0:
+            break
+        threading.Event().wait(0.01)
+    result = asyncio.run(file_service.upload_profile_file_service(1, UploadFile("c.txt", b"third")))
+    assert result["filename"] == "c.txt"
+
+
+def test_upload_profile_file_service_async_session(monkeypatch):
+    from src.backend.services import metrics_service
+    DB["profiles"][1] = FakeProfile(1)
+    DB["files"].clear()
+    DB["documents"].clear()
+    monkeypatch.setattr(file_service, "ASYNC_DB", True)
+    monkeypatch.setattr(file_service, "AsyncSessionLocal", FakeAsyncSession)
+    # The real stage timer, which is a synchronous context manager only
+    monkeypatch.setattr(file_service, "request_timing", metrics_service.request_timing)
+    result = asyncio.run(file_service.upload_profile_file_service(1, UploadFile("async.txt", b"async bytes")))
+    assert result["filename"] == "async.txt"
+    assert DB["files"][0].document_id == DB["documents"][0].id
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_service.upload_profile_file_service(99, UploadFile("async.txt", b"async bytes")))
+    assert exc.value.status_code == 404
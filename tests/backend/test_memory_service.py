@@ -0,0 +1,54 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import pytest
+
+from src.backend.services import memory_service
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    tracker = memory_service._RequestMemory(history_size=10)
+    monkeypatch.setattr(memory_service, "_requests", tracker)
+    return tracker
+
+
+def test_process_memory_reports_rss_and_peak():
+    memory = memory_service.process_memory()
+    assert memory["peak_rss_bytes"] > 0
+    if sys.platform.startswith("linux"):
+        assert 0 < memory["rss_bytes"] <= memory["peak_rss_bytes"]
+
+
+def test_request_peak_covers_its_allocations(requests):
+    with memory_service.track_request("single"):
+        block = bytearray(32 * 2**20)
+        block[::4096] = b"x" * len(block[::4096])  # Touch every page
+        del block
+    record, = memory_service.recent_requests()
+    assert record["mode"] == "single" and not record["overlapped"]
+    if record["peak_is_own"]:
+        assert record["peak_increase_bytes"] >= 30 * 2**20
+
+
+def test_overlapping_requests_are_flagged(requests):
+    outer = memory_service.track_request("multi")
+    outer.__enter__()
+    with memory_service.track_request("single"):
+        pass
+    outer.__exit__(None, None, None)
+    inner, outer_record = memory_service.recent_requests()
+    assert inner["overlapped"] and outer_record["overlapped"]
+    assert not outer_record["peak_is_own"]
+
+
+def test_tensor_bytes_counts_elements_times_size():
+    class Tensor:
+        def __init__(self, n, size):
+            self.n, self.size = n, size
+
+        def numel(self):
+            return self.n
+
+        def element_size(self):
+            return self.size
+
+    assert memory_service.tensor_bytes([Tensor(10, 4), Tensor(3, 2)]) == 46
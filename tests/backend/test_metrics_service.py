@@ -0,0 +1,43 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.backend.services import metrics_service
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics_service.Histogram("test_latency_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    child = histogram.labels("parse")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+    text = histogram.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_sum{stage="parse"} 4.05' in text
+    assert 'test_latency_seconds_count{stage="parse"} 4' in text
+
+
+def test_gauge_tracks_the_block_and_escapes_labels():
+    gauge = metrics_service.Gauge("test_in_flight", "Test gauge", ("path",))
+    with gauge.track('a "b"'):
+        assert 'test_in_flight{path="a \\"b\\""} 1' in gauge.render()
+    assert 'test_in_flight{path="a \\"b\\""} 0' in gauge.render()
+
+
+def test_unlabelled_metrics_are_exported_before_their_first_update():
+    metrics_service.Counter("test_events_total", "Test counter")
+    assert "test_events_total 0" in metrics_service.render_metrics()
+
+
+def test_stages_are_summed_into_the_request_timings():
+    with metrics_service.collect_timings() as timings:
+        for name in ("chunking", "inference", "inference"):
+            with metrics_service.stage(name):
+                pass
+        metrics_service.record_timing("inference", 0.25)
+    metrics_service.record_timing("chunking", 1.0)  # Outside the request: not collected
+    assert list(timings.durations) == ["chunking", "inference"]
+    assert timings.durations["chunking"] < 0.1
+    assert 0.25 <= timings.durations["inference"] < 0.35
+    header = timings.header(total=0.5)
+    assert header.startswith("chunking;dur=") and header.endswith(", total;dur=500.0")
@@ -0,0 +1,46 @@
+import os, sys; sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from src.backend.services import profiler_service
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_busy_thread_is_sampled_as_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        stacks, samples = profiler_service.sample_stacks(0.2, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+    assert samples > 0
+    spinner = [line for line in stacks.splitlines() if line.startswith("spinner;")]
+    assert spinner
+    frames, count = spinner[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert frames.split(";")[-1].startswith("_spin (")
+
+
+def test_only_one_profile_runs_at_a_time():
+    with profiler_service._profile_lock:
+        with pytest.raises(HTTPException) as error:
+            profiler_service.sample_stacks(0.01)
+    assert error.value.status_code == 409
+
+
+def test_profiling_is_hidden_unless_enabled(monkeypatch):
+    monkeypatch.setattr(profiler_service, "PROFILING_ENABLED", False)
+    with pytest.raises(HTTPException) as error:
+        profiler_service.require_profiling()
+    assert error.value.status_code == 404
+    monkeypatch.setattr(profiler_service, "PROFILING_ENABLED", True)
+    profiler_service.require_profiling()
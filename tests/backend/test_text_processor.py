@@ -22,3 +22,47 @@ def test_chunk_text_handles_overlong_sentence():
     long_sentence = " ".join(["word"] * 100) + "."
     chunks = text_processor.chunk_text(long_sentence, max_tokens=40)
     assert all(len(c) <= 40 for c in chunks)
+
+
+def test_iter_chunks_reports_offsets():
+    text = "Première phrase. Zweiter Satz, mit Komma; und mehr. " * 20
+    encoded = text.encode("utf-8")
+    for chunk in text_processor.iter_chunks(text, max_tokens=60):
+        assert text[chunk.char_start:chunk.char_end] == chunk.text
+        assert encoded[chunk.byte_start:chunk.byte_end].decode("utf-8") == chunk.text
+
+
+def test_iter_chunks_keeps_order_around_overlong_sentence():
+    text = "Short one. " + " ".join(["word"] * 30) + ". Tail sentence."
+    chunks = list(text_processor.iter_chunks(text, max_tokens=40))
+    assert [c.char_start for c in chunks] == sorted(c.char_start for c in chunks)
+    assert chunks[0].text.startswith("Short one.")
+    assert chunks[-1].text.endswith("Tail sentence.")
+    assert all(c.text.strip() for c in chunks)
+
+
+def test_plan_chunks_uses_cjk_sentence_boundaries():
+    text = "今日は良い天気ですね。明日も晴れるでしょうか！" * 30
+    chunks = list(text_processor.plan_chunks(text, "j", max_phonemes=200))
+    assert len(chunks) > 1
+    assert all(c.text.endswith(("。", "！")) for c in chunks)
+    assert all(text_processor.estimate_phonemes(c.text, "j") <= 200 for c in chunks)
+
+
+def test_plan_chunks_splits_unpunctuated_dense_text():
+    text = "这是一个没有标点的非常长的句子" * 100
+    chunks = list(text_processor.plan_chunks(text, "z"))
+    assert "".join(c.text for c in chunks) == text
+    assert all(
+        text_processor.estimate_phonemes(c.text, "z") <= text_processor.MAX_PHONEMES
+        for c in chunks
+    )
+
+
+def test_plan_chunks_latency_mode_ramps_up():
+    text = "The quick brown fox jumps over the lazy dog, and then it runs away. " * 30
+    latency = list(text_processor.plan_chunks(text, "a", mode="latency"))
+    throughput = list(text_processor.plan_chunks(text, "a"))
+    assert len(latency[0].text) < len(latency[2].text) <= len(throughput[0].text)
+    assert latency[0].text == "The quick brown fox jumps over the lazy dog,"
+    assert latency[-1].char_end == throughput[-1].char_end
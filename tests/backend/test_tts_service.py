@@ -20,7 +20,7 @@ class StreamingResponse:
         self.headers = headers or {}
 
 sys.modules['fastapi'] = types.SimpleNamespace(HTTPException=HTTPException)
-sys.modules['fastapi.responses'] = types.SimpleNamespace(StreamingResponse=StreamingResponse)
+sys.modules['fastapi.responses'] = types.SimpleNamespace(StreamingResponse=StreamingResponse, FileResponse=object)
 
 class FakeNumpyArray(list):
     def __mul__(self, scalar):
@@ -43,15 +43,44 @@ sys.modules['soundfile'] = types.SimpleNamespace(write=lambda buf, data, sr, for
 
 # Use real chunk_text with stubbed rich
 sys.modules['rich'] = types.SimpleNamespace(print=lambda *a, **k: None)
-from src.backend.processing.text_processor import chunk_text
+from src.backend.processing.text_processor import plan_chunks
 sys.modules['processing.text_processor'] = types.ModuleType('processing.text_processor')
-sys.modules['processing.text_processor'].chunk_text = chunk_text
-
-sys.modules['processing.audio_generator'] = types.SimpleNamespace(normalize_audio=lambda x, eps=1e-8: x)
+sys.modules['processing.text_processor'].plan_chunks = plan_chunks
+
+class FakeAssembler:
+    def __init__(self, fade_duration=0.1, sample_rate=24000):
+        self.audio = FakeNumpyArray()
+    def append(self, audio):
+        self.audio.extend(audio)
+    def getvalue(self):
+        return self.audio
+    def to_pcm16(self, dither=0.0):
+        return types.SimpleNamespace(nbytes=2 * len(self.audio))
+    def __len__(self):
+        return len(self.audio)
+
+sys.modules['processing.audio_generator'] = types.SimpleNamespace(
+    AudioAssembler=FakeAssembler,
+    wav_stream=lambda pcm, sample_rate=24000: iter([b'wav']),
+    WAV_HEADER_SIZE=44,
+)
 
 def fake_pipeline(text, voice=None, speed=1.0):
     yield 0, 0, FakeNumpyArray([0.1, 0.2])
 
+class FakeAudioStore:
+    @staticmethod
+    def render_key(*parts):
+        return repr(parts)
+
+sys.modules['storage.audio_store'] = types.SimpleNamespace(
+    AudioStore=FakeAudioStore,
+    get_audio_store=lambda: None,
+)
+sys.modules['services.tuning_service'] = types.SimpleNamespace(
+    get_tuned_settings=lambda: {"max_phonemes": 400, "num_threads": None},
+)
+
 fake_main = types.ModuleType('main')
 fake_main.pipelines = {'a': fake_pipeline, 'b': fake_pipeline}
 sys.modules['main'] = fake_main
@@ -60,11 +89,13 @@ from importlib import import_module
 tts_service = import_module('src.backend.services.tts_service')
 
 class Request:
-    def __init__(self, text, voice, chunk_id=0, speed=1.0):
+    def __init__(self, text, voice, chunk_id=0, speed=1.0, profile_id=None, plan='throughput'):
         self.text = text
         self.voice = voice
         self.chunk_id = chunk_id
         self.speed = speed
+        self.profile_id = profile_id
+        self.plan = plan
 
 
 def test_generate_single_tts_success():